@@ -3,6 +3,7 @@ import logging
 import json
 from typing import Dict, Any, Optional
 from auto_reply_config import auto_reply_config
+from src.utils.phone import strip_jid, to_whatsapp_id
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +20,7 @@ class AutoReplyService:
         try:
             # Check if we should reply
             should_reply_result = auto_reply_config.should_reply(message_data)
-            logger.info(f"DEBUG - Should reply result: {should_reply_result}")
+            logger.debug("Should reply result: %s", should_reply_result)
 
             if not should_reply_result:
                 logger.info("Auto-reply skipped based on configuration")
@@ -37,21 +38,21 @@ class AutoReplyService:
 
             # Use remoteJid if available, otherwise fall back to from field
             if remote_jid:
-                from_number = remote_jid.replace('@c.us', '').replace('@s.whatsapp.net', '')
-                logger.info(f"DEBUG - Using remoteJid: '{remote_jid}'")
+                from_number = strip_jid(remote_jid)
+                logger.debug("Using remoteJid: '%s'", remote_jid)
             else:
-                from_number = raw_from.replace('@c.us', '').replace('@s.whatsapp.net', '')
-                logger.info(f"DEBUG - Using from field: '{raw_from}'")
+                from_number = strip_jid(raw_from)
+                logger.debug("Using from field: '%s'", raw_from)
 
             # Debug logging
-            logger.info(f"DEBUG - Extracted phone number: '{from_number}'")
-            logger.info(f"DEBUG - Full payload keys: {list(payload.keys())}")
-            logger.info(f"DEBUG - Media object type: {type(media)}")
+            logger.debug("Extracted phone number: '%s'", from_number)
+            logger.debug("Full payload keys: %s", list(payload))
+            logger.debug("Media object type: %s", type(media))
             if isinstance(media, dict):
-                logger.info(f"DEBUG - Media keys: {list(media.keys())}")
+                logger.debug("Media keys: %s", list(media))
 
             if not from_number:
-                logger.error("DEBUG - Could not extract sender number; skipping send")
+                logger.error("Could not extract sender number; skipping send")
                 return False
 
             # Get appropriate reply
@@ -112,7 +113,7 @@ class AutoReplyService:
 
             payload = {
                 "session": self.session_name,
-                "chatId": f"{to_number}@c.us",
+                "chatId": f"{to_whatsapp_id(to_number)}@c.us",
                 "text": message
             }
 
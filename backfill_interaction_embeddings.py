@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Backfill interactions.embedding from legacy embedding_json rows (run after applying supabase_schema.sql)."""
+import argparse
+import time
+
+from supabase_client import supabase_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    total = 0
+    started = time.time()
+    while True:
+        migrated = supabase_client.backfill_interaction_embeddings(args.batch_size)
+        if migrated < 0:
+            print(f"Backfill failed after {total} rows")
+            return
+        if migrated == 0:
+            break
+        total += migrated
+        print(f"Migrated {total} rows...")
+    print(f"Backfill done: {total} rows in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Catechumen analytics: every statistics report from a single data load
+
+Inscriptions and catechumenes are reduced once to grouped counts ("cubes"):
+    inscriptions: academic year x class x status (etat) x result -> count
+    catechumenes: baptism x documents provided x birth year     -> count
+
+The grouping runs in Postgres (RPCs inscription_stats / catechumene_stats in
+supabase/supabase_schema.sql). When those functions are not deployed, the same
+cubes are built locally in one pass over the needed columns only. Every report
+(per year, per class, per status, per result, baptism, documents, age) is then
+a marginal of these cubes, no further query.
+
+Reports can also run offline on the local snapshot (supabase/sdb_snapshot.py)
+with --source snapshot, or SDB_ANALYTICS_SOURCE=snapshot for the wrapper scripts.
+
+Usage:
+    python catechumen_analytics.py [--source rpc|local|snapshot] [--years 2023-2024 2024-2025]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from collections import Counter
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+TARGET_YEARS = ["2023-2024", "2024-2025"]
+UNKNOWN_CLASS = "Non spécifiée"
+PAGE_SIZE = 1000
+DEFAULT_SNAPSHOT = os.getenv("SDB_SNAPSHOT_PATH", "sdb_snapshot.db")
+DEFAULT_SOURCE = os.getenv("SDB_ANALYTICS_SOURCE", "auto")
+
+INSCRIPTION_DIMS = ('academic_year', 'classe_nom', 'niveau', 'etat', 'resultat_final')
+CATECHUMENE_DIMS = ('baptise', 'extrait_naissance_fourni', 'extrait_bapteme_fourni',
+                    'attestation_transfert_fournie', 'annee_naissance')
+
+DOCUMENT_LABELS = {
+    'extrait_naissance_fourni': "Extrait de naissance fourni",
+    'extrait_bapteme_fourni': "Extrait de baptême fourni",
+    'attestation_transfert_fournie': "Attestation de transfert fournie",
+}
+
+
+def get_academic_year(value: Any) -> Optional[str]:
+    """
+    Academic year of a date: September to August, 2023-09-15 -> "2023-2024"
+
+    Accepts date/datetime objects and ISO strings ("2024-03-01", "2024-03-01T10:00:00Z").
+    Same rule as the SQL function academic_year().
+    """
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    if not isinstance(value, date):
+        try:
+            value = datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    if value.month >= 9:
+        return f"{value.year}-{value.year + 1}"
+    return f"{value.year - 1}-{value.year}"
+
+
+def connect_to_supabase():
+    """Supabase client from SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY"""
+    from supabase import create_client
+
+    url = os.getenv('SUPABASE_URL')
+    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+    if not url or not key:
+        raise ValueError("Supabase credentials not found in environment variables")
+    return create_client(url, key)
+
+
+# ---------------------------------------------------------------------------
+# Cubes
+# ---------------------------------------------------------------------------
+
+class Cube:
+    """Grouped counts over fixed dimensions, with marginals computed on demand"""
+
+    def __init__(self, dims: Tuple[str, ...], counts: Optional[Counter] = None):
+        self.dims = dims
+        self.counts: Counter = counts if counts is not None else Counter()
+
+    @classmethod
+    def from_rows(cls, dims: Tuple[str, ...], rows: Iterable[Dict[str, Any]], measure: str) -> "Cube":
+        """Build from already grouped rows (RPC output)"""
+        cube = cls(dims)
+        for row in rows:
+            cube.counts[tuple(row.get(d) for d in dims)] += int(row.get(measure) or 0)
+        return cube
+
+    def _index(self, dim: str) -> int:
+        return self.dims.index(dim)
+
+    def total(self, **filters) -> int:
+        return sum(self.group_by(**filters).values()) if filters else sum(self.counts.values())
+
+    def group_by(self, *dims: str, **filters) -> Dict[Any, int]:
+        """Counts per value of `dims` (a tuple key when several), restricted by equality filters"""
+        indexes = [self._index(d) for d in dims]
+        checks = [(self._index(d), v) for d, v in filters.items()]
+        result: Counter = Counter()
+        for key, count in self.counts.items():
+            if any(key[i] != v for i, v in checks):
+                continue
+            group = tuple(key[i] for i in indexes)
+            result[group[0] if len(group) == 1 else group] += count
+        return dict(result)
+
+
+def _iter_pages(supabase, table: str, columns: str) -> Iterator[Dict[str, Any]]:
+    """Keyset pagination on id: no PostgREST row cap"""
+    last = None
+    while True:
+        query = supabase.table(table).select(columns).order('id').limit(PAGE_SIZE)
+        if last is not None:
+            query = query.gt('id', last)
+        rows = query.execute().data or []
+        yield from rows
+        if len(rows) < PAGE_SIZE:
+            return
+        last = rows[-1]['id']
+
+
+def build_cubes_local(supabase) -> Tuple[Cube, Cube]:
+    """One pass over the needed columns when the analytics RPCs are not deployed"""
+    classes = {c['id']: c for c in supabase.table('classes').select('id, classe_nom, niveau').execute().data or []}
+
+    inscriptions = Cube(INSCRIPTION_DIMS)
+    for row in _iter_pages(supabase, 'inscriptions', 'id, date_inscription, id_classe_courante, etat, resultat_final'):
+        classe = classes.get(row.get('id_classe_courante'), {})
+        inscriptions.counts[(get_academic_year(row.get('date_inscription')), classe.get('classe_nom'),
+                             classe.get('niveau'), row.get('etat'), row.get('resultat_final'))] += 1
+
+    catechumenes = Cube(CATECHUMENE_DIMS)
+    for row in _iter_pages(supabase, 'catechumenes', 'id, ' + ', '.join(CATECHUMENE_DIMS)):
+        catechumenes.counts[tuple(row.get(d) for d in CATECHUMENE_DIMS)] += 1
+    return inscriptions, catechumenes
+
+
+def build_cubes_rpc(supabase) -> Tuple[Cube, Cube]:
+    """Grouping done in Postgres: a few hundred rows cross the wire whatever the table sizes"""
+    inscriptions = Cube.from_rows(INSCRIPTION_DIMS, supabase.rpc('inscription_stats', {}).execute().data or [],
+                                  'inscriptions')
+    catechumenes = Cube.from_rows(CATECHUMENE_DIMS, supabase.rpc('catechumene_stats', {}).execute().data or [],
+                                  'catechumenes')
+    return inscriptions, catechumenes
+
+
+def build_cubes_snapshot(path: str) -> Tuple[Cube, Cube]:
+    """Grouping in the local SQLite snapshot (supabase/sdb_snapshot.py): no network"""
+    conn = sqlite3.connect(path)
+    conn.create_function('academic_year', 1, get_academic_year, deterministic=True)
+    try:
+        inscriptions = Cube(INSCRIPTION_DIMS)
+        for *key, count in conn.execute("""
+                SELECT academic_year(i.date_inscription), cl.classe_nom, cl.niveau, i.etat, i.resultat_final, COUNT(*)
+                FROM inscriptions i LEFT JOIN classes cl ON i.id_classe_courante = cl.id
+                GROUP BY 1, 2, 3, 4, 5"""):
+            inscriptions.counts[tuple(key)] += count
+
+        catechumenes = Cube(CATECHUMENE_DIMS)
+        columns = ', '.join(CATECHUMENE_DIMS)
+        for *key, count in conn.execute(f"SELECT {columns}, COUNT(*) FROM catechumenes GROUP BY {columns}"):
+            catechumenes.counts[tuple(key)] += count
+    finally:
+        conn.close()
+    return inscriptions, catechumenes
+
+
+# ---------------------------------------------------------------------------
+# Reports
+# ---------------------------------------------------------------------------
+
+def _age_bucket(birth_year: Any, reference_year: int) -> str:
+    try:
+        age = reference_year - int(str(birth_year).strip())
+    except (TypeError, ValueError):
+        return "Âge inconnu"
+    if age >= 15:
+        return "15+ ans"
+    if age >= 12:
+        return "12-14 ans"
+    if age >= 9:
+        return "9-11 ans"
+    if age >= 6:
+        return "6-8 ans"
+    return "< 6 ans"
+
+
+def _named(counts: Dict[Any, int], unknown: str) -> Dict[str, int]:
+    named: Counter = Counter()
+    for key, count in counts.items():
+        named[key if key else unknown] += count
+    return dict(named)
+
+
+class CatechumenAnalytics:
+    """All catechumen reports, computed from the two cubes"""
+
+    def __init__(self, inscriptions: Cube, catechumenes: Cube):
+        self.inscriptions = inscriptions
+        self.catechumenes = catechumenes
+
+    @classmethod
+    def load(cls, supabase=None, source: str = DEFAULT_SOURCE, snapshot_path: str = DEFAULT_SNAPSHOT) -> "CatechumenAnalytics":
+        """
+        Single data load
+
+        source: 'rpc' (group in Postgres), 'local' (one pass over the tables),
+        'snapshot' (local SQLite snapshot, offline) or 'auto' (rpc, else local)
+        """
+        if source == 'snapshot':
+            if not os.path.exists(snapshot_path):
+                raise FileNotFoundError(f"Snapshot {snapshot_path} not found (python supabase/sdb_snapshot.py refresh)")
+            return cls(*build_cubes_snapshot(snapshot_path))
+        supabase = supabase or connect_to_supabase()
+        if source in ('auto', 'rpc'):
+            try:
+                return cls(*build_cubes_rpc(supabase))
+            except Exception as e:
+                if source == 'rpc':
+                    raise
+                print(f"⚠️  Analytics RPCs unavailable ({e}), grouping locally")
+        return cls(*build_cubes_local(supabase))
+
+    def years(self) -> List[str]:
+        return sorted(y for y in self.inscriptions.group_by('academic_year') if y)
+
+    def year_analysis(self) -> Dict[str, Dict[str, Any]]:
+        """Per academic year: total, by_class, by_status, by_result"""
+        analysis = {}
+        for year in self.years():
+            analysis[year] = {
+                'total': self.inscriptions.total(academic_year=year),
+                'by_class': _named(self.inscriptions.group_by('classe_nom', academic_year=year), UNKNOWN_CLASS),
+                'by_status': _named(self.inscriptions.group_by('etat', academic_year=year), "Inconnu"),
+                'by_result': _named(self.inscriptions.group_by('resultat_final', academic_year=year), "Inconnu"),
+            }
+        return analysis
+
+    def target_years_report(self, years: List[str] = TARGET_YEARS) -> Dict[str, Dict[str, Any]]:
+        analysis = self.year_analysis()
+        report = {}
+        for year in years:
+            data = analysis.get(year, {'total': 0, 'by_class': {}, 'by_status': {}, 'by_result': {}})
+            report[year] = {
+                'total_inscriptions': data['total'],
+                'class_breakdown': data['by_class'],
+                'status_breakdown': data['by_status'],
+                'result_breakdown': data['by_result'],
+            }
+        return report
+
+    def by_class(self, years: Optional[List[str]] = None) -> Dict[str, int]:
+        counts: Counter = Counter()
+        for year in years or [None]:
+            filters = {'academic_year': year} if year else {}
+            counts.update(_named(self.inscriptions.group_by('classe_nom', **filters), UNKNOWN_CLASS))
+        return dict(counts)
+
+    def by_level(self, year: Optional[str] = None) -> Dict[str, int]:
+        filters = {'academic_year': year} if year else {}
+        return _named(self.inscriptions.group_by('niveau', **filters), UNKNOWN_CLASS)
+
+    def success_rate(self, year: str) -> Optional[float]:
+        results = {k: v for k, v in self.inscriptions.group_by('resultat_final', academic_year=year).items() if k}
+        total = sum(results.values())
+        if not total:
+            return None
+        admitted = sum(v for k, v in results.items() if 'ADMIS' in k.upper())
+        return admitted / total * 100
+
+    def validation_rate(self, year: str) -> Optional[float]:
+        total = self.inscriptions.total(academic_year=year)
+        if not total:
+            return None
+        return self.inscriptions.total(academic_year=year, etat='Inscription Validée') / total * 100
+
+    def baptism_stats(self) -> Dict[str, int]:
+        counts = self.catechumenes.group_by('baptise')
+        return {
+            "Baptisé": counts.get('oui', 0),
+            "Non baptisé": sum(v for k, v in counts.items() if k != 'oui'),
+        }
+
+    def document_stats(self) -> Dict[str, int]:
+        return {label: self.catechumenes.total(**{dim: 'oui'}) for dim, label in DOCUMENT_LABELS.items()}
+
+    def age_stats(self, reference_year: Optional[int] = None) -> Dict[str, int]:
+        reference_year = reference_year or datetime.now().year
+        counts: Counter = Counter()
+        for birth_year, count in self.catechumenes.group_by('annee_naissance').items():
+            counts[_age_bucket(birth_year, reference_year)] += count
+        return dict(counts)
+
+    def summary(self, years: List[str] = TARGET_YEARS) -> Dict[str, Any]:
+        """Everything the former scripts produced, in one document"""
+        report = self.target_years_report(years)
+        return {
+            'analysis_date': datetime.now().isoformat(),
+            'years': self.years(),
+            'total_inscriptions_analyzed': self.inscriptions.total(),
+            'total_catechumenes': self.catechumenes.total(),
+            'year_analysis': self.year_analysis(),
+            'target_years_report': report,
+            'class_distribution': self.by_class(),
+            'target_class_distribution': self.by_class(years),
+            'success_rate': {y: self.success_rate(y) for y in years},
+            'validation_rate': {y: self.validation_rate(y) for y in years},
+            'baptism_stats': self.baptism_stats(),
+            'document_stats': self.document_stats(),
+            'age_stats': self.age_stats(),
+        }
+
+
+def _print_breakdown(title: str, counts: Dict[str, int], total: int, indent: str = "   ") -> None:
+    if not counts:
+        return
+    print(f"{indent}{title}:")
+    for name, count in sorted(counts.items(), key=lambda x: (-x[1], x[0])):
+        percentage = (count / total) * 100 if total else 0
+        print(f"{indent}  • {name}: {count} ({percentage:.1f}%)")
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print("\n" + "=" * 80)
+    print("📊 RAPPORT DES STATISTIQUES DES CATÉCHUMÈNES")
+    print("=" * 80)
+    print(f"\n📅 ANNÉES SCOLAIRES DISPONIBLES: {summary['years']}")
+    print(f"📝 Total des inscriptions: {summary['total_inscriptions_analyzed']}")
+    print(f"👥 Total des catéchumènes: {summary['total_catechumenes']}")
+
+    for year, data in summary['target_years_report'].items():
+        total = data['total_inscriptions']
+        if not total:
+            print(f"\n❌ {year}: Aucune donnée trouvée")
+            continue
+        print(f"\n📊 {year}: {total} inscriptions")
+        _print_breakdown("Répartition par classe", data['class_breakdown'], total)
+        _print_breakdown("Répartition par statut", data['status_breakdown'], total)
+        _print_breakdown("Répartition par résultat", data['result_breakdown'], total)
+        if summary['success_rate'].get(year) is not None:
+            print(f"   Taux de réussite: {summary['success_rate'][year]:.1f}%")
+
+    target_total = sum(d['total_inscriptions'] for d in summary['target_years_report'].values())
+    print(f"\n🎯 TOTAL POUR LES ANNÉES CIBLES: {target_total}")
+    _print_breakdown("Distribution par classe (années cibles)", summary['target_class_distribution'], target_total, "")
+
+    catechumenes = summary['total_catechumenes']
+    print(f"\n💧 STATISTIQUES DE BAPTÊME:")
+    for status, count in summary['baptism_stats'].items():
+        print(f"   {status}: {count} ({(count / catechumenes * 100) if catechumenes else 0:.1f}%)")
+    print(f"\n📄 STATISTIQUES DES DOCUMENTS:")
+    for label, count in summary['document_stats'].items():
+        print(f"   {label}: {count} ({(count / catechumenes * 100) if catechumenes else 0:.1f}%)")
+    _print_breakdown("\n🎂 RÉPARTITION PAR ÂGE", summary['age_stats'], catechumenes, "")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Catechumen statistics from a single data load")
+    parser.add_argument('--source', choices=('auto', 'rpc', 'local', 'snapshot'), default=DEFAULT_SOURCE,
+                        help="Group in Postgres (rpc), locally, in the SQLite snapshot, or rpc with local fallback")
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT, help="Snapshot file for --source snapshot")
+    parser.add_argument('--years', nargs='*', default=TARGET_YEARS, help="Academic years to report on")
+    parser.add_argument('--output', default='final_catechumen_statistics.json')
+    args = parser.parse_args(argv)
+
+    try:
+        analytics = CatechumenAnalytics.load(source=args.source, snapshot_path=args.snapshot)
+        summary = analytics.summary(args.years)
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        return 1
+
+    print_report(summary)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Rapport complet sauvegardé dans '{args.output}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,8 +11,12 @@ def main():
     with open('class_mapping.json', 'r', encoding='utf-8') as f:
         class_mapping = json.load(f)
 
-    with open('final_catechumen_statistics.json', 'r', encoding='utf-8') as f:
-        stats = json.load(f)
+    try:
+        with open('final_catechumen_statistics.json', 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+    except FileNotFoundError:
+        from catechumen_analytics import CatechumenAnalytics
+        stats = CatechumenAnalytics.load().summary()
 
     # Create readable class mapping
     readable_classes = {
@@ -1,23 +1,61 @@
-import json
+import asyncio
+import hashlib
 import logging
 import os
-from typing import List, Optional
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
 
 import requests
 try:
-    from anthropic import Anthropic  # type: ignore
+    import redis  # type: ignore
 except Exception:  # pragma: no cover
-    Anthropic = None  # type: ignore
+    redis = None  # type: ignore
+try:
+    from sentence_transformers import SentenceTransformer  # type: ignore
+except Exception:  # pragma: no cover
+    SentenceTransformer = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 
 
+class LRUCache:
+    """Small thread-safe in-process LRU keyed by content hash."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: List[float]) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 class EmbeddingsClient:
-    """Embeddings via GLM (Anthropic-compatible base) with fallback strategy.
+    """Embeddings via GLM (Anthropic-compatible base) or a local model, with caching.
 
     Strategy:
-      1) Try a standard /embeddings endpoint (model configurable)
-      2) Fallback: use Anthropic Messages with a strict JSON instruction to emit a float array
+      1) Content-hash cache: local LRU, then Redis (if REDIS_URL is set)
+      2) Backend (EMBEDDING_BACKEND):
+         - remote: standard /embeddings endpoint, batched (model configurable)
+         - local: on-CPU sentence-transformers model (EMBEDDING_LOCAL_MODEL)
+         - auto (default): remote when a base URL and key are configured, else local
+    A single backend is used per process so stored vectors share one embedding space.
     """
 
     def __init__(self):
@@ -26,69 +64,180 @@ class EmbeddingsClient:
         self.api_key = os.getenv("ANTHROPIC_AUTH_TOKEN") or os.getenv("ANTHROPIC_API_KEY")
         self.session = requests.Session()
         self.model = os.getenv("EMBEDDING_MODEL", "glm-4.5-embedding")
-        # Default dimension for vector schema; we store JSON anyway
+        # Must match interactions.embedding vector(384); other sizes are not stored as vectors
         self.dim = int(os.getenv("EMBEDDING_DIM", "384"))
+        self.batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+        self.local_model_name = os.getenv("EMBEDDING_LOCAL_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+        self.backend = os.getenv("EMBEDDING_BACKEND", "auto").lower()
+        if self.backend == "auto":
+            self.backend = "remote" if (self.base_url and self.api_key) else "local"
+        if self.backend == "local" and SentenceTransformer is None:
+            # sentence-transformers is not in requirements.txt (it pulls in torch)
+            logger.warning(
+                "Embeddings disabled: EMBEDDING_BACKEND=local (or auto without ANTHROPIC_BASE_URL/API key) "
+                "but sentence-transformers is not installed; every embedding will be None. "
+                "Install sentence-transformers or configure the remote endpoint."
+            )
+        # Cache keys are scoped to the model that actually produces the vectors
+        self.active_model = self.model if self.backend == "remote" else self.local_model_name
+        self._local_model = None
+        self._local_model_lock = threading.Lock()
 
-        # Anthropic client for fallback (supports custom base_url)
+        # Cache tiers
+        self.cache_ttl = int(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 3600)))
+        self.lru = LRUCache(int(os.getenv("EMBEDDING_LRU_SIZE", "2048")))
+        self.redis = None
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url and redis:
+            try:
+                self.redis = redis.Redis.from_url(redis_url, socket_connect_timeout=2, socket_timeout=2)
+            except Exception as e:
+                logger.warning(f"Embeddings Redis cache disabled: {e}")
+                self.redis = None
+
+    # Cache helpers
+    def _cache_key(self, text: str, model: str) -> str:
+        digest = hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+        return f"emb:{digest}"
+
+    def _redis_get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        if not self.redis or not keys:
+            return [None] * len(keys)
         try:
-            # Construct client if library and key are available
-            self.anthropic = Anthropic(api_key=self.api_key, base_url=self.base_url) if (self.api_key and Anthropic) else None
+            raw = self.redis.mget(keys)
         except Exception as e:
-            logger.warning(f"Anthropic client init failed: {e}")
-            self.anthropic = None
+            logger.warning(f"Embeddings Redis mget error: {e}")
+            return [None] * len(keys)
+        return [array("f", value).tolist() if value else None for value in raw]
 
-    def create(self, text: str) -> Optional[List[float]]:
-        text = (text or "").strip()
-        if not text:
-            return None
+    def _redis_set_many(self, items: Dict[str, List[float]]) -> None:
+        if not self.redis or not items:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key, vector in items.items():
+                pipe.setex(key, self.cache_ttl, array("f", vector).tobytes())
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Embeddings Redis write error: {e}")
+
+    # Backends
+    def _embed_remote(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Call the /embeddings endpoint in chunks of batch_size."""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        if not (self.base_url and self.api_key):
+            return results
 
-        # 1) Try embeddings endpoint if base_url provided
-        if self.base_url and self.api_key:
+        url = f"{self.base_url}/embeddings"
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        for start in range(0, len(texts), self.batch_size):
+            chunk = texts[start:start + self.batch_size]
             try:
-                url = f"{self.base_url}/embeddings"
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                }
-                payload = {"input": text, "model": self.model}
-                r = self.session.post(url, headers=headers, json=payload, timeout=30)
-                if 200 <= r.status_code < 300:
-                    data = r.json()
-                    # Support common shapes: {data:[{embedding:[...] }]} or {embedding:[...]}
-                    if isinstance(data, dict):
-                        if isinstance(data.get("data"), list) and data["data"]:
-                            emb = data["data"][0].get("embedding")
-                            if isinstance(emb, list):
-                                return [float(x) for x in emb]
-                        if isinstance(data.get("embedding"), list):
-                            return [float(x) for x in data["embedding"]]
-                else:
+                r = self.session.post(url, headers=headers, json={"input": chunk, "model": self.model}, timeout=30)
+                if not 200 <= r.status_code < 300:
                     logger.warning(f"Embeddings endpoint status: {r.status_code} {r.text}")
+                    continue
+                data = r.json()
+                # Support common shapes: {data:[{index, embedding:[...]}]} or {embedding:[...]} for single input
+                if isinstance(data, dict) and isinstance(data.get("data"), list):
+                    for position, item in enumerate(data["data"]):
+                        emb = item.get("embedding") if isinstance(item, dict) else None
+                        index = item.get("index", position) if isinstance(item, dict) else position
+                        if isinstance(emb, list) and 0 <= index < len(chunk):
+                            results[start + index] = [float(x) for x in emb]
+                elif isinstance(data, dict) and isinstance(data.get("embedding"), list) and len(chunk) == 1:
+                    results[start] = [float(x) for x in data["embedding"]]
             except Exception as e:
                 logger.warning(f"Embeddings endpoint error: {e}")
+        return results
 
-        # 2) Fallback: Anthropic Messages with JSON instruction
-        if self.anthropic:
-            try:
-                sys_prompt = (
-                    "You convert text into a numerical embedding vector. "
-                    "Return only a JSON array of floats (no text), length ~" + str(self.dim) + "."
-                )
-                msg = self.anthropic.messages.create(
-                    model=os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-latest"),
-                    max_tokens=2048,
-                    system=sys_prompt,
-                    messages=[{"role": "user", "content": text}],
-                )
-                content = msg.content[0].text if msg and msg.content else ""
-                # Parse JSON array
-                embedding = json.loads(content)
-                if isinstance(embedding, list):
-                    return [float(x) for x in embedding]
-            except Exception as e:
-                logger.error(f"Anthropic fallback embedding error: {e}")
+    def _get_local_model(self):
+        if self._local_model is None and SentenceTransformer is not None:
+            with self._local_model_lock:
+                if self._local_model is None:
+                    try:
+                        self._local_model = SentenceTransformer(self.local_model_name, device="cpu")
+                    except Exception as e:
+                        logger.error(f"Local embedding model load failed: {e}")
+        return self._local_model
+
+    def _embed_local(self, texts: List[str]) -> List[Optional[List[float]]]:
+        model = self._get_local_model()
+        if model is None:
+            return [None] * len(texts)
+        try:
+            vectors = model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True)
+            return [[float(x) for x in vector] for vector in vectors]
+        except Exception as e:
+            logger.error(f"Local embedding error: {e}")
+            return [None] * len(texts)
+
+    # Public API
+    def create_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Embed several texts; cached texts never hit a backend.
+
+        Returns one vector (or None) per input text, in order.
+        """
+        cleaned = [(t or "").strip() for t in texts]
+        results: List[Optional[List[float]]] = [None] * len(cleaned)
+
+        # Deduplicate non-empty texts and resolve cache tiers
+        positions: Dict[str, List[int]] = {}
+        for i, text in enumerate(cleaned):
+            if text:
+                positions.setdefault(text, []).append(i)
+
+        vectors: Dict[str, List[float]] = {}
+        redis_candidates: List[str] = []
+        for text in positions:
+            cached = self.lru.get(self._cache_key(text, self.active_model))
+            if cached is not None:
+                vectors[text] = cached
+            else:
+                redis_candidates.append(text)
+
+        keys = [self._cache_key(text, self.active_model) for text in redis_candidates]
+        missing: List[str] = []
+        for text, key, cached in zip(redis_candidates, keys, self._redis_get_many(keys)):
+            if cached is not None:
+                vectors[text] = cached
+                self.lru.set(key, cached)
+            else:
+                missing.append(text)
+
+        if missing:
+            if self.backend == "local":
+                computed = self._embed_local(missing)
+            else:
+                computed = self._embed_remote(missing)
+
+            to_store: Dict[str, List[float]] = {}
+            for text, vector in zip(missing, computed):
+                if vector is None:
+                    continue
+                key = self._cache_key(text, self.active_model)
+                vectors[text] = vector
+                self.lru.set(key, vector)
+                to_store[key] = vector
+            self._redis_set_many(to_store)
+
+        for text, indexes in positions.items():
+            for i in indexes:
+                results[i] = vectors.get(text)
+        return results
+
+    def create(self, text: str) -> Optional[List[float]]:
+        return self.create_many([text])[0]
+
+    async def acreate_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Async variant: runs the blocking HTTP/Redis/model work in a worker thread."""
+        return await asyncio.to_thread(self.create_many, list(texts))
 
-        return None
+    async def acreate(self, text: str) -> Optional[List[float]]:
+        return (await self.acreate_many([text]))[0]
 
 
 embeddings_client = EmbeddingsClient()
@@ -15,11 +15,17 @@ def load_class_mapping():
         return {}
 
 def load_statistics():
-    """Load statistics from file"""
+    """Load statistics from file, or compute them with catechumen_analytics"""
     try:
         with open('final_catechumen_statistics.json', 'r', encoding='utf-8') as f:
             return json.load(f)
     except:
+        pass
+    try:
+        from catechumen_analytics import CatechumenAnalytics
+        return CatechumenAnalytics.load().summary()
+    except Exception as e:
+        print(f"❌ Unable to compute statistics: {e}")
         return {}
 
 def generate_readable_report():
@@ -0,0 +1,200 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from supabase_client import supabase_client
+from embeddings import embeddings_client
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class InteractionLogger:
+    """Background pipeline for interaction/artifact persistence.
+
+    Callers enqueue records and return immediately; a daemon worker drains the
+    bounded queue in batches, embeds all interaction texts with one
+    create_many call and writes each table with one bulk insert.
+
+    Backpressure: when the queue is full, enqueue waits up to
+    LOG_QUEUE_PUT_TIMEOUT seconds, then drops the record and counts it.
+
+    Records are timestamped when queued, so rows written by one bulk insert keep
+    their own time and order instead of all getting the flush time.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, put_timeout: Optional[float] = None):
+        self.maxsize = maxsize or int(os.getenv("LOG_QUEUE_MAXSIZE", "1000"))
+        self.batch_size = batch_size or int(os.getenv("LOG_BATCH_SIZE", "50"))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+        self.put_timeout = put_timeout if put_timeout is not None else float(os.getenv("LOG_QUEUE_PUT_TIMEOUT", "0.01"))
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "dropped": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "embedded": 0,
+        }
+
+    # Producer side
+    def log_interaction(self, session_id: Optional[str], role: str, content: str,
+                        meta: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue an interaction; its embedding is computed by the worker."""
+        if not session_id:
+            return False
+        return self._enqueue(("interaction", {
+            "session_id": session_id,
+            "role": role,
+            "content": content,
+            "meta": meta or {},
+            "ts": datetime.now(timezone.utc).isoformat(),
+        }))
+
+    def save_artifact(self, session_id: Optional[str], service_code: str, type_: str,
+                      content: str, meta: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue an artifact insert."""
+        if not session_id:
+            return False
+        return self._enqueue(("artifact", {
+            "session_id": session_id,
+            "service_code": service_code,
+            "type": type_,
+            "content": content,
+            "meta": meta or {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }))
+
+    def _enqueue(self, item) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+        except queue.Full:
+            self._incr("dropped")
+            logger.warning(f"Interaction log queue full ({self.maxsize}), dropping {item[0]}")
+            return False
+        self._incr("enqueued")
+        return True
+
+    # Worker side
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="interaction-logger", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> Tuple[List[Any], bool]:
+        """Block for one item, then collect more until batch_size or flush_interval."""
+        batch: List[Any] = []
+        first = self._queue.get()
+        if first is _STOP:
+            return batch, True
+        batch.append(first)
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _worker(self) -> None:
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:  # keep the worker alive
+                    self._incr("failed", len(batch))
+                    logger.error(f"Interaction log batch error: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+
+    def _write_batch(self, batch: List[Any]) -> None:
+        interactions = [record for kind, record in batch if kind == "interaction"]
+        artifacts = [record for kind, record in batch if kind == "artifact"]
+
+        if interactions:
+            try:
+                vectors = embeddings_client.create_many([row["content"] for row in interactions])
+            except Exception as e:
+                logger.warning(f"Batch embedding failed, logging without vectors: {e}")
+                vectors = [None] * len(interactions)
+            for row, vector in zip(interactions, vectors):
+                row["embedding"] = vector
+            self._incr("embedded", sum(1 for v in vectors if v is not None))
+            self._insert(supabase_client.log_interactions, interactions, "interaction")
+
+        if artifacts:
+            self._insert(supabase_client.save_artifacts, artifacts, "artifact")
+        self._incr("batches")
+
+    def _insert(self, insert_many, rows: List[Dict[str, Any]], kind: str) -> None:
+        """Bulk insert; on failure retry row by row to isolate the bad records."""
+        if insert_many(rows):
+            self._incr("written", len(rows))
+            return
+        written = 0
+        if len(rows) > 1:
+            logger.warning(f"Bulk {kind} insert of {len(rows)} rows failed, retrying row by row")
+            written = sum(1 for row in rows if insert_many([row]))
+        self._incr("written", written)
+        self._incr("failed", len(rows) - written)
+
+    def _incr(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    # Lifecycle / observability
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been written (or failed)."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Drain the queue and stop the worker."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Interaction log queue still full at shutdown")
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_maxsize"] = self.maxsize
+        return stats
+
+
+interaction_logger = InteractionLogger()
+atexit.register(interaction_logger.close)
@@ -0,0 +1,26 @@
+-- Session expiry for the FastAPI app's sessions table (src/services/session_service.py).
+-- Run in the Supabase SQL editor of the concierge database after its sessions table
+-- (status, expires_at, user_id, updated_at) exists. Without it, SessionService falls
+-- back to one unbatched filtered UPDATE per cleanup run.
+
+-- Partial index: only active sessions are scanned for overdue expires_at
+create index if not exists idx_sessions_active_expires_at
+  on public.sessions (expires_at) where status = 'active';
+
+-- Expire up to p_limit overdue active sessions in one statement and return them (the caller
+-- evicts their Redis keys); SKIP LOCKED lets several app instances run it concurrently
+create or replace function public.expire_sessions(p_now timestamptz default now(), p_limit int default 1000)
+returns table (id text, user_id text)
+language sql volatile as $$
+  update public.sessions s
+  set status = 'expired', updated_at = p_now
+  from (
+    select sessions.id from public.sessions
+    where sessions.status = 'active' and sessions.expires_at < p_now
+    order by sessions.expires_at
+    limit p_limit
+    for update skip locked
+  ) as overdue
+  where s.id = overdue.id
+  returning s.id::text, s.user_id::text;
+$$;
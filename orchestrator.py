@@ -2,8 +2,7 @@ import logging
 import os
 from typing import Any, Dict, List, Optional
 
-from supabase_client import supabase_client
-from embeddings import embeddings_client
+from interaction_logger import interaction_logger
 
 logger = logging.getLogger(__name__)
 
@@ -31,16 +30,13 @@ class Orchestrator:
     def run(self, session: Dict[str, Any], user_text: str) -> str:
         """Produce an assistant response, log interaction + embeddings.
         This is a simple first pass without explicit tool-calls.
+        Logging is queued to interaction_logger so the reply only waits on the LLM.
         """
         session_id = session["id"]
         service_code = session.get("service_code")
 
-        # Log user turn + embedding
-        try:
-            emb = embeddings_client.create(user_text)
-            supabase_client.log_interaction(session_id, "user", user_text, meta={"service_code": service_code}, embedding=emb)
-        except Exception as e:
-            logger.warning(f"Log user interaction failed: {e}")
+        # Log user turn (embedded off-path)
+        interaction_logger.log_interaction(session_id, "user", user_text, meta={"service_code": service_code})
 
         # Minimal domain guidance per service
         domain_context = self._service_context(service_code)
@@ -48,12 +44,7 @@ class Orchestrator:
         # Service-specific first flow: Catéchèse SJB Dakar (infos)
         if (service_code or "").upper() == "CATECHESE_SJB_DAKAR":
             response = self._run_catechese_infos(session, user_text)
-            # Log assistant turn + embedding
-            try:
-                emb = embeddings_client.create(response)
-                supabase_client.log_interaction(session_id, "assistant", response, meta={"service_code": service_code}, embedding=emb)
-            except Exception as e:
-                logger.warning(f"Log assistant interaction failed: {e}")
+            interaction_logger.log_interaction(session_id, "assistant", response, meta={"service_code": service_code})
             return response
 
         if not self.client:
@@ -83,12 +74,8 @@ class Orchestrator:
             logger.error(f"Claude orchestration error: {e}")
             response = "Désolé, une erreur est survenue lors du traitement."
 
-        # Log assistant turn + embedding
-        try:
-            emb = embeddings_client.create(response)
-            supabase_client.log_interaction(session_id, "assistant", response, meta={"service_code": service_code}, embedding=emb)
-        except Exception as e:
-            logger.warning(f"Log assistant interaction failed: {e}")
+        # Log assistant turn (embedded off-path)
+        interaction_logger.log_interaction(session_id, "assistant", response, meta={"service_code": service_code})
 
         return response
 
@@ -150,17 +137,14 @@ class Orchestrator:
 
         msg = header + "\n" + "\n".join(body) + "\n\nSouhaitez-vous d'autres précisions (inscription, horaires, lieux, documents) ?"
 
-        # Persist as artifact (report)
-        try:
-            supabase_client.save_artifact(
-                session_id=session_id,
-                service_code=service_code,
-                type_="report",
-                content=msg,
-                meta={"subservice": sub},
-            )
-        except Exception as e:
-            logger.warning(f"save_artifact failed: {e}")
+        # Persist as artifact (report), off-path
+        interaction_logger.save_artifact(
+            session_id=session_id,
+            service_code=service_code,
+            type_="report",
+            content=msg,
+            meta={"subservice": sub},
+        )
 
         return msg
 
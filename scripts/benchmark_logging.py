@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request logging cost before and after src.utils.logging_config
+
+"before" replays what one webhook request used to log (full URL and headers
+twice from the middleware, the whole WAHA payload, the full processing
+result) through json + a synchronous stream handler. "after" replays the
+current lines through the filtering logger, orjson renderer and log sink. Time is
+measured on the calling thread, which is what blocks the event loop; the
+queue drain time is reported separately.
+
+    python scripts/benchmark_logging.py [--requests 5000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import structlog
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.utils.logging_config import configure_logging  # noqa: E402
+
+URL = "http://app:8000/api/v1/webhook?session=default"
+HEADERS = {
+    "host": "app:8000", "user-agent": "WAHA/2024.9", "content-type": "application/json",
+    "content-length": "2481", "accept": "application/json", "accept-encoding": "gzip, deflate",
+    "x-webhook-request-id": "01J7ZV7Q4K8Q3R2M7T5V9X1Y3Z", "x-webhook-timestamp": "1757792990879",
+    "x-real-ip": "172.18.0.4", "x-forwarded-for": "172.18.0.4", "x-forwarded-proto": "http",
+    "x-api-key": "benchmark-secret",
+}
+PAYLOAD = {
+    "event": "message", "session": "default", "me": {"id": "221773387902@c.us", "pushName": "Jameservices"},
+    "payload": {
+        "id": "false_221765005555@c.us_3A874063255DD1BCB135", "timestamp": 1757792990,
+        "from": "221765005555@c.us", "fromMe": False, "body": "Bonjour, quels sont les horaires ?",
+        "_data": {"key": {"remoteJid": "221765005555@s.whatsapp.net", "id": "3A874063255DD1BCB135"},
+                  "message": {"conversation": "Bonjour, quels sont les horaires ?",
+                              "messageContextInfo": {"deviceListMetadata": {"senderKeyHash": "y7hNXXnRCggj0A=="}}}},
+    },
+}
+RESULT = {"success": True, "interaction_id": "b7c1", "session_id": "s1", "user_id": "u1",
+          "response_sent": True, "requires_human_followup": False, "emergency_detected": False,
+          "service_used": "RENSEIGNEMENT", "processing_time_ms": 1840}
+
+
+def configure_before(stream) -> None:
+    """The previous setup: stdlib JSON renderer, handler writing on the caller thread"""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer(),
+        ],
+        wrapper_class=structlog.stdlib.BoundLogger,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        cache_logger_on_first_use=True,
+    )
+
+
+def request_before(logger) -> None:
+    logger.info("incoming_request", method="POST", url=URL, headers=HEADERS)
+    logger.info("webhook_payload_received", payload=PAYLOAD)
+    logger.info("interaction_processed", result=RESULT)
+    logger.info("outgoing_response", status_code=200, headers={"content-type": "application/json"})
+
+
+def request_after(logger) -> None:
+    logger.debug("webhook_payload_received", payload=PAYLOAD)
+    logger.info("interaction_processed", success=True, interaction_id="b7c1",
+                service_used="RENSEIGNEMENT", processing_time_ms=1840)
+    logger.info("http_request", method="POST", path="/api/v1/webhook", status_code=200, duration_ms=1843.2)
+
+
+def measure(name: str, request, requests: int, drain=None) -> float:
+    logger = structlog.get_logger("benchmark")
+    started = time.perf_counter()
+    for _ in range(requests):
+        request(logger)
+    caller = time.perf_counter() - started
+    drained = 0.0
+    if drain is not None:
+        drain_started = time.perf_counter()
+        drain()
+        drained = time.perf_counter() - drain_started
+    print(f"   {name:<7} {caller / requests * 1e6:8.1f} µs/request on the caller"
+          + (f"  (+{drained * 1000:.0f} ms queue drain in the sink thread)" if drain else ""))
+    return caller
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🪵 {args.requests:,} webhook requests")
+        with open(os.path.join(tmp, 'before.log'), 'w') as stream:
+            configure_before(stream)
+            before = measure("before", request_before, args.requests)
+            before_size = stream.tell()
+        with open(os.path.join(tmp, 'after.log'), 'w') as stream:
+            sink = configure_logging(level="INFO", stream=stream)
+            after = measure("after", request_after, args.requests, drain=sink.stop)
+            after_size = stream.tell()
+
+    print(f"   speedup {before / after:.1f}x, log volume {before_size / 1024:.0f} KiB -> {after_size / 1024:.0f} KiB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: uncached phonenumbers parsing vs src.utils.phone
+
+Replays a webhook-like stream (a few hundred senders, each writing many
+times, numbers arriving as WAHA ids, bare digits or E.164) through the old
+per-call parse/validate/format path and through the memoized helpers.
+
+    python scripts/benchmark_phone.py [--calls 50000] [--senders 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import phonenumbers
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.utils import phone  # noqa: E402
+
+
+def uncached_validate(value: str) -> str:
+    """What the User validator did on every call before the cache"""
+    number = value.split('@')[0] if value.endswith(phone.USER_JID_SUFFIXES) else value
+    if number.isdigit() and len(number) >= 8:
+        number = f"+{number}"
+    parsed = phonenumbers.parse(number, None)
+    if not phonenumbers.is_valid_number(parsed):
+        raise ValueError("Invalid phone number")
+    return phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164)
+
+
+def cached_validate(value: str) -> str:
+    return phone.validate_phone_number(phone.from_whatsapp_id(value))
+
+
+def workload(calls: int, senders: int, seed: int = 42):
+    rng = random.Random(seed)
+    numbers = [f"22177{rng.randrange(10**7):07d}" for _ in range(senders)]
+    forms = (lambda n: f"{n}@c.us", lambda n: n, lambda n: f"+{n}")
+    # Zipf-ish: a few parents write much more than the others
+    weights = [1 / (rank + 1) for rank in range(senders)]
+    return [rng.choice(forms)(n) for n in rng.choices(numbers, weights, k=calls)]
+
+
+def run(name: str, fn, values) -> float:
+    started = time.perf_counter()
+    for value in values:
+        fn(value)
+    elapsed = time.perf_counter() - started
+    print(f"   {name:<10} {elapsed * 1000:8.1f} ms  {len(values) / elapsed:12,.0f} calls/s  "
+          f"{elapsed / len(values) * 1e6:6.2f} µs/call")
+    return elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=50000)
+    parser.add_argument('--senders', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    values = workload(args.calls, args.senders)
+    assert all(uncached_validate(v) == cached_validate(v) for v in values[:1000])
+    phone._parse.cache_clear()
+
+    print(f"📱 {args.calls:,} validations, {args.senders:,} distinct senders")
+    before = run("uncached", uncached_validate, values)
+    after = run("cached", cached_validate, values)
+    info = phone.phone_cache_info()
+    print(f"   speedup    {before / after:.1f}x  (cache hits {info.hits:,}, misses {info.misses:,}, "
+          f"size {info.currsize}/{info.maxsize})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
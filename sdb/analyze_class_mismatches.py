@@ -6,6 +6,7 @@ Analyze Class Mismatches for Migration Fix
 import os
 import sys
 import requests
+from difflib import SequenceMatcher
 from supabase_config import get_supabase_anon_client
 from dotenv import load_dotenv
 
@@ -168,13 +169,10 @@ def calculate_similarity(str1, str2):
     if len(longer) == 0:
         return 100
     
-    # Find longest common substring
-    max_length = 0
-    for i in range(len(shorter)):
-        for j in range(i + 1, len(shorter) + 1):
-            substring = shorter[i:j]
-            if substring in longer:
-                max_length = max(max_length, len(substring))
+    # Longest common substring in O(n*m) instead of testing every substring
+    match = SequenceMatcher(None, shorter, longer, autojunk=False).find_longest_match(
+        0, len(shorter), 0, len(longer))
+    max_length = match.size
     
     return (max_length / len(longer)) * 100
 
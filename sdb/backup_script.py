@@ -5,93 +5,58 @@ Backup Supabase Tables to CSV and Create ZIP Archive
 
 import os
 import sys
-import csv
-import zipfile
 from datetime import datetime
 from supabase_config import get_supabase_anon_client
+from streaming_export import (
+    SUPABASE_TABLES, export_to_zip, iter_supabase_pages, print_summary, supabase_jobs, write_csv,
+)
 
 def export_table_to_csv(supabase, table_name, filename):
-    """Export a table to CSV file"""
+    """Export a table to CSV file (keyset-paginated, streamed page by page)"""
     try:
         print(f"📤 Exporting {table_name}...")
         
-        # Get all data from the table
-        result = supabase.table(table_name).select('*').execute()
+        with open(filename, 'wb') as csvfile:
+            count = write_csv(csvfile, iter_supabase_pages(supabase, table_name))
         
-        if not result.data:
+        if not count:
             print(f"⚠️  No data found in {table_name}")
             return False
         
-        # Write to CSV
-        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            if result.data:
-                # Get column names from first row
-                fieldnames = result.data[0].keys()
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                writer.writeheader()
-                writer.writerows(result.data)
-        
-        print(f"✅ Exported {len(result.data)} records from {table_name}")
+        print(f"✅ Exported {count} records from {table_name}")
         return True
         
     except Exception as e:
         print(f"❌ Error exporting {table_name}: {e}")
         return False
 
-def create_backup():
-    """Create backup of all tables"""
+def create_backup(fmt='csv'):
+    """Create backup of all tables, streamed straight into the ZIP archive"""
     print("💾 Creating backup of Supabase data...")
     print("=" * 50)
     
     try:
         supabase = get_supabase_anon_client()
         
-        # Create backup directory
-        backup_dir = "backup"
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        # Tables to backup
-        tables = [
-            'inscriptions',
-            'catechumenes', 
-            'classes',
-            'annees_scolaires',
-            'paroisses'
-        ]
-        
-        csv_files = []
-        
-        # Export each table
-        for table in tables:
-            filename = f"{backup_dir}/{table}.csv"
-            if export_table_to_csv(supabase, table, filename):
-                csv_files.append(filename)
-        
         # Create ZIP archive
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         zip_filename = f"supabase_backup_{timestamp}.zip"
         
         print(f"\n📦 Creating ZIP archive: {zip_filename}")
         
-        with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for csv_file in csv_files:
-                zipf.write(csv_file, os.path.basename(csv_file))
+        stats = export_to_zip(supabase_jobs(supabase, SUPABASE_TABLES), zip_filename, fmt)
+        backed_up = [table for table, s in stats.items() if s.get('rows')]
         
         print(f"✅ Backup completed successfully!")
-        print(f"📁 ZIP file: {zip_filename}")
-        print(f"📊 Tables backed up: {len(csv_files)}")
-        
-        # Show file sizes
-        zip_size = os.path.getsize(zip_filename)
-        print(f"💾 Archive size: {zip_size:,} bytes ({zip_size/1024/1024:.1f} MB)")
+        print(f"📊 Tables backed up: {len(backed_up)}")
+        print_summary(zip_filename, stats)
         
-        return True
+        return not any('error' in s for s in stats.values())
         
     except Exception as e:
         print(f"❌ Error creating backup: {e}")
         return False
 
 if __name__ == "__main__":
-    success = create_backup()
+    success = create_backup(sys.argv[1] if len(sys.argv) > 1 else 'csv')
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -3,72 +3,52 @@
 Create combined backup ZIP with both Baserow and Supabase data
 """
 
-import os
 import sys
-import zipfile
 from datetime import datetime
+from supabase_config import get_supabase_anon_client
+from migration_engine import BaserowClient
+from streaming_export import (
+    BASEROW_TABLES, baserow_jobs, export_to_zip, print_summary, supabase_jobs,
+)
 
-def create_combined_backup():
-    """Create combined backup ZIP with all data"""
+# Supabase tables included in the combined archive
+SUPABASE_TABLES = ['inscriptions', 'catechumenes', 'classes', 'annees_scolaires']
+
+def create_combined_backup(fmt='csv'):
+    """Create combined backup ZIP with all data, streamed from both sources"""
     print("📦 Creating combined backup (Baserow + Supabase)...")
     print("=" * 60)
     
     try:
-        backup_dir = "backup"
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         zip_filename = f"combined_backup_{timestamp}.zip"
         
-        # List all CSV files to include
-        files_to_zip = [
-            "inscriptions.csv",
-            "catechumenes.csv", 
-            "classes.csv",
-            "annees_scolaires.csv",
-            "baserow_inscriptions.csv",
-            "baserow_catechumenes.csv",
-            "baserow_classes.csv", 
-            "baserow_annees_scolaires.csv",
-            "baserow_paroisses.csv"
-        ]
-        
         print(f"📁 Creating archive: {zip_filename}")
         
-        with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for filename in files_to_zip:
-                filepath = os.path.join(backup_dir, filename)
-                if os.path.exists(filepath):
-                    zipf.write(filepath, filename)
-                    file_size = os.path.getsize(filepath)
-                    print(f"  ✅ Added {filename} ({file_size:,} bytes)")
-                else:
-                    print(f"  ⚠️  Missing {filename}")
-        
-        # Calculate archive stats
-        zip_size = os.path.getsize(zip_filename)
-        total_csv_size = sum(
-            os.path.getsize(os.path.join(backup_dir, f)) 
-            for f in files_to_zip 
-            if os.path.exists(os.path.join(backup_dir, f))
-        )
+        jobs = supabase_jobs(get_supabase_anon_client(), SUPABASE_TABLES)
+        jobs += baserow_jobs(BaserowClient(), BASEROW_TABLES)
+        stats = export_to_zip(jobs, zip_filename, fmt)
         
         print(f"\n🎉 Combined backup completed!")
-        print(f"📁 Archive: {zip_filename}")
-        print(f"💾 Archive size: {zip_size:,} bytes ({zip_size/1024/1024:.1f} MB)")
-        print(f"📊 Original data size: {total_csv_size:,} bytes ({total_csv_size/1024/1024:.1f} MB)")
-        print(f"🗜️  Compression ratio: {(1-zip_size/total_csv_size)*100:.1f}%")
+        print_summary(zip_filename, stats)
         
         # Summary of data
+        def rows(name):
+            return stats.get(name, {}).get('rows', 0)
+        
         print(f"\n📊 Backup Summary:")
-        print(f"  • Supabase: 798 inscriptions, 528 students, 14 classes")
-        print(f"  • Baserow: 802 inscriptions, 506 students, 35 classes")
-        print(f"  • Migration success: 99.5% (798/802)")
+        print(f"  • Supabase: {rows('inscriptions')} inscriptions, {rows('catechumenes')} students, {rows('classes')} classes")
+        print(f"  • Baserow: {rows('baserow_inscriptions')} inscriptions, {rows('baserow_catechumenes')} students, {rows('baserow_classes')} classes")
+        if rows('baserow_inscriptions'):
+            print(f"  • Migration success: {rows('inscriptions')/rows('baserow_inscriptions')*100:.1f}% "
+                  f"({rows('inscriptions')}/{rows('baserow_inscriptions')})")
         
-        return True
+        return not any('error' in s for s in stats.values())
         
     except Exception as e:
         print(f"❌ Error creating combined backup: {e}")
         return False
 
 if __name__ == "__main__":
-    success = create_combined_backup()
+    success = create_combined_backup(sys.argv[1] if len(sys.argv) > 1 else 'csv')
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -3,13 +3,11 @@
 Create Missing Student Records from Orphaned Inscriptions
 """
 
-import os
 import sys
-import requests
 import uuid
 from supabase_config import get_supabase_client, get_supabase_anon_client
+from migration_engine import BaserowClient, MigrationEngine, TABLE_SPECS
 from dotenv import load_dotenv
-from datetime import datetime
 
 # Load environment variables
 load_dotenv()
@@ -28,32 +26,8 @@ def get_orphaned_inscriptions():
         students_result = supabase_anon.table('catechumenes').select('id_catechumene').execute()
         existing_student_ids = {student['id_catechumene'] for student in students_result.data}
         
-        # Fetch all inscriptions from Baserow
-        BASEROW_URL = os.getenv("BASEROW_URL")
-        BASEROW_AUTH_KEY = os.getenv("BASEROW_AUTH_KEY")
-        
-        headers = {
-            "Authorization": f"Token {BASEROW_AUTH_KEY}"
-        }
-        
-        all_inscriptions = []
-        page = 1
-        
-        while True:
-            url = f"{BASEROW_URL}/api/database/rows/table/574/?user_field_names=true&page={page}"
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code != 200:
-                print(f"❌ Error fetching inscriptions: {response.status_code}")
-                break
-            
-            data = response.json()
-            all_inscriptions.extend(data['results'])
-            
-            if not data['next']:
-                break
-                
-            page += 1
+        # Fetch all inscriptions from Baserow (pages fetched concurrently)
+        all_inscriptions = BaserowClient().fetch_all(TABLE_SPECS['inscriptions'].baserow_table_id)
         
         # Filter for orphaned inscriptions
         orphaned = []
@@ -139,153 +113,51 @@ def create_missing_students_and_migrate():
             return True
         
         supabase = get_supabase_client()
+        # One-off batches: no resumable checkpoint to read or leave behind
+        engine = MigrationEngine(supabase, checkpoint_path=None)
+        spec = TABLE_SPECS['inscriptions']
         
-        # Get mappings
-        classes_result = supabase.table('classes').select('*').execute()
-        class_mapping = {c['classe_nom']: c['id'] for c in classes_result.data}
-        
-        years_result = supabase.table('annees_scolaires').select('*').execute()
-        year_mapping = {y['annee_nom']: y['id'] for y in years_result.data}
+        print(f"📊 Available classes: {len(engine.lookup('classes'))}")
+        print(f"📊 Available years: {len(engine.lookup('annees_scolaires'))}")
         
-        print(f"📊 Available classes: {len(class_mapping)}")
-        print(f"📊 Available years: {len(year_mapping)}")
-        
-        students_created = 0
-        inscriptions_migrated = 0
         errors = 0
+        students = []
+        inscriptions = []
         
         print(f"🔄 Processing {len(orphaned_inscriptions)} orphaned inscriptions...")
         
-        for i, inscr in enumerate(orphaned_inscriptions):
-            try:
-                if i % 20 == 0:
-                    print(f"📈 Progress: {i}/{len(orphaned_inscriptions)}")
-                
-                # Skip if no name data
-                if not inscr.get('Prenoms') and not inscr.get('Nom'):
-                    print(f"⚠️  Skipping {inscr.get('ID Inscription')} - no name data")
-                    errors += 1
-                    continue
-                
-                # Create student record
-                student_data = create_student_from_inscription(inscr)
-                if not student_data:
-                    errors += 1
-                    continue
-                
-                # Insert student
-                student_result = supabase.table('catechumenes').insert(student_data).execute()
-                
-                if not student_result.data:
-                    print(f"❌ Failed to create student for {inscr.get('ID Inscription')}")
-                    errors += 1
-                    continue
-                
-                students_created += 1
-                student_id = student_data['id_catechumene']
-                
-                print(f"✅ Created student: {student_data['prenoms']} {student_data['nom']}")
-                
-                # Now migrate the inscription
-                # Apply class mappings
-                class_name = inscr.get('ClasseCourante', '').strip()
-                class_mappings = {
-                    '2ème Année Confirmation (6e)': '2ème Année Confirmation (5ème)',
-                    '3ème Année Confirmation (5e)': '3ème Année Confirmation (6ème)',
-                    '8': '3ème Année Confirmation (6ème)'
-                }
-                
-                if class_name in class_mappings:
-                    class_name = class_mappings[class_name]
-                
-                # Get class ID
-                class_id = class_mapping.get(class_name) if class_name in class_mapping else None
-                
-                # Get year ID
-                year_id = None
-                if inscr.get('ID_AnneeInscription') and inscr['ID_AnneeInscription']:
-                    year_name = inscr['ID_AnneeInscription'][0]['value']
-                    year_id = year_mapping.get(year_name)
-                
-                # Clean enum values
-                def clean_enum(value, field_type):
-                    if not value:
-                        return None
-                    
-                    value = str(value).strip()
-                    
-                    if field_type == 'etat':
-                        if value.lower() in ['inscription validée', 'inscription validee']:
-                            return 'Inscription Validée'
-                        elif value in ['Inscription Validée', 'En attente', 'Annulée']:
-                            return value
-                        return 'En attente'
-                    
-                    elif field_type == 'moyen_paiement':
-                        if value.upper() in ['ORANGE MONEY', 'OM']:
-                            return 'OM'
-                        elif value.lower() in ['au secrétariat', 'cash']:
-                            return 'CASH'
-                        elif value in ['CASH', 'WAVE', 'OM', 'CB']:
-                            return value
-                        return None
-                    
-                    elif field_type == 'yes_no':
-                        if value.lower() in ['oui', 'non']:
-                            return value.lower()
-                        return None
-                    
-                    elif field_type == 'action':
-                        if value.lower() == 'transfert':
-                            return 'Transfert à partir d\'une autre paroisse'
-                        elif value in ['Nouvelle Inscription', 'Réinscription', 'Transfert à partir d\'une autre paroisse']:
-                            return value
-                        return None
-                    
-                    return value
-                
-                # Prepare inscription data
-                inscription_data = {
-                    'id_inscription': inscr['ID Inscription'],
-                    'id_catechumene': student_id,
-                    'prenoms': inscr.get('Prenoms'),
-                    'nom': inscr.get('Nom'),
-                    'id_classe_courante': class_id,
-                    'id_annee_inscription': year_id,
-                    'annee_precedente': inscr.get('AnneePrecedente'),
-                    'paroisse_annee_precedente': inscr.get('ParoisseAnneePrecedente'),
-                    'montant': int(float(inscr.get('Montant', 0))) if inscr.get('Montant') else 0,
-                    'paye': int(float(inscr.get('Paye', 0))) if inscr.get('Paye') else 0,
-                    'date_inscription': inscr.get('DateInscription'),
-                    'commentaire': inscr.get('Commentaire'),
-                    'sms': clean_enum(inscr.get('sms'), 'yes_no'),
-                    'action': clean_enum(inscr.get('action'), 'action'),
-                    'attestation_de_transfert': clean_enum(inscr.get('AttestationDeTransfert'), 'yes_no'),
-                    'operateur': inscr.get('operateur'),
-                    'resultat_final': inscr.get('Resultat Final'),
-                    'note_finale': float(inscr.get('Note Finale', 0)) if inscr.get('Note Finale') else 0,
-                    'moyen_paiement': clean_enum(inscr.get('Moyen Paiement'), 'moyen_paiement'),
-                    'infos_paiement': inscr.get('Infos Paiement'),
-                    'etat': clean_enum(inscr.get('Etat'), 'etat'),
-                    'absences': int(inscr.get('Absennces', 0)) if inscr.get('Absennces') and str(inscr.get('Absennces')).isdigit() else 0,
-                    'groupe': inscr.get('Groupe'),
-                    'livre_remis': clean_enum(inscr.get('Livre Remis'), 'yes_no')
-                }
-                
-                # Insert inscription
-                inscription_result = supabase.table('inscriptions').insert(inscription_data).execute()
-                
-                if inscription_result.data:
-                    inscriptions_migrated += 1
-                    print(f"✅ Migrated inscription for {student_data['prenoms']} {student_data['nom']}")
-                else:
-                    print(f"❌ Failed to migrate inscription {inscr.get('ID Inscription')}")
-                    errors += 1
-                
-            except Exception as e:
+        for inscr in orphaned_inscriptions:
+            # Skip if no name data
+            if not inscr.get('Prenoms') and not inscr.get('Nom'):
+                print(f"⚠️  Skipping {inscr.get('ID Inscription')} - no name data")
+                errors += 1
+                continue
+            
+            # Create student record
+            student_data = create_student_from_inscription(inscr)
+            if not student_data:
                 errors += 1
-                print(f"❌ Error processing {inscr.get('ID Inscription')}: {e}")
                 continue
+            
+            # Map the inscription with the shared field spec, linked to the new student
+            inscription_data = spec.map_row({**inscr, 'ID Catechumene': student_data['id_catechumene']}, engine)
+            if not inscription_data:
+                print(f"⚠️  Skipping {inscr.get('ID Inscription')} - incomplete inscription")
+                errors += 1
+                continue
+            
+            students.append(student_data)
+            inscriptions.append(inscription_data)
+        
+        # Students first (foreign key), then their inscriptions, in batched upserts
+        student_stats = engine.upsert_rows('catechumenes', 'id_catechumene', students)
+        inscription_stats = engine.upsert_rows('inscriptions', 'id_inscription', inscriptions)
+        
+        students_created = student_stats['written']
+        inscriptions_migrated = inscription_stats['written']
+        errors += len(student_stats['errors']) + len(inscription_stats['errors'])
+        for error in (student_stats['errors'] + inscription_stats['errors'])[:10]:
+            print(f"❌ {error}")
         
         print(f"\n📊 Results:")
         print(f"✅ Students created: {students_created}")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Incremental (delta) sync from Baserow to Supabase for SDB
+
+Instead of reloading whole tables and diffing ID sets, each run pulls only the
+rows changed since the last run and upserts them through the migration engine.
+
+High-water mark per table (stored in the Supabase `sync_state` table):
+- with a Baserow "last modified" field (--updated-field): rows are read newest
+  first and reading stops at the first row older than the stored timestamp
+- without it: rows are read by descending row id and reading stops at the last
+  synced id (new rows only); once the field appears, the timestamp mark is
+  seeded from the newest row and later runs read changes by timestamp
+
+Upserts are idempotent, so re-reading rows at the boundary is harmless.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from migration_engine import BaserowClient, MigrationEngine, TableSpec, TABLE_SPECS, MIGRATION_ORDER
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_UPDATED_FIELD = os.getenv("BASEROW_UPDATED_FIELD")
+DEFAULT_INTERVAL = int(os.getenv("SYNC_INTERVAL_SECONDS", "300"))
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class SyncState:
+    """Read/write the per-table high-water marks in Supabase `sync_state`"""
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def get(self, table: str) -> Dict[str, Any]:
+        result = self.supabase.table('sync_state').select('*').eq('table_name', table).limit(1).execute()
+        return result.data[0] if result.data else {}
+
+    def save(self, table: str, **fields) -> None:
+        record = {'table_name': table, 'last_run_at': datetime.now(timezone.utc).isoformat(), **fields}
+        self.supabase.table('sync_state').upsert(record, on_conflict='table_name').execute()
+
+    def reset(self, table: str) -> None:
+        self.supabase.table('sync_state').delete().eq('table_name', table).execute()
+
+
+class DeltaSync:
+    """Pulls changed Baserow rows since the stored high-water mark and upserts them"""
+
+    def __init__(self, engine: MigrationEngine, updated_field: Optional[str] = DEFAULT_UPDATED_FIELD):
+        self.engine = engine
+        self.baserow: BaserowClient = engine.baserow
+        self.state = SyncState(engine.supabase)
+        self.updated_field = updated_field
+
+    def _fetch_full(self, spec: TableSpec) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """First run: bulk load; tells whether the table has the last-modified field"""
+        rows = self.baserow.fetch_all(spec.baserow_table_id)
+        field = self.updated_field if rows and self.updated_field in rows[0] else None
+        if self.updated_field and rows and field is None:
+            print(f"⚠️  {spec.name}: no '{self.updated_field}' field, tracking new rows by id only")
+        return rows, field
+
+    def _newest_timestamp(self, spec: TableSpec) -> Optional[datetime]:
+        """Latest last-modified value of a table, None when it has no such field"""
+        data = self.baserow.fetch_page(spec.baserow_table_id, 1, size=1,
+                                       params={'order_by': f"-{self.updated_field}"})
+        rows = data.get('results', [])
+        if not rows or self.updated_field not in rows[0]:
+            return None
+        return parse_timestamp(rows[0].get(self.updated_field))
+
+    def _fetch_changes(self, spec: TableSpec, state: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Read newest-first pages until the high-water mark is reached"""
+        high_water_mark = parse_timestamp(state.get('high_water_mark'))
+        field = self.updated_field if high_water_mark and self.updated_field else None
+        last_row_id = int(state.get('last_row_id') or 0)
+        params = {'order_by': f"-{field}" if field else '-id'}
+
+        changed: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            data = self.baserow.fetch_page(spec.baserow_table_id, page, params=params)
+            reached = False
+            for row in data.get('results', []):
+                if field:
+                    modified = parse_timestamp(row.get(field))
+                    if modified is not None and modified < high_water_mark:
+                        reached = True
+                        break
+                elif row.get('id', 0) <= last_row_id:
+                    reached = True
+                    break
+                changed.append(row)
+            if reached or not data.get('next'):
+                break
+            page += 1
+        return changed, field
+
+    def sync_table(self, spec: TableSpec) -> Dict[str, Any]:
+        """Sync one table and advance its high-water mark on success"""
+        started = time.monotonic()
+        state = self.state.get(spec.name)
+        first_run = not state or (not state.get('high_water_mark') and not state.get('last_row_id'))
+
+        # Tables first synced without the last-modified field are tracked by id
+        # until the field shows up: seed the timestamp mark then (before reading
+        # the new rows, so changes made in between are read again next run)
+        seeded_mark = None
+        if not first_run and self.updated_field and not parse_timestamp(state.get('high_water_mark')):
+            seeded_mark = self._newest_timestamp(spec)
+            if seeded_mark:
+                print(f"ℹ️  {spec.name}: '{self.updated_field}' now available, "
+                      f"tracking changes since {seeded_mark.isoformat()}")
+
+        if first_run:
+            rows, field = self._fetch_full(spec)
+        else:
+            rows, field = self._fetch_changes(spec, state)
+
+        records, skipped = self.engine.map_rows(spec, rows)
+        stats = self.engine.upsert_rows(spec.name, spec.conflict_key, records)
+
+        # Advance the marks only when every changed row landed
+        update: Dict[str, Any] = {'baserow_table_id': spec.baserow_table_id}
+        if stats['errors']:
+            update.update({'last_status': 'error', 'last_error': '; '.join(stats['errors'][:5])[:1000]})
+        else:
+            high_water_mark = parse_timestamp(state.get('high_water_mark')) or seeded_mark
+            if field:
+                stamps = [parse_timestamp(row.get(field)) for row in rows]
+                stamps = [s for s in stamps if s is not None]
+                if stamps:
+                    high_water_mark = max(stamps + ([high_water_mark] if high_water_mark else []))
+            last_row_id = max([row.get('id', 0) for row in rows] + [int(state.get('last_row_id') or 0)])
+            update.update({
+                'high_water_mark': high_water_mark.isoformat() if high_water_mark else None,
+                'last_row_id': last_row_id,
+                'rows_synced': int(state.get('rows_synced') or 0) + stats['written'],
+                'last_status': 'ok',
+                'last_error': None,
+            })
+        self.state.save(spec.name, **update)
+
+        stats.update({
+            'changed_rows': len(rows),
+            'skipped': skipped,
+            'full_load': first_run,
+            'seconds': round(time.monotonic() - started, 2),
+        })
+        mode = "full load" if first_run else "delta"
+        print(f"{'✅' if not stats['errors'] else '⚠️ '} {spec.name} ({mode}): {len(rows)} changed, "
+              f"{stats['written']} upserted, {len(stats['errors'])} errors in {stats['seconds']}s")
+        return stats
+
+    def run(self, tables: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Sync tables in dependency order"""
+        results = {}
+        for name in MIGRATION_ORDER:
+            if tables and name not in tables:
+                continue
+            try:
+                results[name] = self.sync_table(TABLE_SPECS[name])
+            except Exception as e:
+                print(f"❌ Sync of {name} failed: {e}")
+                try:
+                    self.state.save(name, last_status='error', last_error=str(e)[:1000])
+                except Exception:
+                    pass
+                results[name] = {'written': 0, 'errors': [str(e)]}
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Incremental Baserow -> Supabase sync")
+    parser.add_argument('--tables', nargs='*', choices=MIGRATION_ORDER, help="Tables to sync (default: all)")
+    parser.add_argument('--updated-field', default=DEFAULT_UPDATED_FIELD,
+                        help="Baserow 'last modified' field name (default: $BASEROW_UPDATED_FIELD, else row id)")
+    parser.add_argument('--full', action='store_true', help="Forget the high-water marks and reload")
+    parser.add_argument('--loop', action='store_true', help="Keep syncing every --interval seconds")
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL, help="Seconds between runs with --loop")
+    args = parser.parse_args(argv)
+
+    from supabase_config import get_supabase_client
+
+    engine = MigrationEngine(get_supabase_client(), checkpoint_path=None)
+    sync = DeltaSync(engine, updated_field=args.updated_field)
+
+    if args.full:
+        for name in args.tables or MIGRATION_ORDER:
+            sync.state.reset(name)
+
+    while True:
+        print(f"🔄 Delta sync started at {datetime.now().isoformat(timespec='seconds')}")
+        results = sync.run(args.tables)
+        failed = any(stats['errors'] for stats in results.values())
+        if not args.loop:
+            return 1 if failed else 0
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Incremental backups of SDB data (Supabase + Baserow) in a content-addressed store
+
+Store layout (default: backup_store/):
+    chunks/<2 hex>/<sha256>.ndjson.gz   immutable row chunks, written once
+    manifests/<snapshot_id>.json        one manifest per snapshot: per table, the
+                                        ordered list of chunk hashes + row counts
+
+Rows are streamed in primary-key order and cut into chunks at key-defined
+boundaries (hash of the row id), so an inserted/updated/deleted row only
+changes the chunk it falls into. A snapshot writes only chunks that are not
+already in the store; unchanged data costs nothing but its manifest entry.
+
+Every manifest is self-contained (base + deltas are resolved through the shared
+chunk store), so any snapshot can be restored on its own, including "as of" a
+point in time. Because chunks never change once written, `rclone copy` of the
+store to the GDrive remote only uploads the new files.
+
+Usage:
+    python incremental_backup.py backup [--baserow] [--rclone-remote gdrive:sdb-backup]
+    python incremental_backup.py list
+    python incremental_backup.py restore [--snapshot ID | --as-of 2025-09-13T16:00] [--output restore.zip]
+    python incremental_backup.py gc --keep 30
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import zipfile
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from streaming_export import (
+    BASEROW_TABLES, SUPABASE_TABLES, iter_baserow_pages, iter_supabase_pages,
+)
+
+DEFAULT_STORE = os.getenv("SDB_BACKUP_STORE", "backup_store")
+# Average ~256 rows per chunk, hard cap to bound memory for pathological keys
+CHUNK_BOUNDARY_MASK = 0xFF
+MAX_CHUNK_ROWS = 2048
+
+
+def _canonical(row: Dict[str, Any]) -> str:
+    return json.dumps(row, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _is_boundary(key: Any) -> bool:
+    digest = hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest()
+    return (int.from_bytes(digest, 'little') & CHUNK_BOUNDARY_MASK) == 0
+
+
+class ChunkStore:
+    """Content-addressed, write-once storage of gzip'd NDJSON row chunks"""
+
+    def __init__(self, root: str = DEFAULT_STORE):
+        self.root = root
+        self.chunks_dir = os.path.join(root, 'chunks')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    def chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunks_dir, digest[:2], f"{digest}.ndjson.gz")
+
+    def put(self, payload: bytes) -> Tuple[str, bool]:
+        """Store a chunk; returns (sha256, written) — written is False when already present"""
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        # mtime=0 keeps the compressed bytes reproducible
+        with open(tmp_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as gz:
+            gz.write(payload)
+        os.replace(tmp_path, path)
+        return digest, True
+
+    def get_rows(self, digest: str) -> Iterator[Dict[str, Any]]:
+        with gzip.open(self.chunk_path(digest), 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    # Manifests
+    def save_manifest(self, manifest: Dict[str, Any]) -> str:
+        path = os.path.join(self.manifests_dir, f"{manifest['snapshot_id']}.json")
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(f"{path}.tmp", path)
+        return path
+
+    def list_manifests(self) -> List[Dict[str, Any]]:
+        manifests = []
+        for name in sorted(os.listdir(self.manifests_dir)):
+            if name.endswith('.json'):
+                with open(os.path.join(self.manifests_dir, name), encoding='utf-8') as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda m: m['created_at'])
+
+    def find_manifest(self, snapshot_id: Optional[str] = None, as_of: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Snapshot by id, else the latest one taken at or before `as_of`, else the latest"""
+        manifests = self.list_manifests()
+        if snapshot_id:
+            return next((m for m in manifests if m['snapshot_id'] == snapshot_id), None)
+        if as_of:
+            cutoff = datetime.fromisoformat(as_of)
+            if cutoff.tzinfo is None:
+                cutoff = cutoff.replace(tzinfo=timezone.utc)
+            manifests = [m for m in manifests if datetime.fromisoformat(m['created_at']) <= cutoff]
+        return manifests[-1] if manifests else None
+
+
+def chunk_table(store: ChunkStore, pages: Iterator[List[Dict[str, Any]]], key: str = 'id') -> Dict[str, Any]:
+    """Cut a table (pages in key order) into key-defined chunks and store the new ones"""
+    chunks: List[Dict[str, Any]] = []
+    columns: List[str] = []
+    stats = {'rows': 0, 'new_chunks': 0, 'reused_chunks': 0, 'bytes_written': 0}
+    buffer: List[str] = []
+
+    def flush():
+        if not buffer:
+            return
+        payload = ('\n'.join(buffer) + '\n').encode('utf-8')
+        digest, written = store.put(payload)
+        chunks.append({'hash': digest, 'rows': len(buffer)})
+        if written:
+            stats['new_chunks'] += 1
+            stats['bytes_written'] += os.path.getsize(store.chunk_path(digest))
+        else:
+            stats['reused_chunks'] += 1
+        buffer.clear()
+
+    for rows in pages:
+        for row in rows:
+            if not columns:
+                columns = sorted(row.keys())
+            buffer.append(_canonical(row))
+            stats['rows'] += 1
+            if _is_boundary(row.get(key)) or len(buffer) >= MAX_CHUNK_ROWS:
+                flush()
+    flush()
+    return {'key': key, 'columns': columns, 'chunks': chunks, **stats}
+
+
+def create_snapshot(store: ChunkStore, sources: Dict[str, Callable[[], Iterator[List[Dict[str, Any]]]]],
+                    label: str = '') -> Dict[str, Any]:
+    """Take a snapshot of every source table and write its manifest"""
+    started = time.monotonic()
+    created_at = datetime.now(timezone.utc)
+    previous = store.find_manifest()
+    manifest = {
+        'snapshot_id': created_at.strftime('%Y%m%dT%H%M%S%fZ'),
+        'created_at': created_at.isoformat(),
+        'parent': previous['snapshot_id'] if previous else None,
+        'label': label,
+        'tables': {},
+    }
+
+    for name, pages in sources.items():
+        try:
+            entry = chunk_table(store, pages())
+        except Exception as e:
+            print(f"  ❌ {name}: {e}")
+            # Keep the previous copy of this table so the snapshot stays restorable
+            if previous and name in previous['tables']:
+                entry = dict(previous['tables'][name], carried_over=True, error=str(e))
+            else:
+                continue
+        manifest['tables'][name] = entry
+        print(f"  ✅ {name}: {entry['rows']:,} rows, {entry.get('new_chunks', 0)} new / "
+              f"{entry.get('reused_chunks', 0)} reused chunks")
+
+    manifest['seconds'] = round(time.monotonic() - started, 2)
+    manifest['bytes_written'] = sum(t.get('bytes_written', 0) for t in manifest['tables'].values() if not t.get('carried_over'))
+    store.save_manifest(manifest)
+    return manifest
+
+
+def restore_snapshot(store: ChunkStore, manifest: Dict[str, Any], output: str,
+                     tables: Optional[List[str]] = None) -> Dict[str, int]:
+    """Rebuild a combined-backup style ZIP (one CSV per table) from a snapshot"""
+    counts = {}
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for name, entry in manifest['tables'].items():
+            if tables and name not in tables:
+                continue
+            with zipf.open(f"{name}.csv", 'w', force_zip64=True) as raw:
+                text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+                writer = csv.DictWriter(text, fieldnames=entry['columns'], extrasaction='ignore')
+                writer.writeheader()
+                count = 0
+                for chunk in entry['chunks']:
+                    for row in store.get_rows(chunk['hash']):
+                        writer.writerow({k: json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
+                                         for k, v in row.items()})
+                        count += 1
+                text.flush()
+                text.detach()
+            counts[name] = count
+            print(f"  ✅ {name}.csv: {count:,} rows")
+    return counts
+
+
+def garbage_collect(store: ChunkStore, keep: int) -> Dict[str, int]:
+    """Drop all but the `keep` most recent manifests and the chunks no longer referenced"""
+    manifests = store.list_manifests()
+    removed_manifests = 0
+    for manifest in manifests[:-keep] if keep > 0 else []:
+        os.remove(os.path.join(store.manifests_dir, f"{manifest['snapshot_id']}.json"))
+        removed_manifests += 1
+
+    referenced = {
+        chunk['hash']
+        for manifest in store.list_manifests()
+        for entry in manifest['tables'].values()
+        for chunk in entry['chunks']
+    }
+    removed_chunks = 0
+    for folder, _, files in os.walk(store.chunks_dir):
+        for name in files:
+            if name.endswith('.ndjson.gz') and name[:-len('.ndjson.gz')] not in referenced:
+                os.remove(os.path.join(folder, name))
+                removed_chunks += 1
+    return {'manifests': removed_manifests, 'chunks': removed_chunks}
+
+
+def default_sources(include_baserow: bool) -> Dict[str, Callable[[], Iterator[List[Dict[str, Any]]]]]:
+    from supabase_config import get_supabase_anon_client
+
+    supabase = get_supabase_anon_client()
+    sources = {table: (lambda table=table: iter_supabase_pages(supabase, table)) for table in SUPABASE_TABLES}
+    if include_baserow:
+        from migration_engine import BaserowClient
+        baserow = BaserowClient()
+        for table_id, name in BASEROW_TABLES:
+            sources[f"baserow_{name}"] = lambda table_id=table_id: iter_baserow_pages(baserow, table_id)
+    return sources
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Incremental, content-addressed SDB backups")
+    parser.add_argument('--store', default=DEFAULT_STORE, help="Backup store directory")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    backup = sub.add_parser('backup', help="Take a snapshot (only changed chunks are written)")
+    backup.add_argument('--baserow', action='store_true', help="Include the Baserow tables")
+    backup.add_argument('--label', default='')
+    backup.add_argument('--rclone-remote', help="rclone destination to sync the store to (e.g. gdrive:sdb-backup)")
+
+    sub.add_parser('list', help="List snapshots")
+
+    restore = sub.add_parser('restore', help="Rebuild a backup ZIP from a snapshot")
+    restore.add_argument('--snapshot', help="Snapshot id (default: latest)")
+    restore.add_argument('--as-of', help="Latest snapshot taken at or before this ISO timestamp")
+    restore.add_argument('--tables', nargs='*')
+    restore.add_argument('--output', help="ZIP path (default: restore_<snapshot>.zip)")
+
+    gc = sub.add_parser('gc', help="Delete old snapshots and unreferenced chunks")
+    gc.add_argument('--keep', type=int, default=30)
+
+    args = parser.parse_args(argv)
+    store = ChunkStore(args.store)
+
+    if args.command == 'backup':
+        print(f"💾 Incremental backup into {args.store}...")
+        manifest = create_snapshot(store, default_sources(args.baserow), args.label)
+        print(f"✅ Snapshot {manifest['snapshot_id']}: {manifest['bytes_written']:,} new bytes "
+              f"in {manifest['seconds']}s")
+        if args.rclone_remote:
+            # Chunks are immutable: copy uploads only what is new
+            print(f"☁️  rclone copy {args.store} -> {args.rclone_remote}")
+            return subprocess.call(['rclone', 'copy', args.store, args.rclone_remote])
+        return 0
+
+    if args.command == 'list':
+        for manifest in store.list_manifests():
+            rows = sum(t['rows'] for t in manifest['tables'].values())
+            print(f"📸 {manifest['snapshot_id']}  {manifest['created_at']}  {rows:,} rows  "
+                  f"+{manifest.get('bytes_written', 0):,} bytes  {manifest.get('label', '')}")
+        return 0
+
+    if args.command == 'restore':
+        manifest = store.find_manifest(args.snapshot, args.as_of)
+        if not manifest:
+            print("❌ No matching snapshot")
+            return 1
+        output = args.output or f"restore_{manifest['snapshot_id']}.zip"
+        print(f"♻️  Restoring snapshot {manifest['snapshot_id']} ({manifest['created_at']}) into {output}")
+        restore_snapshot(store, manifest, output, args.tables)
+        return 0
+
+    if args.command == 'gc':
+        removed = garbage_collect(store, args.keep)
+        print(f"🧹 Removed {removed['manifests']} snapshots and {removed['chunks']} chunks")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Bulk Baserow -> Supabase migration engine for SDB
+
+- Baserow pages are fetched concurrently (page count comes from the first page)
+- Rows are mapped with a per-table field spec (TABLE_SPECS) instead of hand-built dicts
+- Supabase writes are batched upserts (on_conflict on the natural key), several in flight
+- Progress is checkpointed per batch so an interrupted run resumes where it stopped
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+BASEROW_URL = os.getenv("BASEROW_URL")
+BASEROW_AUTH_KEY = os.getenv("BASEROW_AUTH_KEY")
+
+# Baserow maximum page size
+BASEROW_PAGE_SIZE = 200
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = 8
+DEFAULT_CHECKPOINT = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".migration_checkpoint.json")
+
+# Legacy class labels found in Baserow -> Supabase classe_nom
+CLASS_NAME_FIXES = {
+    '2ème Année Confirmation (6e)': '2ème Année Confirmation (5ème)',
+    '3ème Année Confirmation (5e)': '3ème Année Confirmation (6ème)',
+    '8': '3ème Année Confirmation (6ème)',
+}
+
+CLASS_LEVELS = ['CI', 'CP', 'CE1', 'CE2', 'CM1', 'CM2', '5ème', '6ème']
+
+
+# ---------------------------------------------------------------------------
+# Value cleaners (shared by every table spec)
+# ---------------------------------------------------------------------------
+
+def clean_text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def to_int(value, default=0):
+    try:
+        return int(float(value)) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+
+def to_float(value, default=0):
+    try:
+        return float(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+
+def to_timestamp(value):
+    """Baserow ISO dates ('...Z') -> ISO string accepted by PostgREST"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).isoformat()
+    except ValueError:
+        return None
+
+
+def clean_yes_no(value, default=None):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return 'oui' if value else 'non'
+    value = str(value).strip().lower()
+    return value if value in ('oui', 'non') else default
+
+
+def clean_etat(value):
+    value = clean_text(value)
+    if not value:
+        return 'En attente'
+    if value.lower() in ('inscription validée', 'inscription validee'):
+        return 'Inscription Validée'
+    if value in ('Inscription Validée', 'En attente', 'Annulée'):
+        return value
+    return 'En attente'
+
+
+def clean_moyen_paiement(value):
+    value = clean_text(value)
+    if not value:
+        return None
+    if value.upper() in ('ORANGE MONEY', 'OM'):
+        return 'OM'
+    if value.lower() in ('au secrétariat', 'cash'):
+        return 'CASH'
+    if value in ('CASH', 'WAVE', 'OM', 'CB'):
+        return value
+    return None
+
+
+def clean_action(value):
+    value = clean_text(value)
+    if not value:
+        return None
+    if value.lower() == 'transfert':
+        return "Transfert à partir d'une autre paroisse"
+    if value in ('Nouvelle Inscription', 'Réinscription', "Transfert à partir d'une autre paroisse"):
+        return value
+    return None
+
+
+def class_level(classe_nom):
+    for level in CLASS_LEVELS:
+        if level in (classe_nom or ''):
+            return level
+    return ''
+
+
+# ---------------------------------------------------------------------------
+# Field spec helpers
+# ---------------------------------------------------------------------------
+
+FieldFn = Callable[[Dict[str, Any], "MigrationEngine"], Any]
+
+
+def col(name: str, clean: Optional[Callable[[Any], Any]] = None, default: Any = None) -> FieldFn:
+    """Copy a Baserow column, optionally through a cleaner"""
+    def getter(row, engine):
+        value = row.get(name)
+        if clean is not None:
+            return clean(value)
+        return default if value in (None, '') else value
+    return getter
+
+
+def link(name: str, lookup: str, fallback_column: Optional[str] = None) -> FieldFn:
+    """Resolve a Baserow link-row field (or a plain text fallback column) to a Supabase id"""
+    def getter(row, engine):
+        label = None
+        linked = row.get(name)
+        if isinstance(linked, list) and linked:
+            label = linked[0].get('value')
+        elif fallback_column:
+            label = row.get(fallback_column)
+        label = clean_text(label)
+        if not label:
+            return None
+        label = CLASS_NAME_FIXES.get(label, label)
+        return engine.lookup(lookup).get(label)
+    return getter
+
+
+@dataclass
+class TableSpec:
+    """How one Baserow table maps onto one Supabase table"""
+    name: str
+    baserow_table_id: int
+    conflict_key: str
+    fields: Dict[str, FieldFn]
+    required: Tuple[str, ...] = ()
+    depends_on: Tuple[str, ...] = field(default_factory=tuple)
+
+    def map_row(self, row: Dict[str, Any], engine: "MigrationEngine") -> Optional[Dict[str, Any]]:
+        mapped = {target: getter(row, engine) for target, getter in self.fields.items()}
+        if not mapped.get(self.conflict_key) or any(not mapped.get(key) for key in self.required):
+            return None
+        return mapped
+
+
+# Lookup tables: Supabase table -> (label column, id column)
+LOOKUPS = {
+    'classes': ('classe_nom', 'id'),
+    'annees_scolaires': ('annee_nom', 'id'),
+}
+
+TABLE_SPECS: Dict[str, TableSpec] = {
+    'parents': TableSpec(
+        name='parents',
+        baserow_table_id=572,
+        conflict_key='code_parent',
+        required=('prenoms', 'telephone'),
+        fields={
+            'code_parent': col('Code Parent', clean_text),
+            'prenoms': col('Prenoms', clean_text),
+            'nom': col('Nom', clean_text),
+            'telephone': col('Téléphone', clean_text),
+            'telephone2': col('Téléphone 2', clean_text),
+            'email': col('Email', clean_text),
+            'actif': col('Actif', default=True),
+        },
+    ),
+    'classes': TableSpec(
+        name='classes',
+        baserow_table_id=661,
+        conflict_key='classe_nom',
+        fields={
+            'classe_nom': col('value', clean_text),
+            'niveau': lambda row, engine: class_level(row.get('value')),
+            'description': lambda row, engine: f"Classe de {row.get('value', '')}",
+        },
+    ),
+    'annees_scolaires': TableSpec(
+        name='annees_scolaires',
+        baserow_table_id=576,
+        conflict_key='annee_nom',
+        fields={
+            'annee_nom': col('value', clean_text),
+            'description': lambda row, engine: f"Année scolaire {row.get('value', '')}",
+            'active': lambda row, engine: row.get('value', '') == '2024-2025',
+        },
+    ),
+    'catechumenes': TableSpec(
+        name='catechumenes',
+        baserow_table_id=575,
+        conflict_key='id_catechumene',
+        required=('prenoms', 'nom'),
+        fields={
+            'id_catechumene': col('ID Catechumene', clean_text),
+            'prenoms': col('Prenoms', clean_text),
+            'nom': col('Nom', clean_text),
+            'baptise': col('Baptisee', lambda v: clean_yes_no(v, 'non')),
+            'extrait_bapteme_fourni': col('Extrait De Bapteme Fourni', lambda v: clean_yes_no(v, 'non')),
+            'lieu_bapteme': col('LieuBapteme', clean_text),
+            'commentaire': col('Commentaire', clean_text),
+            'annee_naissance': col('Année de naissance', clean_text),
+            'attestation_transfert_fournie': col('Attestation De Transfert Fournie', lambda v: clean_yes_no(v, 'non')),
+            'operateur': col('operateur', clean_text),
+            'code_parent': col('Code Parent', clean_text),
+            'extrait_naissance_fourni': col('Extrait de Naissance Fourni', lambda v: clean_yes_no(v, 'non')),
+        },
+    ),
+    'inscriptions': TableSpec(
+        name='inscriptions',
+        baserow_table_id=574,
+        conflict_key='id_inscription',
+        required=('id_catechumene', 'prenoms', 'nom'),
+        depends_on=('classes', 'annees_scolaires', 'catechumenes'),
+        fields={
+            'id_inscription': col('ID Inscription', clean_text),
+            'id_catechumene': col('ID Catechumene', clean_text),
+            'prenoms': col('Prenoms', clean_text),
+            'nom': col('Nom', clean_text),
+            'annee_precedente': col('AnneePrecedente', clean_text),
+            'paroisse_annee_precedente': col('ParoisseAnneePrecedente', clean_text),
+            'id_classe_courante': link('ID_ClasseCourante', 'classes', fallback_column='ClasseCourante'),
+            'montant': col('Montant', to_int),
+            'paye': col('Paye', to_int),
+            'date_inscription': col('DateInscription', to_timestamp),
+            'commentaire': col('Commentaire', clean_text),
+            'sms': col('sms', clean_yes_no),
+            'action': col('action', clean_action),
+            'attestation_de_transfert': col('AttestationDeTransfert', clean_yes_no),
+            'operateur': col('operateur', clean_text),
+            'id_annee_inscription': link('ID_AnneeInscription', 'annees_scolaires', fallback_column='Annee Inscription'),
+            'resultat_final': col('Resultat Final', clean_text),
+            'note_finale': col('Note Finale', to_float),
+            'moyen_paiement': col('Moyen Paiement', clean_moyen_paiement),
+            'infos_paiement': col('Infos Paiement', clean_text),
+            'choix_paiement': col('Choix Paiement', clean_text),
+            'id_annee_suivante': link('ID_AnneeSuivante', 'classes', fallback_column='Annee Suivante'),
+            'etat': col('Etat', clean_etat),
+            'absences': col('Absennces', to_int),
+            'livre_remis': col('Livre Remis', clean_yes_no),
+            'groupe': col('Groupe', clean_text),
+        },
+    ),
+}
+
+# Dependency order for a full reload
+MIGRATION_ORDER = ['parents', 'classes', 'annees_scolaires', 'catechumenes', 'inscriptions']
+
+
+# ---------------------------------------------------------------------------
+# Baserow reader
+# ---------------------------------------------------------------------------
+
+class BaserowClient:
+    """Concurrent, paginated reader for the Baserow REST API"""
+
+    def __init__(self, url: Optional[str] = None, token: Optional[str] = None, workers: int = DEFAULT_WORKERS):
+        self.url = (url or BASEROW_URL or '').rstrip('/')
+        self.workers = workers
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Token {token or BASEROW_AUTH_KEY}"})
+        adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch_page(self, table_id: int, page: int, size: int = BASEROW_PAGE_SIZE,
+                   params: Optional[Dict[str, Any]] = None, retries: int = 3) -> Dict[str, Any]:
+        url = f"{self.url}/api/database/rows/table/{table_id}/"
+        query = {"user_field_names": "true", "page": page, "size": size, **(params or {})}
+        for attempt in range(retries):
+            try:
+                response = self.session.get(url, params=query, timeout=60)
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                if attempt == retries - 1:
+                    raise
+                print(f"⚠️  Baserow table {table_id} page {page} failed ({e}), retrying...")
+                time.sleep(2 ** attempt)
+
+    def fetch_all(self, table_id: int, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Fetch every row; pages 2..N are requested in parallel once the count is known"""
+        first = self.fetch_page(table_id, 1, params=params)
+        rows = list(first.get('results', []))
+        total = first.get('count') or len(rows)
+        pages = (total + BASEROW_PAGE_SIZE - 1) // BASEROW_PAGE_SIZE
+
+        if pages > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = pool.map(lambda page: self.fetch_page(table_id, page, params=params), range(2, pages + 1))
+                for data in results:
+                    rows.extend(data.get('results', []))
+
+        print(f"📄 Fetched {len(rows)} rows from Baserow table {table_id} ({pages} pages)")
+        return rows
+
+
+# ---------------------------------------------------------------------------
+# Checkpoints
+# ---------------------------------------------------------------------------
+
+class Checkpoint:
+    """Per-table set of completed batch indexes, persisted as JSON after every batch"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.lock = threading.Lock()
+        self.state: Dict[str, Any] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except Exception as e:
+                print(f"⚠️  Ignoring unreadable checkpoint {path}: {e}")
+
+    def table(self, name: str, total_rows: int, batch_size: int) -> Dict[str, Any]:
+        """Progress for a table; reset when the source size or batch size changed"""
+        with self.lock:
+            entry = self.state.get(name)
+            if not entry or entry.get('rows') != total_rows or entry.get('batch_size') != batch_size:
+                entry = {'rows': total_rows, 'batch_size': batch_size, 'done': [], 'completed': False}
+                self.state[name] = entry
+            return entry
+
+    def mark_batch(self, name: str, index: int) -> None:
+        with self.lock:
+            self.state[name]['done'].append(index)
+            self._save()
+
+    def mark_completed(self, name: str) -> None:
+        with self.lock:
+            self.state[name]['completed'] = True
+            self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self, tables: Optional[List[str]] = None) -> None:
+        """Forget the given tables (default: all); the file is removed once nothing is left"""
+        with self.lock:
+            if tables is None:
+                self.state = {}
+            else:
+                for name in tables:
+                    self.state.pop(name, None)
+            if self.state:
+                self._save()
+            elif self.path and os.path.exists(self.path):
+                os.remove(self.path)
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+class MigrationEngine:
+    """Maps Baserow rows with TABLE_SPECS and bulk-upserts them into Supabase"""
+
+    def __init__(self, supabase, baserow: Optional[BaserowClient] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 workers: int = DEFAULT_WORKERS, checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT):
+        self.supabase = supabase
+        self.baserow = baserow or BaserowClient(workers=workers)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self._lookups: Dict[str, Dict[str, Any]] = {}
+
+    def lookup(self, table: str) -> Dict[str, Any]:
+        """label -> id mapping for a reference table (loaded once per run)"""
+        if table not in self._lookups:
+            label_column, id_column = LOOKUPS[table]
+            result = self.supabase.table(table).select(f"{id_column}, {label_column}").execute()
+            self._lookups[table] = {row[label_column]: row[id_column] for row in result.data or []}
+        return self._lookups[table]
+
+    def map_rows(self, spec: TableSpec, rows: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Map and de-duplicate rows on the conflict key (last one wins); returns (rows, skipped)"""
+        mapped: Dict[Any, Dict[str, Any]] = {}
+        skipped = 0
+        for row in sorted(rows, key=lambda r: r.get('id') or 0):
+            record = spec.map_row(row, self)
+            if record is None:
+                skipped += 1
+                continue
+            mapped[record[spec.conflict_key]] = record
+        return list(mapped.values()), skipped
+
+    def _upsert_batch(self, table: str, conflict_key: str, batch: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+        """Upsert one batch; on failure retry row by row to isolate the bad records"""
+        try:
+            self.supabase.table(table).upsert(batch, on_conflict=conflict_key).execute()
+            return len(batch), []
+        except Exception as batch_error:
+            print(f"⚠️  Batch upsert into {table} failed ({batch_error}), retrying row by row")
+
+        written, errors = 0, []
+        for record in batch:
+            try:
+                self.supabase.table(table).upsert(record, on_conflict=conflict_key).execute()
+                written += 1
+            except Exception as e:
+                errors.append(f"{record.get(conflict_key)}: {e}")
+        return written, errors
+
+    def upsert_rows(self, table: str, conflict_key: str, records: List[Dict[str, Any]],
+                    checkpoint_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Upsert records in batches of batch_size with up to `workers` batches in flight
+
+        Batches already recorded in the checkpoint under checkpoint_name are skipped
+        and counted in 'already_done', not 'written'.
+        """
+        batches = [records[i:i + self.batch_size] for i in range(0, len(records), self.batch_size)]
+        progress = self.checkpoint.table(checkpoint_name, len(records), self.batch_size) if checkpoint_name else None
+        done = set(progress['done']) if progress else set()
+        pending = [(index, batch) for index, batch in enumerate(batches) if index not in done]
+        already_done = sum(len(batches[i]) for i in done if i < len(batches))
+        if done:
+            print(f"⏩ {table}: resuming, {len(done)}/{len(batches)} batches ({already_done} rows) "
+                  f"done in a previous run, skipping them")
+
+        stats = {'written': 0, 'already_done': already_done, 'errors': []}
+
+        def run(item):
+            index, batch = item
+            written, errors = self._upsert_batch(table, conflict_key, batch)
+            if checkpoint_name and not errors:
+                self.checkpoint.mark_batch(checkpoint_name, index)
+            return written, errors
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for written, errors in pool.map(run, pending):
+                stats['written'] += written
+                stats['errors'].extend(errors)
+                print(f"📈 {table}: {stats['written']}/{len(records) - already_done} rows upserted")
+
+        # Reference data changed: reload lookups on next use
+        self._lookups.pop(table, None)
+        return stats
+
+    def migrate_table(self, spec: TableSpec, rows: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Fetch (unless rows are given), map and upsert one table"""
+        print(f"🔄 Migrating {spec.name}...")
+        started = time.monotonic()
+        if rows is None:
+            rows = self.baserow.fetch_all(spec.baserow_table_id)
+        records, skipped = self.map_rows(spec, rows)
+        stats = self.upsert_rows(spec.name, spec.conflict_key, records, checkpoint_name=spec.name)
+        if not stats['errors']:
+            self.checkpoint.mark_completed(spec.name)
+
+        stats.update({
+            'source_rows': len(rows),
+            'skipped': skipped,
+            'seconds': round(time.monotonic() - started, 2),
+        })
+        status = "✅" if not stats['errors'] else "⚠️ "
+        resumed = f", {stats['already_done']} done in a previous run" if stats['already_done'] else ""
+        print(f"{status} {spec.name}: {stats['written']}/{len(records)} upserted{resumed}, "
+              f"{skipped} skipped, {len(stats['errors'])} errors in {stats['seconds']}s")
+        for error in stats['errors'][:10]:
+            print(f"   ❌ {error}")
+        return stats
+
+    def run(self, tables: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Migrate tables in dependency order
+
+        Tables completed by an interrupted previous run are skipped; once every
+        table went through cleanly their checkpoint entries are cleared, so the
+        next run migrates everything again.
+        """
+        tables = [t for t in MIGRATION_ORDER if not tables or t in tables]
+        results = {}
+        for name in tables:
+            if self.checkpoint.state.get(name, {}).get('completed'):
+                print(f"⏩ {name}: already completed in checkpoint, skipping")
+                continue
+            results[name] = self.migrate_table(TABLE_SPECS[name])
+        if not any(stats['errors'] for stats in results.values()):
+            self.checkpoint.clear(tables)
+        return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk Baserow -> Supabase migration")
+    parser.add_argument('--tables', nargs='*', choices=MIGRATION_ORDER, help="Tables to migrate (default: all)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows per upsert (500-1000)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Concurrent page fetches / upserts")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help="Checkpoint file for resumable runs")
+    parser.add_argument('--reset', action='store_true', help="Ignore and clear any existing checkpoint")
+    args = parser.parse_args(argv)
+
+    from supabase_config import get_supabase_client
+
+    engine = MigrationEngine(get_supabase_client(), batch_size=args.batch_size,
+                             workers=args.workers, checkpoint_path=args.checkpoint)
+    if args.reset:
+        engine.checkpoint.clear()
+
+    print("🚀 Starting SDB bulk migration to Supabase...")
+    started = time.monotonic()
+    results = engine.run(args.tables)
+
+    print("\n📊 Migration Statistics:")
+    for table, stats in results.items():
+        print(f"   {table}: {stats['written']} records ({stats['seconds']}s)")
+    print(f"⏱️  Total: {time.monotonic() - started:.1f}s")
+
+    return 1 if any(stats['errors'] for stats in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Restore an SDB backup archive (combined_backup_*.zip / supabase_backup_*.zip)
+
+- Each table entry (csv or ndjson) is streamed straight from the ZIP in
+  batches, never fully loaded in memory
+- Tables are loaded in foreign-key order; tables with no pending dependency
+  run concurrently (annees_scolaires, classes, catechumenes, parents, then
+  inscriptions, then notes)
+- Batches are upserted on the primary key, several in flight per table
+- Row counts in the target are checked against the archive at the end
+
+Targets:
+    Supabase (default, service key from supabase_config)
+    Postgres directly with --database-url (needs psycopg2), e.g. a local
+    instance to benchmark restore throughput:
+        python restore_backup.py combined_backup.zip --database-url postgresql://localhost/sdb --benchmark
+
+Restore into an empty schema: the seeded classes / annees_scolaires rows have
+other ids and would collide with the archived ones on their unique names.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import psycopg2  # type: ignore
+    from psycopg2.extras import execute_values  # type: ignore
+    from psycopg2.pool import ThreadedConnectionPool  # type: ignore
+except ImportError:  # pragma: no cover
+    psycopg2 = None
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_TABLE_WORKERS = 4
+DEFAULT_BATCH_WORKERS = 4
+
+# table -> tables it references (supabase_schema.sql)
+RESTORE_DEPENDENCIES: Dict[str, Set[str]] = {
+    'annees_scolaires': set(),
+    'classes': set(),
+    'catechumenes': set(),
+    'parents': set(),
+    'inscriptions': {'catechumenes', 'classes', 'annees_scolaires'},
+    'notes': {'inscriptions', 'catechumenes'},
+}
+RESTORE_ORDER = ['annees_scolaires', 'classes', 'catechumenes', 'parents', 'inscriptions', 'notes']
+
+# CSV cannot tell NULL from '': empty cells become NULL except in these NOT NULL text columns
+NOT_NULL_TEXT = {
+    'annees_scolaires': {'annee_nom'},
+    'classes': {'classe_nom'},
+    'catechumenes': {'id_catechumene', 'prenoms', 'nom'},
+    'parents': {'code_parent', 'prenoms', 'telephone'},
+    'inscriptions': {'id_inscription', 'id_catechumene', 'prenoms', 'nom'},
+    'notes': {'annee_scolaire'},
+}
+
+# Computed by Postgres (schema section 14): exported, but never written back
+GENERATED_COLUMNS = {
+    'parents': {'telephone_e164', 'telephone2_e164'},
+}
+
+# ---------------------------------------------------------------------------
+# Archive reading
+# ---------------------------------------------------------------------------
+
+def archive_tables(zip_path: str, prefix: str = '') -> Dict[str, str]:
+    """table name -> archive entry, for the tables we know how to restore"""
+    entries = {}
+    with zipfile.ZipFile(zip_path) as zipf:
+        for name in zipf.namelist():
+            base, ext = os.path.splitext(name)
+            if ext not in ('.csv', '.ndjson') or not base.startswith(prefix):
+                continue
+            table = base[len(prefix):]
+            if table in RESTORE_DEPENDENCIES:
+                entries[table] = name
+    return entries
+
+
+def _clean_csv_row(row: Dict[str, str], keep_empty: Set[str], skip: Set[str]) -> Dict[str, Any]:
+    return {k: (None if v == '' and k not in keep_empty else v) for k, v in row.items() if k not in skip}
+
+
+def iter_entry_batches(zip_path: str, entry: str, table: str,
+                       batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Stream one archive entry as batches of row dicts (own ZipFile handle: thread safe)"""
+    keep_empty = NOT_NULL_TEXT.get(table, set())
+    skip = GENERATED_COLUMNS.get(table, set())
+    with zipfile.ZipFile(zip_path) as zipf, zipf.open(entry) as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        if entry.endswith('.csv'):
+            rows = (_clean_csv_row(row, keep_empty, skip) for row in csv.DictReader(text))
+        else:
+            rows = ({k: v for k, v in json.loads(line).items() if k not in skip}
+                    for line in text if line.strip())
+        batch: List[Dict[str, Any]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+# ---------------------------------------------------------------------------
+# Targets
+# ---------------------------------------------------------------------------
+
+class SupabaseSink:
+    """Batched upserts through PostgREST"""
+
+    name = 'supabase'
+
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def write(self, table: str, key: str, rows: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+        try:
+            self.supabase.table(table).upsert(rows, on_conflict=key).execute()
+            return len(rows), []
+        except Exception as batch_error:
+            print(f"⚠️  Batch upsert into {table} failed ({batch_error}), retrying row by row")
+
+        written, errors = 0, []
+        for row in rows:
+            try:
+                self.supabase.table(table).upsert(row, on_conflict=key).execute()
+                written += 1
+            except Exception as e:
+                errors.append(f"{row.get(key)}: {e}")
+        return written, errors
+
+    def count(self, table: str) -> int:
+        result = self.supabase.table(table).select('id', count='exact').limit(1).execute()
+        return result.count or 0
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresSink:
+    """INSERT ... ON CONFLICT DO UPDATE with execute_values over a connection pool"""
+
+    name = 'postgres'
+
+    def __init__(self, dsn: str, max_connections: int = DEFAULT_TABLE_WORKERS * DEFAULT_BATCH_WORKERS):
+        if psycopg2 is None:
+            raise RuntimeError("psycopg2 is required for --database-url (pip install psycopg2-binary)")
+        self.pool = ThreadedConnectionPool(1, max_connections, dsn)
+
+    def write(self, table: str, key: str, rows: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+        columns = list(rows[0].keys())
+        column_list = ', '.join(f'"{c}"' for c in columns)
+        updates = ', '.join(f'"{c}" = EXCLUDED."{c}"' for c in columns if c != key)
+        action = f'UPDATE SET {updates}' if updates else 'NOTHING'
+        sql = f'INSERT INTO "{table}" ({column_list}) VALUES %s ON CONFLICT ("{key}") DO {action}'
+        values = [tuple(row.get(c) for c in columns) for row in rows]
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                execute_values(cur, sql, values, page_size=len(values))
+            conn.commit()
+            return len(rows), []
+        except Exception as e:
+            conn.rollback()
+            return 0, [f"batch of {len(rows)} starting at {rows[0].get(key)}: {e}"]
+        finally:
+            self.pool.putconn(conn)
+
+    def count(self, table: str) -> int:
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f'SELECT count(*) FROM "{table}"')
+                return cur.fetchone()[0]
+        finally:
+            self.pool.putconn(conn)
+
+    def close(self) -> None:
+        self.pool.closeall()
+
+
+# ---------------------------------------------------------------------------
+# Restore
+# ---------------------------------------------------------------------------
+
+def restore_table(sink, zip_path: str, entry: str, table: str, key: str = 'id',
+                  batch_size: int = DEFAULT_BATCH_SIZE, batch_workers: int = DEFAULT_BATCH_WORKERS) -> Dict[str, Any]:
+    """Stream one entry into the target with at most `batch_workers` batches in flight"""
+    started = time.monotonic()
+    stats: Dict[str, Any] = {'rows': 0, 'written': 0, 'errors': []}
+    in_flight: Set[Future] = set()
+
+    def collect(done):
+        for future in done:
+            written, errors = future.result()
+            stats['written'] += written
+            stats['errors'].extend(errors)
+
+    with ThreadPoolExecutor(max_workers=max(1, batch_workers)) as pool:
+        for batch in iter_entry_batches(zip_path, entry, table, batch_size):
+            stats['rows'] += len(batch)
+            in_flight.add(pool.submit(sink.write, table, key, batch))
+            if len(in_flight) >= batch_workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(in_flight)[0])
+
+    stats['seconds'] = round(time.monotonic() - started, 2)
+    stats['rows_per_second'] = round(stats['rows'] / stats['seconds']) if stats['seconds'] else stats['rows']
+    status = "✅" if not stats['errors'] else "⚠️ "
+    print(f"{status} {table}: {stats['written']:,}/{stats['rows']:,} rows in {stats['seconds']}s "
+          f"({stats['rows_per_second']:,} rows/s), {len(stats['errors'])} errors")
+    for error in stats['errors'][:10]:
+        print(f"   ❌ {error}")
+    return stats
+
+
+def restore_archive(sink, zip_path: str, tables: Optional[List[str]] = None, prefix: str = '',
+                    batch_size: int = DEFAULT_BATCH_SIZE, table_workers: int = DEFAULT_TABLE_WORKERS,
+                    batch_workers: int = DEFAULT_BATCH_WORKERS) -> Dict[str, Dict[str, Any]]:
+    """
+    Restore every known table of the archive, starting each one as soon as the
+    tables it references are done. A failed table blocks its dependents.
+    """
+    entries = archive_tables(zip_path, prefix)
+    pending = [t for t in RESTORE_ORDER if t in entries and (not tables or t in tables)]
+    results: Dict[str, Dict[str, Any]] = {}
+
+    selected = set(pending)
+
+    def ready(table):
+        # References to tables absent from the archive are assumed already loaded
+        deps = RESTORE_DEPENDENCIES[table] & selected
+        return all(dep in results and not results[dep]['errors'] for dep in deps)
+
+    def blocked(table):
+        return any(dep in results and results[dep]['errors'] for dep in RESTORE_DEPENDENCIES[table])
+
+    running: Dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, table_workers)) as pool:
+        while pending or running:
+            for table in list(pending):
+                if blocked(table):
+                    pending.remove(table)
+                    results[table] = {'rows': 0, 'written': 0, 'errors': ['dependency failed'], 'skipped': True}
+                    print(f"⏭️  {table}: skipped, a table it references failed")
+                elif ready(table):
+                    pending.remove(table)
+                    print(f"🔄 Restoring {table} from {entries[table]}...")
+                    running[pool.submit(restore_table, sink, zip_path, entries[table], table,
+                                        'id', batch_size, batch_workers)] = table
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table = running.pop(future)
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    print(f"❌ {table}: {e}")
+                    stats = {'rows': 0, 'written': 0, 'errors': [str(e)]}
+                results[table] = stats
+    return results
+
+
+def verify_counts(sink, results: Dict[str, Dict[str, Any]]) -> bool:
+    """Target row count must be at least the archive row count for every restored table"""
+    ok = True
+    print("\n🔍 Verifying row counts:")
+    for table, stats in results.items():
+        if stats.get('skipped'):
+            continue
+        try:
+            count = sink.count(table)
+        except Exception as e:
+            print(f"  ❌ {table}: count failed ({e})")
+            ok = False
+            continue
+        stats['target_rows'] = count
+        match = count >= stats['rows']
+        ok = ok and match
+        print(f"  {'✅' if match else '❌'} {table}: archive {stats['rows']:,}, target {count:,}")
+    return ok
+
+
+def print_benchmark(sink, results: Dict[str, Dict[str, Any]], seconds: float) -> None:
+    rows = sum(s['rows'] for s in results.values())
+    print(f"\n⏱️  Benchmark ({sink.name}): {rows:,} rows in {seconds:.2f}s "
+          f"= {rows / seconds if seconds else 0:,.0f} rows/s overall")
+    for table, stats in results.items():
+        if not stats.get('skipped'):
+            print(f"  • {table}: {stats.get('rows_per_second', 0):,} rows/s ({stats.get('seconds', 0)}s)")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Restore an SDB backup archive into Supabase or Postgres")
+    parser.add_argument('archive', help="Backup ZIP (csv or ndjson entries)")
+    parser.add_argument('--tables', nargs='*', choices=RESTORE_ORDER, help="Tables to restore (default: all found)")
+    parser.add_argument('--prefix', default='', help="Entry name prefix of the tables to restore")
+    parser.add_argument('--database-url', help="Restore into Postgres directly instead of Supabase")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--table-workers', type=int, default=DEFAULT_TABLE_WORKERS, help="Tables restored concurrently")
+    parser.add_argument('--batch-workers', type=int, default=DEFAULT_BATCH_WORKERS, help="Batches in flight per table")
+    parser.add_argument('--benchmark', action='store_true', help="Print throughput per table")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        sink = PostgresSink(args.database_url, args.table_workers * args.batch_workers)
+    else:
+        from supabase_config import get_supabase_client
+        sink = SupabaseSink(get_supabase_client())
+
+    print(f"♻️  Restoring {args.archive} into {sink.name}...")
+    started = time.monotonic()
+    try:
+        results = restore_archive(sink, args.archive, args.tables, args.prefix,
+                                  args.batch_size, args.table_workers, args.batch_workers)
+        elapsed = time.monotonic() - started
+        if not results:
+            print("❌ No restorable table found in the archive")
+            return 1
+        counts_ok = verify_counts(sink, results)
+        if args.benchmark:
+            print_benchmark(sink, results, elapsed)
+    finally:
+        sink.close()
+
+    failed = any(s['errors'] for s in results.values())
+    print(f"\n{'✅ Restore completed' if not failed and counts_ok else '⚠️  Restore finished with errors'}")
+    return 0 if not failed and counts_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
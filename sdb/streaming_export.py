@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Streaming, paginated table export for SDB backups
+
+- Supabase tables are read with keyset pagination (order by id, id > last id),
+  so exports are not capped by the PostgREST row limit
+- Rows are written page by page straight into a compressed ZIP entry: no
+  temporary CSV files, memory bounded by a few pages whatever the table size
+- Output formats: csv, ndjson, parquet (parquet needs pyarrow)
+- Tables are fetched in parallel (bounded prefetch per table) while the
+  archive entries are written one after the other
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import queue
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_WORKERS = 4
+PREFETCH_PAGES = 2
+FORMATS = ('csv', 'ndjson', 'parquet')
+
+SUPABASE_TABLES = ['inscriptions', 'catechumenes', 'classes', 'annees_scolaires', 'paroisses']
+
+# Baserow tables kept in the combined backup (table_id, name)
+BASEROW_TABLES = [
+    (574, "inscriptions"),
+    (575, "catechumenes"),
+    (577, "classes"),
+    (578, "annees_scolaires"),
+    (579, "paroisses"),
+]
+
+
+# ---------------------------------------------------------------------------
+# Row sources (generators of pages)
+# ---------------------------------------------------------------------------
+
+def iter_supabase_pages(supabase, table: str, page_size: int = DEFAULT_PAGE_SIZE,
+                        key: str = 'id') -> Iterator[List[Dict[str, Any]]]:
+    """Yield pages of a Supabase table using keyset pagination on `key`"""
+    last = None
+    while True:
+        query = supabase.table(table).select('*').order(key).limit(page_size)
+        if last is not None:
+            query = query.gt(key, last)
+        rows = query.execute().data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1][key]
+
+
+def flatten_baserow_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Link/select fields ([{'id':..,'value':..}]) -> their first value, as in the CSV backups"""
+    cleaned = {}
+    for key, value in row.items():
+        if isinstance(value, list) and value:
+            if isinstance(value[0], dict) and 'value' in value[0]:
+                cleaned[key] = value[0]['value']
+            else:
+                cleaned[key] = str(value)
+        elif isinstance(value, list):
+            cleaned[key] = ''
+        else:
+            cleaned[key] = value
+    return cleaned
+
+
+def iter_baserow_pages(baserow, table_id: int) -> Iterator[List[Dict[str, Any]]]:
+    """Yield flattened pages of a Baserow table"""
+    page = 1
+    while True:
+        data = baserow.fetch_page(table_id, page)
+        rows = data.get('results', [])
+        if rows:
+            yield [flatten_baserow_row(row) for row in rows]
+        if not data.get('next'):
+            return
+        page += 1
+
+
+# ---------------------------------------------------------------------------
+# Writers (consume pages, write to a binary stream)
+# ---------------------------------------------------------------------------
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def write_csv(stream, pages: Iterable[List[Dict[str, Any]]]) -> int:
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    writer = None
+    count = 0
+    for rows in pages:
+        if writer is None:
+            fieldnames = sorted({key for row in rows for key in row})
+            writer = csv.DictWriter(text, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+        for row in rows:
+            writer.writerow({k: json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
+                             for k, v in row.items()})
+        count += len(rows)
+    text.flush()
+    text.detach()
+    return count
+
+
+def write_ndjson(stream, pages: Iterable[List[Dict[str, Any]]]) -> int:
+    count = 0
+    for rows in pages:
+        chunk = ''.join(json.dumps(row, ensure_ascii=False, default=_json_default) + '\n' for row in rows)
+        stream.write(chunk.encode('utf-8'))
+        count += len(rows)
+    return count
+
+
+def _parquet_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Nested JSON values are stored as JSON text
+    return [{k: json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v for k, v in row.items()}
+            for row in rows]
+
+
+def write_parquet(stream, pages: Iterable[List[Dict[str, Any]]]) -> int:
+    """One row group per page; the schema comes from the first page (all-null columns -> string)"""
+    if pa is None:
+        raise RuntimeError("pyarrow is required for parquet output (pip install pyarrow)")
+    writer = None
+    schema = None
+    text_columns = set()
+    count = 0
+    try:
+        for rows in pages:
+            rows = _parquet_rows(rows)
+            if writer is None:
+                inferred = pa.Table.from_pylist(rows).schema
+                text_columns = {f.name for f in inferred if pa.types.is_null(f.type)}
+                schema = pa.schema([pa.field(f.name, pa.string()) if f.name in text_columns else f for f in inferred])
+                writer = pq.ParquetWriter(stream, schema, compression='zstd')
+            if text_columns:
+                rows = [{k: str(v) if k in text_columns and v is not None else v for k, v in row.items()}
+                        for row in rows]
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            count += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+WRITERS: Dict[str, Callable[[Any, Iterable[List[Dict[str, Any]]]], int]] = {
+    'csv': write_csv,
+    'ndjson': write_ndjson,
+    'parquet': write_parquet,
+}
+
+
+# ---------------------------------------------------------------------------
+# Archive export
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ExportJob:
+    """One archive entry: a name and a factory returning an iterator of pages"""
+    name: str
+    pages: Callable[[], Iterator[List[Dict[str, Any]]]]
+
+
+_DONE = object()
+
+
+class _Prefetcher:
+    """Runs a page iterator in a worker thread behind a small bounded queue"""
+
+    def __init__(self, job: ExportJob, depth: int = PREFETCH_PAGES):
+        self.job = job
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+
+    def run(self) -> None:
+        try:
+            for rows in self.job.pages():
+                self.queue.put(rows)
+        except Exception as e:
+            self.queue.put(e)
+        self.queue.put(_DONE)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+def export_to_zip(jobs: List[ExportJob], zip_path: str, fmt: str = 'csv',
+                  workers: int = DEFAULT_WORKERS) -> Dict[str, Dict[str, Any]]:
+    """
+    Stream every job into its own entry of a ZIP archive
+
+    Up to `workers` tables are fetched concurrently; each keeps at most
+    PREFETCH_PAGES pages in memory while waiting for its turn to be written.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown format {fmt}, expected one of {FORMATS}")
+    write = WRITERS[fmt]
+    # Parquet pages are already compressed internally
+    compression = zipfile.ZIP_STORED if fmt == 'parquet' else zipfile.ZIP_DEFLATED
+    stats: Dict[str, Dict[str, Any]] = {}
+
+    prefetchers = [_Prefetcher(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool, \
+            zipfile.ZipFile(zip_path, 'w', compression) as zipf:
+        for prefetcher in prefetchers:
+            pool.submit(prefetcher.run)
+
+        for prefetcher in prefetchers:
+            entry = f"{prefetcher.job.name}.{fmt}"
+            started = time.monotonic()
+            try:
+                with zipf.open(entry, 'w', force_zip64=True) as stream:
+                    rows = write(stream, prefetcher)
+                info = zipf.getinfo(entry)
+                stats[prefetcher.job.name] = {
+                    'rows': rows,
+                    'bytes': info.file_size,
+                    'compressed_bytes': info.compress_size,
+                    'seconds': round(time.monotonic() - started, 2),
+                }
+                print(f"  ✅ {entry}: {rows:,} rows ({info.file_size:,} bytes)")
+            except Exception as e:
+                # Drain the failed source so its worker thread can finish
+                for _ in prefetcher:
+                    pass
+                stats[prefetcher.job.name] = {'rows': 0, 'error': str(e)}
+                print(f"  ❌ {entry}: {e}")
+    return stats
+
+
+def supabase_jobs(supabase, tables: List[str], page_size: int = DEFAULT_PAGE_SIZE,
+                  prefix: str = '') -> List[ExportJob]:
+    return [
+        ExportJob(f"{prefix}{table}", lambda table=table: iter_supabase_pages(supabase, table, page_size))
+        for table in tables
+    ]
+
+
+def baserow_jobs(baserow, tables=BASEROW_TABLES, prefix: str = 'baserow_') -> List[ExportJob]:
+    return [
+        ExportJob(f"{prefix}{name}", lambda table_id=table_id: iter_baserow_pages(baserow, table_id))
+        for table_id, name in tables
+    ]
+
+
+def print_summary(zip_path: str, stats: Dict[str, Dict[str, Any]]) -> None:
+    zip_size = os.path.getsize(zip_path)
+    raw_size = sum(s.get('bytes', 0) for s in stats.values())
+    print(f"📁 Archive: {zip_path}")
+    print(f"💾 Archive size: {zip_size:,} bytes ({zip_size/1024/1024:.1f} MB)")
+    if raw_size:
+        print(f"📊 Original data size: {raw_size:,} bytes ({raw_size/1024/1024:.1f} MB)")
+        print(f"🗜️  Compression ratio: {(1-zip_size/raw_size)*100:.1f}%")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Streaming export of SDB tables into a ZIP archive")
+    parser.add_argument('--tables', nargs='*', default=SUPABASE_TABLES, help="Supabase tables to export")
+    parser.add_argument('--baserow', action='store_true', help="Also export the Baserow tables (baserow_*)")
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Tables fetched concurrently")
+    parser.add_argument('--output', help="Archive path (default: supabase_backup_<timestamp>.zip)")
+    args = parser.parse_args(argv)
+
+    from supabase_config import get_supabase_anon_client
+
+    jobs = supabase_jobs(get_supabase_anon_client(), args.tables, args.page_size)
+    if args.baserow:
+        from migration_engine import BaserowClient
+        jobs += baserow_jobs(BaserowClient())
+
+    output = args.output or f"supabase_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    print(f"📦 Exporting {len(jobs)} tables to {output} ({args.format})...")
+    stats = export_to_zip(jobs, output, args.format, args.workers)
+    print_summary(output, stats)
+    return 1 if any('error' in s for s in stats.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,4 +24,6 @@ echo ""
 echo "Pour utiliser rclone:"
 echo "1. Lister les fichiers: rclone ls gdrive:"
 echo "2. Synchroniser un dossier: rclone sync /path/to/local gdrive:backup"
-echo "3. Copier des fichiers: rclone copy /path/to/file gdrive:backup/"
\ No newline at end of file
+echo "3. Copier des fichiers: rclone copy /path/to/file gdrive:backup/"
+echo "4. Sauvegarde incrémentale SDB (seuls les nouveaux blocs sont envoyés):"
+echo "   cd sdb && python incremental_backup.py backup --rclone-remote gdrive:sdb-backup"
\ No newline at end of file
@@ -2,11 +2,14 @@
 Admin endpoints for WhatsApp AI Concierge Service
 """
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from src.utils.config import get_settings
+from src.services.name_search_service import KINDS, get_name_search_service
+from src.services.family_service import get_family_service
 from datetime import datetime, timedelta
 import structlog
 
@@ -177,4 +180,43 @@ async def get_detailed_health(
 
     except Exception as e:
         logger.error("detailed_health_error", error=str(e))
-        raise HTTPException(status_code=500, detail="Failed to retrieve health information")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to retrieve health information")
+
+@admin_router.get("/admin/search/people")
+async def search_people(
+    q: str,
+    kind: Optional[str] = None,
+    limit: int = 5,
+    authenticated: bool = Depends(verify_admin_token),
+):
+    """
+    Fuzzy, accent-insensitive search of catechumens and parents by name
+    """
+    if kind is not None and kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(KINDS)}")
+    try:
+        results = await asyncio.to_thread(get_name_search_service().search, q, kind, min(max(limit, 1), 50))
+        return {"query": q, "count": len(results), "results": results}
+
+    except Exception as e:
+        logger.error("admin_search_people_error", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to search people")
+
+
+@admin_router.get("/admin/family/{phone_number}")
+async def get_family(
+    phone_number: str,
+    authenticated: bool = Depends(verify_admin_token),
+):
+    """
+    Parent, children and current inscriptions registered under a phone number
+    """
+    try:
+        family = await asyncio.to_thread(get_family_service().get_family_by_phone, phone_number)
+    except Exception as e:
+        logger.error("admin_get_family_error", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to look up family")
+
+    if family is None:
+        raise HTTPException(status_code=404, detail="No parent registered with this phone number")
+    return family
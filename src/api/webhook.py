@@ -6,6 +6,9 @@ from fastapi import APIRouter, Request, HTTPException, Depends, Query
 from fastapi.responses import JSONResponse, PlainTextResponse
 from typing import Optional, Dict, Any
 from src.utils.config import Settings, get_settings
+from src.utils.phone import from_whatsapp_id
+from src.utils import tracing
+from src.utils.deadline import deadline_scope
 import structlog
 
 logger = structlog.get_logger()
@@ -20,77 +23,83 @@ async def handle_webhook(
     """
     Handle incoming WhatsApp messages from WAHA
     """
-    try:
-        # Get JSON payload
-        payload = await request.json()
-        logger.info("webhook_payload_received", payload=payload)
-
-        # Basic validation
-        if not isinstance(payload, dict):
-            raise HTTPException(status_code=400, detail="Invalid payload format")
-
-        # Handle WAHA format - check if this is the proper WAHA webhook structure
-        if "event" in payload and "session" in payload and "payload" in payload:
-            # Standard WAHA webhook format
-            event_type = payload.get("event")
-            session_name = payload.get("session")
-            message_data = payload.get("payload")
-
-            logger.info(
-                "waha_webhook_received",
-                event_type=event_type,
-                session=session_name,
-                message_id=message_data.get("id") if message_data else None
-            )
-
-            # Handle different event types
-            if event_type == "message":
-                return await handle_waha_message(message_data, settings, session_name)
-            elif event_type == "message.any":
-                # Handle all message events including our own
-                return await handle_waha_message(message_data, settings, session_name)
-            elif event_type == "message.reaction":
-                return await handle_waha_reaction(message_data, settings, session_name)
-            elif event_type == "message.ack":
-                return await handle_waha_ack(message_data, settings, session_name)
-            elif event_type == "message.revoked":
-                return await handle_waha_revoked(message_data, settings, session_name)
-            else:
-                logger.warning("unsupported_waha_event", event_type=event_type)
-                return {"status": "ignored", "reason": f"Unsupported WAHA event: {event_type}"}
-
-        # Handle legacy/test formats for backward compatibility
-        elif "payload" in payload:
-            # WAHA format with payload wrapper (no event type)
-            message_data = payload["payload"]
-            return await handle_waha_message(message_data, settings, "default")
-        elif "message" in payload:
-            # Direct message format (our test format)
-            return await handle_message(payload, settings)
-        elif "type" in payload:
-            # Alternative format with type at root
-            message_type = payload.get("type")
-            if message_type == "message":
+    # Root span of the message trace (continues the caller's trace if a traceparent is sent),
+    # and the reply deadline every stage below budgets against
+    with tracing.span("webhook", kind="server", traceparent=request.headers.get("traceparent"),
+                      **{"http.route": request.url.path}), \
+            deadline_scope(settings.request_timeout_seconds):
+        try:
+            # Get JSON payload
+            payload = await request.json()
+            logger.debug("webhook_payload_received", payload=payload)
+
+            # Basic validation
+            if not isinstance(payload, dict):
+                raise HTTPException(status_code=400, detail="Invalid payload format")
+
+            # Handle WAHA format - check if this is the proper WAHA webhook structure
+            if "event" in payload and "session" in payload and "payload" in payload:
+                # Standard WAHA webhook format
+                event_type = payload.get("event")
+                session_name = payload.get("session")
+                message_data = payload.get("payload")
+
+                tracing.current_span().set_attribute("waha.event", event_type)
+                logger.info(
+                    "waha_webhook_received",
+                    event_type=event_type,
+                    session=session_name,
+                    message_id=message_data.get("id") if message_data else None
+                )
+
+                # Handle different event types
+                if event_type == "message":
+                    return await handle_waha_message(message_data, settings, session_name)
+                elif event_type == "message.any":
+                    # Handle all message events including our own
+                    return await handle_waha_message(message_data, settings, session_name)
+                elif event_type == "message.reaction":
+                    return await handle_waha_reaction(message_data, settings, session_name)
+                elif event_type == "message.ack":
+                    return await handle_waha_ack(message_data, settings, session_name)
+                elif event_type == "message.revoked":
+                    return await handle_waha_revoked(message_data, settings, session_name)
+                else:
+                    logger.warning("unsupported_waha_event", event_type=event_type)
+                    return {"status": "ignored", "reason": f"Unsupported WAHA event: {event_type}"}
+
+            # Handle legacy/test formats for backward compatibility
+            elif "payload" in payload:
+                # WAHA format with payload wrapper (no event type)
+                message_data = payload["payload"]
+                return await handle_waha_message(message_data, settings, "default")
+            elif "message" in payload:
+                # Direct message format (our test format)
                 return await handle_message(payload, settings)
-            elif message_type in ["text", "audio", "image", "video", "document", "location", "contacts"]:
-                return await handle_waha_message(payload, settings, "default")
-            else:
-                logger.warning("unsupported_message_type", message_type=message_type)
-                return {"status": "ignored", "reason": f"Unsupported type: {message_type}"}
-        else:
-            # Try to extract message from any format
-            if payload.get("from") and (payload.get("text") or payload.get("type")):
-                return await handle_waha_message(payload, settings, "default")
+            elif "type" in payload:
+                # Alternative format with type at root
+                message_type = payload.get("type")
+                if message_type == "message":
+                    return await handle_message(payload, settings)
+                elif message_type in ["text", "audio", "image", "video", "document", "location", "contacts"]:
+                    return await handle_waha_message(payload, settings, "default")
+                else:
+                    logger.warning("unsupported_message_type", message_type=message_type)
+                    return {"status": "ignored", "reason": f"Unsupported type: {message_type}"}
             else:
-                logger.warning("unknown_webhook_format", payload_keys=list(payload.keys()))
-                return {"status": "ignored", "reason": "Unknown webhook format"}
+                # Try to extract message from any format
+                if payload.get("from") and (payload.get("text") or payload.get("type")):
+                    return await handle_waha_message(payload, settings, "default")
+                else:
+                    logger.warning("unknown_webhook_format", payload_keys=list(payload.keys()))
+                    return {"status": "ignored", "reason": "Unknown webhook format"}
 
-    except HTTPException:
-        # Re-raise HTTPExceptions (like validation errors)
-        raise
-    except Exception as e:
-        logger.error("webhook_processing_error", error=str(e), exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        except HTTPException:
+            # Re-raise HTTPExceptions (like validation errors)
+            raise
+        except Exception as e:
+            logger.error("webhook_processing_error", error=str(e), exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
 async def handle_waha_message(message_data: Dict[str, Any], settings: Settings, session_name: str = "default") -> Dict[str, Any]:
@@ -110,17 +119,9 @@ async def handle_waha_message(message_data: Dict[str, Any], settings: Settings,
     has_media = message_data.get("hasMedia", False)
     media = message_data.get("media", {})
 
-    # Clean phone number (remove @c.us or @s.whatsapp.net)
-    if from_number:
-        if "@c.us" in from_number:
-            from_number = from_number.split("@")[0]
-        elif "@s.whatsapp.net" in from_number:
-            from_number = from_number.split("@")[0]
-
-    # Handle WAHA format (numbers without + prefix)
-    if from_number and from_number.isdigit() and len(from_number) >= 8:
-        # Add + prefix for WAHA format numbers
-        from_number = f"+{from_number}"
+    # Clean phone number (remove @c.us or @s.whatsapp.net, + prefix for WAHA digits)
+    if from_number and isinstance(from_number, str):
+        from_number = from_whatsapp_id(from_number)
 
     # Validate phone number
     if not from_number or not isinstance(from_number, str):
@@ -208,7 +209,13 @@ async def handle_waha_message(message_data: Dict[str, Any], settings: Settings,
             message_type=message_type,
             message_id=message_id
         )
-        logger.info("interaction_processed", result=result)
+        logger.info(
+            "interaction_processed",
+            success=result.get("success"),
+            interaction_id=result.get("interaction_id"),
+            service_used=result.get("service_used"),
+            processing_time_ms=result.get("processing_time_ms")
+        )
 
         return {
             "status": "processed",
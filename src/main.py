@@ -3,10 +3,13 @@ WhatsApp AI Concierge Service
 Main FastAPI application entry point
 """
 
+import asyncio
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import structlog
 import uvicorn
 
@@ -16,23 +19,26 @@ from src.api.orchestrate import orchestrate_router
 from src.api.sessions import sessions_router
 from src.api.admin import admin_router
 from src.services.interaction_service import InteractionService
+from src.services.family_service import get_family_service
+from src.services.session_service import listen_for_session_expiry, run_session_expiry
+from src.utils.cache import configure_cache, listen_for_invalidations
+from src.utils.config import get_settings
+from src.utils.logging_config import configure_logging
+from src.utils.tracing import configure_tracing, shutdown_tracing
 
-# Configure structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
-    ],
-    wrapper_class=structlog.stdlib.BoundLogger,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    cache_logger_on_first_use=True,
+# Configure structured logging (level-filtered, sampled, I/O on the log sink thread)
+settings = get_settings()
+log_sink = configure_logging(
+    level=settings.log_level,
+    sample_rates=settings.log_sample_rates,
+    mask_phone_numbers=settings.log_mask_phone_numbers,
+    max_value_chars=settings.log_max_value_chars,
+)
+
+configure_tracing(
+    exporter=settings.tracing_exporter,
+    file_path=settings.tracing_file_path,
+    otlp_endpoint=settings.otlp_endpoint,
 )
 
 logger = structlog.get_logger()
@@ -43,12 +49,41 @@ async def lifespan(app: FastAPI):
     # Initialize services on startup
     interaction_service = InteractionService()
     await interaction_service.initialize_redis()
+    configure_cache(interaction_service.redis_service)
+    await interaction_service.train_intent_router()
+    await interaction_service.build_retrieval_index()
+    await interaction_service.build_name_search_index()
+    get_family_service(interaction_service.supabase)
+    session_expiry = None
+    if settings.session_expiry_interval_seconds > 0:
+        session_expiry = asyncio.create_task(run_session_expiry(
+            interaction_service.session_service,
+            interaction_service.redis_service,
+            settings.session_expiry_interval_seconds
+        ))
+    expiry_listener = None
+    if settings.session_expiry_notifications and interaction_service.redis_service.redis is not None:
+        expiry_listener = asyncio.create_task(listen_for_session_expiry(
+            interaction_service.session_service,
+            interaction_service.redis_service
+        ))
+    cache_invalidations = None
+    if interaction_service.redis_service.redis is not None:
+        cache_invalidations = asyncio.create_task(listen_for_invalidations())
     logger.info("services_initialized")
     
     yield
     
     # Cleanup on shutdown
     logger.info("application_shutdown")
+    if session_expiry is not None:
+        session_expiry.cancel()
+    if expiry_listener is not None:
+        expiry_listener.cancel()
+    if cache_invalidations is not None:
+        cache_invalidations.cancel()
+    shutdown_tracing()  # export pending spans
+    log_sink.stop()  # flush queued log lines
 
 app = FastAPI(
     title="WhatsApp AI Concierge API",
@@ -68,24 +103,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Request logging middleware
+# Request logging middleware: one line per request, no headers or query strings
+QUIET_PATHS = {"/metrics", "/health", "/api/v1/health"}
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.info(
-        "incoming_request",
-        method=request.method,
-        url=str(request.url),
-        headers=dict(request.headers)
-    )
-
+    started = time.perf_counter()
     response = await call_next(request)
-
+    path = request.url.path
     logger.info(
-        "outgoing_response",
+        "http_probe" if path in QUIET_PATHS else "http_request",
+        method=request.method,
+        path=path,
         status_code=response.status_code,
-        headers=dict(response.headers)
+        duration_ms=round((time.perf_counter() - started) * 1000, 2)
     )
-
     return response
 
 # Exception handler
@@ -109,6 +142,11 @@ async def root():
     """Root endpoint"""
     return {"message": "WhatsApp AI Concierge Service", "version": "1.0.0"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (pipeline stages, intents, tokens, dependency latencies)"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     uvicorn.run(
         "src.main:app",
@@ -40,7 +40,7 @@ class InteractionBase(BaseModel):
 
 class InteractionCreate(InteractionBase):
     """Interaction model for creation"""
-    pass
+    processing_time_ms: Optional[int] = Field(None, description="Processing time in milliseconds")
 
 
 class InteractionUpdate(BaseModel):
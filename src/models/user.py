@@ -5,8 +5,7 @@ User data model for WhatsApp AI Concierge Service
 from datetime import datetime
 from typing import Optional, Dict, Any
 from pydantic import BaseModel, Field, validator
-import re
-import phonenumbers
+from src.utils import phone
 
 
 class UserBase(BaseModel):
@@ -47,42 +46,7 @@ class User(UserBase):
     @validator('phone_number')
     def validate_phone_number(cls, v):
         """Validate phone number format"""
-        try:
-            # Handle WhatsApp special numbers (groups, broadcasts, etc.)
-            if v.endswith('@g.us') or v.endswith('@s.whatsapp.net') or v == 'status@broadcast':
-                return v  # Accept WhatsApp special numbers as-is
-
-            # Handle WAHA format (numbers without + prefix)
-            if v.isdigit() and len(v) >= 8:  # Basic phone number without +
-                # Try to parse with common country codes
-                if v.startswith('221'):  # Senegal
-                    parsed_number = phonenumbers.parse(f"+{v}", None)
-                elif v.startswith('1'):  # US/Canada
-                    parsed_number = phonenumbers.parse(f"+{v}", None)
-                elif v.startswith('44'):  # UK
-                    parsed_number = phonenumbers.parse(f"+{v}", None)
-                elif v.startswith('33'):  # France
-                    parsed_number = phonenumbers.parse(f"+{v}", None)
-                else:
-                    # Try parsing as-is first, then with + if that fails
-                    try:
-                        parsed_number = phonenumbers.parse(v, None)
-                    except phonenumbers.NumberParseException:
-                        parsed_number = phonenumbers.parse(f"+{v}", None)
-            else:
-                # Parse phone number with + prefix
-                parsed_number = phonenumbers.parse(v, None)
-
-            # Check if it's a valid number
-            if not phonenumbers.is_valid_number(parsed_number):
-                raise ValueError("Invalid phone number")
-
-            # Return in E.164 format
-            return phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164)
-        except phonenumbers.NumberParseException:
-            raise ValueError("Invalid phone number format")
-        except Exception:
-            raise ValueError("Phone number validation failed")
+        return phone.validate_phone_number(v)
 
     @validator('preferred_language')
     def validate_language(cls, v):
@@ -134,35 +98,7 @@ def validate_phone_number_format(phone_number: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    try:
-        # Handle WhatsApp special numbers (groups, broadcasts, etc.)
-        if phone_number.endswith('@g.us') or phone_number.endswith('@s.whatsapp.net') or phone_number == 'status@broadcast':
-            return True  # Accept WhatsApp special numbers
-
-        # Handle WAHA format (numbers without + prefix)
-        if phone_number.isdigit() and len(phone_number) >= 8:
-            # Try to parse with common country codes
-            if phone_number.startswith('221'):  # Senegal
-                parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-            elif phone_number.startswith('1'):  # US/Canada
-                parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-            elif phone_number.startswith('44'):  # UK
-                parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-            elif phone_number.startswith('33'):  # France
-                parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-            else:
-                # Try parsing as-is first, then with + if that fails
-                try:
-                    parsed_number = phonenumbers.parse(phone_number, None)
-                except phonenumbers.NumberParseException:
-                    parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-        else:
-            # Parse phone number with + prefix
-            parsed_number = phonenumbers.parse(phone_number, None)
-
-        return phonenumbers.is_valid_number(parsed_number)
-    except Exception:
-        return False
+    return phone.is_valid_phone_number(phone_number)
 
 
 def normalize_phone_number(phone_number: str) -> str:
@@ -175,32 +111,4 @@ def normalize_phone_number(phone_number: str) -> str:
     Returns:
         Normalized phone number in E.164 format
     """
-    try:
-        # Handle WhatsApp special numbers (groups, broadcasts, etc.)
-        if phone_number.endswith('@g.us') or phone_number.endswith('@s.whatsapp.net') or phone_number == 'status@broadcast':
-            return phone_number  # Return WhatsApp special numbers as-is
-
-        # Handle WAHA format (numbers without + prefix)
-        if phone_number.isdigit() and len(phone_number) >= 8:
-            # Try to parse with common country codes
-            if phone_number.startswith('221'):  # Senegal
-                parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-            elif phone_number.startswith('1'):  # US/Canada
-                parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-            elif phone_number.startswith('44'):  # UK
-                parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-            elif phone_number.startswith('33'):  # France
-                parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-            else:
-                # Try parsing as-is first, then with + if that fails
-                try:
-                    parsed_number = phonenumbers.parse(phone_number, None)
-                except phonenumbers.NumberParseException:
-                    parsed_number = phonenumbers.parse(f"+{phone_number}", None)
-        else:
-            # Parse phone number with + prefix
-            parsed_number = phonenumbers.parse(phone_number, None)
-
-        return phonenumbers.format_number(parsed_number, phonenumbers.PhoneNumberFormat.E164)
-    except Exception:
-        raise ValueError(f"Cannot normalize phone number: {phone_number}")
\ No newline at end of file
+    return phone.normalize_phone_number(phone_number)
@@ -2,6 +2,7 @@
 Claude AI orchestration service for conversation management and AI processing
 """
 
+import asyncio
 import json
 import httpx
 from typing import Optional, Dict, Any, List, Union
@@ -9,6 +10,10 @@ from datetime import datetime
 from enum import Enum
 from src.utils.config import get_settings
 from src.models.session import SessionStatus
+from src.services.intent_router import get_intent_router
+from src.services.retrieval_service import get_retrieval_service
+from src.utils.deadline import Deadline, call_timeout, within
+from src.utils.metrics import INTENT_CLASSIFICATIONS_TOTAL, PIPELINE_DEGRADATIONS_TOTAL, StageTimer, observe_call, record_claude_usage
 import structlog
 
 logger = structlog.get_logger()
@@ -31,6 +36,8 @@ class ClaudeService:
         self.model = self.settings.claude_model or "claude-3-sonnet-20240229"
         self.max_tokens = self.settings.claude_max_tokens or 1000
         self.temperature = self.settings.claude_temperature or 0.7
+        self.intent_router = get_intent_router() if self.settings.intent_router_enabled else None
+        self.retrieval = get_retrieval_service() if self.settings.retrieval_enabled else None
         
         # Log configuration for debugging (without exposing sensitive data)
         api_key_status = "SET" if self.api_key and self.api_key != "test-key" else "NOT_SET"
@@ -100,11 +107,17 @@ class ClaudeService:
 
             logger.info("claude_message_sent", message_length=len(message), model=self.model)
 
-            response = await self.http_client.post(url, json=payload)
-            response.raise_for_status()
-
-            result = response.json()
-            logger.info("claude_message_received", response_id=result.get('id'))
+            with observe_call("claude", "messages") as call_span:
+                call_span.set_attribute("claude.model", self.model)
+                response = await self.http_client.post(url, json=payload, timeout=call_timeout(60.0))
+                response.raise_for_status()
+                result = response.json()
+                usage = result.get('usage') or {}
+                call_span.set_attribute("claude.input_tokens", usage.get('input_tokens'))
+                call_span.set_attribute("claude.output_tokens", usage.get('output_tokens'))
+
+            record_claude_usage(self.model, result.get('usage'))
+            logger.info("claude_message_received", response_id=result.get('id'), usage=result.get('usage'))
             return result
 
         except httpx.HTTPStatusError as e:
@@ -114,6 +127,26 @@ class ClaudeService:
             logger.error("claude_message_failed", error=str(e))
             raise
 
+    def _retrieved_context(self, message: str, service: str) -> str:
+        """
+        Build the prompt section with the snippets relevant to a message
+
+        Args:
+            message: User message
+            service: Service type whose documents are searched
+
+        Returns:
+            Prompt section, or an empty string when nothing relevant was found
+        """
+        if not self.retrieval:
+            return ""
+        results = self.retrieval.search(message, service=service, k=self.settings.retrieval_top_k)
+        if not results:
+            return ""
+        logger.info("retrieval_context_injected", service=service, documents=[doc["id"] for doc in results])
+        return "\n\nRelevant reference information (use it when it answers the question):\n" + \
+            self.retrieval.format_context(results)
+
     async def classify_user_intent(
         self,
         message: str,
@@ -130,6 +163,14 @@ class ClaudeService:
             Intent classification result
         """
         try:
+            # Obvious intents (menu choices, greetings, confident local model) skip the LLM
+            if self.intent_router:
+                local_result = self.intent_router.classify(message)
+                if local_result:
+                    logger.info("intent_prerouted", intent=local_result["intent"], confidence=local_result["confidence"], source=local_result["source"])
+                    INTENT_CLASSIFICATIONS_TOTAL.labels(intent=local_result["intent"], source=local_result["source"]).inc()
+                    return local_result
+
             system_prompt = """You are an intelligent conversation classifier for a WhatsApp AI concierge service.
 
 Your task is to analyze user messages and classify them into one of the following categories:
@@ -167,6 +208,7 @@ Be precise and thoughtful in your classification. Consider the context and previ
                 try:
                     classification = json.loads(text_content)
                     logger.info("intent_classified", intent=classification.get('intent'), confidence=classification.get('confidence'))
+                    INTENT_CLASSIFICATIONS_TOTAL.labels(intent=str(classification.get('intent')), source="claude").inc()
                     return classification
                 except json.JSONDecodeError:
                     # Fallback to simple parsing
@@ -220,16 +262,10 @@ Your role is to provide information about:
 - Contact information for different parishes
 - General information about the catechism program
 
-Key information to remember:
-- Catechism classes are held on weekends
-- Main locations: Parishes throughout the diocese
-- Registration requires baptism certificate
-- Fees are moderate with payment plans available
-- Age groups: Children (6-12), Teens (13-17), Adults (18+)
-
 Be helpful, informative, and encouraging. If you don't have specific information, guide users to contact the appropriate person.
 
 Always respond in a friendly, professional manner with clear, actionable information."""
+            system_prompt += self._retrieved_context(message, ServiceType.RENSEIGNEMENT.value)
 
             response = await self.send_message(
                 message=message,
@@ -286,6 +322,7 @@ Guidelines:
 - Suggest prayers or reflections when relevant
 
 Always respond with patience, wisdom, and pastoral sensitivity."""
+            system_prompt += self._retrieved_context(message, ServiceType.CATECHESE.value)
 
             response = await self.send_message(
                 message=message,
@@ -362,11 +399,41 @@ Response approach:
             logger.error("contact_humain_response_failed", error=str(e))
             raise
 
+    def degraded_response(self, message: str, intent: str) -> Dict[str, Any]:
+        """
+        Answer without Claude when the generation budget is exhausted
+
+        Args:
+            message: User message
+            intent: Classified intent
+
+        Returns:
+            Service response (knowledge base snippet when one matches well, otherwise
+            a holding message), always flagged for human followup
+        """
+        service = intent if intent in (ServiceType.RENSEIGNEMENT.value, ServiceType.CATECHESE.value) else None
+        results = self.retrieval.search(message, service=service, k=1) if self.retrieval and service else []
+        if results and results[0]["score"] >= self.settings.deadline_fallback_min_score:
+            text = f"{results[0]['text']}\n\nUn membre de l'équipe complètera cette réponse si besoin."
+            source = "knowledge_base"
+        else:
+            text = "Merci pour votre message ! Nous le transmettons à l'équipe, qui vous répondra très rapidement."
+            source = "template"
+        return {
+            "service": intent,
+            "response": {"content": [{"type": "text", "text": text}]},
+            "confidence": 0.3,
+            "requires_human_followup": True,
+            "degraded": source
+        }
+
     async def orchestrate_conversation(
         self,
         message: str,
         session_context: Optional[Dict[str, Any]] = None,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        timer: Optional[StageTimer] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Main orchestration method for handling user conversations
@@ -375,18 +442,34 @@ Response approach:
             message: User message
             session_context: Current session context
             conversation_history: Previous conversation messages
+            timer: Stage timer of the calling pipeline (classify/generate stages)
+            deadline: Reply deadline; each stage gets a budget from the remaining time
 
         Returns:
             Orchestrated response
         """
         try:
             logger.info("conversation_orchestration_started", message_length=len(message))
+            timer = timer or StageTimer()
+            reserve = self.settings.deadline_reply_reserve_seconds
+            degraded = []
 
             # Step 1: Classify user intent
-            intent_result = await self.classify_user_intent(
-                message=message,
-                conversation_history=conversation_history
-            )
+            try:
+                with timer.stage("classify"):
+                    intent_result = await within(
+                        self.classify_user_intent(message=message, conversation_history=conversation_history),
+                        deadline.budget(self.settings.deadline_classify_share, reserve) if deadline else None
+                    )
+            except asyncio.TimeoutError:
+                logger.warning("classify_budget_exhausted", remaining_s=round(deadline.remaining, 2))
+                degraded.append("classify_timeout")
+                intent_result = {
+                    "intent": ServiceType.CONTACT_HUMAIN.value,
+                    "confidence": 0.3,
+                    "reasoning": "Classification budget exhausted",
+                    "extracted_entities": {}
+                }
 
             intent_type = intent_result.get('intent', 'CONTACT_HUMAIN')
             confidence = intent_result.get('confidence', 0.5)
@@ -394,23 +477,24 @@ Response approach:
 
             # Step 2: Generate appropriate response based on intent
             if intent_type == ServiceType.RENSEIGNEMENT.value:
-                response_result = await self.generate_renseignement_response(
-                    message=message,
-                    user_context=extracted_entities,
-                    conversation_history=conversation_history
-                )
+                generate = self.generate_renseignement_response
             elif intent_type == ServiceType.CATECHESE.value:
-                response_result = await self.generate_catechese_response(
-                    message=message,
-                    user_context=extracted_entities,
-                    conversation_history=conversation_history
-                )
+                generate = self.generate_catechese_response
             else:  # CONTACT_HUMAIN
-                response_result = await self.generate_contact_humain_response(
-                    message=message,
-                    user_context=extracted_entities,
-                    conversation_history=conversation_history
-                )
+                generate = self.generate_contact_humain_response
+            try:
+                with timer.stage("generate"):
+                    response_result = await within(
+                        generate(message=message, user_context=extracted_entities, conversation_history=conversation_history),
+                        deadline.budget(1.0, reserve) if deadline else None
+                    )
+            except asyncio.TimeoutError:
+                logger.warning("generate_budget_exhausted", intent=intent_type, remaining_s=round(deadline.remaining, 2))
+                degraded.append("generate_timeout")
+                response_result = self.degraded_response(message, intent_type)
+
+            for reason in degraded:
+                PIPELINE_DEGRADATIONS_TOTAL.labels(reason=reason).inc()
 
             # Step 3: Combine results
             orchestration_result = {
@@ -424,7 +508,8 @@ Response approach:
                     "model_used": self.model,
                     "confidence_score": min(confidence, response_result.get('confidence', 0.5)),
                     "requires_human_followup": response_result.get('requires_human_followup', False),
-                    "extracted_entities": extracted_entities
+                    "extracted_entities": extracted_entities,
+                    "degraded": degraded
                 }
             }
 
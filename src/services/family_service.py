@@ -0,0 +1,187 @@
+"""
+Parent -> children lookup by phone number (WhatsApp sender identification)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from src.utils.config import get_settings
+from src.utils.phone import DEFAULT_COUNTRY_CODE, to_e164
+import structlog
+
+logger = structlog.get_logger()
+
+
+def _phone_pattern(e164: str) -> str:
+    """PostgREST ilike pattern matching the number however it was typed
+
+    The national digits in order with anything between them, so "77 640 85 91",
+    "77-640-85-91" and "+221776408591" all match; callers re-check candidates
+    with to_e164() since the pattern also admits longer numbers.
+    """
+    digits = e164.lstrip("+")
+    if digits.startswith(DEFAULT_COUNTRY_CODE):
+        digits = digits[len(DEFAULT_COUNTRY_CODE):]
+    return "*" + "*".join(digits) + "*"
+
+
+class FamilyService:
+    """Resolve a phone number to its parent, children and current inscriptions
+
+    One get_family_by_phone() RPC over the indexed telephone_e164 columns,
+    results (including misses) kept in a bounded in-process TTL cache. After an
+    RPC failure the tables are queried directly for rpc_retry_seconds.
+    """
+
+    def __init__(self, supabase=None, cache_ttl_seconds: int = 300, cache_size: int = 1024,
+                 rpc_retry_seconds: int = 300):
+        self.supabase = supabase
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_size = cache_size
+        self.rpc_retry_seconds = rpc_retry_seconds
+        self._cache: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._rpc_retry_at = 0.0
+
+    def _cached(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return False, None
+            expires_at, family = entry
+            if expires_at < time.monotonic():
+                del self._cache[key]
+                return False, None
+            self._cache.move_to_end(key)
+            return True, family
+
+    def _store(self, key: str, family: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl_seconds, family)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, phone_number: Optional[str] = None) -> None:
+        """Drop one number (or everything) from the cache after SDB updates"""
+        with self._lock:
+            if phone_number is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(to_e164(phone_number), None)
+
+    def _fetch_rpc(self, e164: str) -> Optional[Dict[str, Any]]:
+        result = self.supabase.rpc("get_family_by_phone", {"p_phone": e164}).execute()
+        return result.data or None
+
+    def _fetch_tables(self, e164: str) -> Optional[Dict[str, Any]]:
+        """Same result without the RPC (schema section 14 not deployed yet)
+
+        The raw telephone columns are matched with a leading-wildcard ilike, which
+        scans parents; acceptable for a fallback, the RPC uses the e164 index.
+        """
+        pattern = _phone_pattern(e164)
+        candidates = (self.supabase.table("parents")
+                      .select("*")
+                      .or_(f"telephone.ilike.{pattern},telephone2.ilike.{pattern}")
+                      .execute()).data or []
+        # Main number first, then the secondary one
+        parents = ([p for p in candidates if to_e164(p.get("telephone")) == e164]
+                   + [p for p in candidates if to_e164(p.get("telephone2")) == e164])
+        if not parents:
+            return None
+        parent = parents[0]
+
+        children = (self.supabase.table("catechumenes")
+                    .select("*")
+                    .eq("code_parent", parent["code_parent"])
+                    .order("prenoms")
+                    .execute()).data or []
+        ids = [child["id_catechumene"] for child in children]
+        inscriptions = (self.supabase.table("inscriptions")
+                        .select("*, classes!id_classe_courante(classe_nom), annees_scolaires(annee_nom, active)")
+                        .in_("id_catechumene", ids)
+                        .order("date_inscription", desc=True)
+                        .execute()).data if ids else []
+
+        current: Dict[str, Dict[str, Any]] = {}
+        for inscription in inscriptions or []:
+            classe = inscription.pop("classes", None) or {}
+            annee = inscription.pop("annees_scolaires", None) or {}
+            inscription["classe_nom"] = classe.get("classe_nom")
+            inscription["annee_nom"] = annee.get("annee_nom")
+            best = current.get(inscription["id_catechumene"])
+            # Active year first, then the most recent (rows come newest first)
+            if best is None or (annee.get("active") and not best.get("_active")):
+                current[inscription["id_catechumene"]] = {**inscription, "_active": bool(annee.get("active"))}
+
+        for child in children:
+            inscription = current.get(child["id_catechumene"])
+            if inscription:
+                inscription.pop("_active", None)
+            child["inscription"] = inscription
+        return {"parent": parent, "children": children}
+
+    def get_family_by_phone(self, phone_number: str) -> Optional[Dict[str, Any]]:
+        """
+        Parent, children and current inscriptions for a phone number
+
+        Args:
+            phone_number: Any form (WAHA chat id, national, E.164)
+
+        Returns:
+            {"parent": {...}, "children": [{..., "inscription": {...} | None}]}
+            or None when no parent has this number
+        """
+        e164 = to_e164(phone_number)
+        if e164 is None or self.supabase is None:
+            return None
+
+        hit, family = self._cached(e164)
+        if hit:
+            return family
+
+        started = time.perf_counter()
+        source = "rpc"
+        use_tables = time.monotonic() < self._rpc_retry_at
+        try:
+            if not use_tables:
+                try:
+                    family = self._fetch_rpc(e164)
+                except Exception as e:
+                    # Function not deployed or database hiccup: query the tables for a while
+                    logger.warning("family_rpc_unavailable", error=str(e))
+                    self._rpc_retry_at = time.monotonic() + self.rpc_retry_seconds
+                    use_tables = True
+            if use_tables:
+                source = "tables"
+                family = self._fetch_tables(e164)
+        except Exception as e:
+            logger.error("family_lookup_failed", phone_number=e164, error=str(e))
+            return None
+
+        self._store(e164, family)
+        logger.info("family_lookup_completed", source=source, found=family is not None,
+                    children=len(family["children"]) if family else 0,
+                    elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+        return family
+
+
+# Global family service instance
+_family_service = None
+
+
+def get_family_service(supabase=None) -> FamilyService:
+    """Get family service instance"""
+    global _family_service
+    if _family_service is None:
+        settings = get_settings()
+        _family_service = FamilyService(
+            supabase=supabase,
+            cache_ttl_seconds=settings.family_cache_ttl_seconds,
+            cache_size=settings.family_cache_size,
+        )
+    elif supabase is not None and _family_service.supabase is None:
+        _family_service.supabase = supabase
+    return _family_service
@@ -0,0 +1,263 @@
+"""
+Local intent pre-router that answers obvious intents without calling Claude
+"""
+
+import math
+from collections import Counter
+from typing import Optional, Dict, Any, List, Tuple
+from src.models.service import ServiceType
+from src.utils.config import get_settings
+from src.utils.text import normalize_text, tokenize
+import structlog
+
+logger = structlog.get_logger()
+
+# Menu order used by InteractionService.send_service_menu
+MENU_CHOICES = {
+    "1": ServiceType.RENSEIGNEMENT.value,
+    "2": ServiceType.CATECHESE.value,
+    "3": ServiceType.CONTACT_HUMAIN.value,
+    "renseignement": ServiceType.RENSEIGNEMENT.value,
+    "catechese": ServiceType.CATECHESE.value,
+    "contact": ServiceType.CONTACT_HUMAIN.value,
+}
+
+# Same shortcuts as session_manager / auto_reply_config
+GREETING_KEYWORDS = {"bonjour", "bsr", "bonsoir", "salut", "hello", "hi", "hey", "coucou"}
+MENU_KEYWORDS = {"menu", "catalogue", "catalog", "help", "aide", "start"}
+THANKS_KEYWORDS = {"merci", "thanks", "thank", "jerejef"}
+HUMAN_KEYWORDS = {"humain", "agent", "conseiller", "james", "urgence", "urgent"}
+# Words that may surround a greeting or thanks without adding a request
+FILLER_WORDS = {
+    "svp", "stp", "s", "il", "vous", "te", "plait", "beaucoup", "bien", "a", "tous", "tout", "le", "monde",
+    "ok", "oui", "bonne", "journee", "soiree", "nuit", "encore", "mon", "ma", "cher", "chere",
+}
+INFO_KEYWORDS = {
+    "inscription", "inscrire", "inscriptions", "horaire", "horaires",
+    "lieu", "lieux", "document", "documents", "tarif", "tarifs", "prix", "frais",
+}
+
+# Messages longer than this are never answered by rules alone
+MAX_RULE_TOKENS = 4
+
+
+class TfidfLogisticModel:
+    """Tiny multinomial logistic regression over TF-IDF unigram/bigram features
+
+    Pure Python on purpose: the training set (past interactions) is a few
+    thousand short WhatsApp messages, so numpy/scikit-learn would only add
+    deployment weight.
+    """
+
+    def __init__(self, epochs: int = 15, learning_rate: float = 0.5, l2: float = 1e-4):
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.labels: List[str] = []
+        self.idf: Dict[str, float] = {}
+        self.weights: Dict[str, Dict[str, float]] = {}
+        self.bias: Dict[str, float] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.labels)
+
+    @staticmethod
+    def _features(tokens: List[str]) -> List[str]:
+        return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+    def _vectorize(self, features: List[str]) -> Dict[str, float]:
+        counts = Counter(f for f in features if f in self.idf)
+        vector = {f: (1.0 + math.log(c)) * self.idf[f] for f, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        if norm:
+            vector = {f: v / norm for f, v in vector.items()}
+        return vector
+
+    def fit(self, samples: List[Tuple[str, str]]) -> "TfidfLogisticModel":
+        """
+        Train the model
+
+        Args:
+            samples: List of (message, intent) pairs
+        """
+        documents = [(self._features(tokenize(text)), label) for text, label in samples]
+        documents = [(features, label) for features, label in documents if features]
+
+        doc_freq: Counter = Counter()
+        for features, _ in documents:
+            doc_freq.update(set(features))
+        n_docs = len(documents)
+        self.idf = {f: math.log((1 + n_docs) / (1 + df)) + 1.0 for f, df in doc_freq.items()}
+
+        self.labels = sorted({label for _, label in documents})
+        self.weights = {label: {} for label in self.labels}
+        self.bias = {label: 0.0 for label in self.labels}
+
+        vectors = [(self._vectorize(features), label) for features, label in documents]
+
+        for epoch in range(self.epochs):
+            rate = self.learning_rate / (1.0 + epoch)
+            for vector, label in vectors:
+                probabilities = self._softmax(vector)
+                for candidate in self.labels:
+                    gradient = probabilities[candidate] - (1.0 if candidate == label else 0.0)
+                    weights = self.weights[candidate]
+                    for feature, value in vector.items():
+                        current = weights.get(feature, 0.0)
+                        weights[feature] = current - rate * (gradient * value + self.l2 * current)
+                    self.bias[candidate] -= rate * gradient
+
+        logger.info("intent_model_trained", samples=n_docs, labels=self.labels, vocabulary=len(self.idf))
+        return self
+
+    def _softmax(self, vector: Dict[str, float]) -> Dict[str, float]:
+        scores = {
+            label: self.bias[label] + sum(self.weights[label].get(f, 0.0) * v for f, v in vector.items())
+            for label in self.labels
+        }
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exps.values())
+        return {label: value / total for label, value in exps.items()}
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Predict the intent of a message
+
+        Returns:
+            (intent, probability) or None if the model is untrained or the
+            message has no known vocabulary
+        """
+        if not self.is_trained:
+            return None
+        vector = self._vectorize(self._features(tokenize(text)))
+        if not vector:
+            return None
+        probabilities = self._softmax(vector)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+
+class IntentPreRouter:
+    """Deterministic rules plus a local model in front of ClaudeService.classify_user_intent"""
+
+    def __init__(self, min_confidence: float = 0.85, model: Optional[TfidfLogisticModel] = None):
+        self.min_confidence = min_confidence
+        self.model = model or TfidfLogisticModel()
+
+    def _result(self, intent: str, confidence: float, reasoning: str, source: str) -> Dict[str, Any]:
+        return {
+            "intent": intent,
+            "confidence": round(confidence, 3),
+            "reasoning": reasoning,
+            "extracted_entities": {},
+            "source": source,
+        }
+
+    def classify_by_rules(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify short, unambiguous messages (menu choices, greetings, thanks)
+
+        Args:
+            message: User message
+
+        Returns:
+            Classification dict or None when no rule applies
+        """
+        normalized = normalize_text(message)
+        if normalized in MENU_CHOICES:
+            return self._result(MENU_CHOICES[normalized], 0.99, f"Menu choice '{normalized}'", "rules")
+
+        tokens = tokenize(message)
+        if not tokens or len(tokens) > MAX_RULE_TOKENS:
+            return None
+        token_set = set(tokens)
+
+        if token_set & HUMAN_KEYWORDS:
+            return self._result(ServiceType.CONTACT_HUMAIN.value, 0.95, "Human contact keyword", "rules")
+        if token_set & INFO_KEYWORDS:
+            return self._result(ServiceType.RENSEIGNEMENT.value, 0.9, "Information keyword", "rules")
+        # Only when nothing else is asked: "bonjour, une prière svp" goes to the model or Claude
+        courtesy = GREETING_KEYWORDS | MENU_KEYWORDS | THANKS_KEYWORDS
+        if token_set & courtesy and token_set <= courtesy | FILLER_WORDS:
+            return self._result(ServiceType.RENSEIGNEMENT.value, 0.95, "Greeting, menu or thanks", "rules")
+        return None
+
+    def classify(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Classify a message locally
+
+        Args:
+            message: User message
+
+        Returns:
+            Classification dict (same shape as ClaudeService.classify_user_intent)
+            when confidence reaches min_confidence, None otherwise
+        """
+        result = self.classify_by_rules(message)
+        if result is None:
+            prediction = self.model.predict(message)
+            if prediction is not None:
+                intent, probability = prediction
+                result = self._result(intent, probability, "Local TF-IDF model", "model")
+
+        if result is None or result["confidence"] < self.min_confidence:
+            return None
+        return result
+
+    def train(self, samples: List[Tuple[str, str]], min_samples: int = 30) -> bool:
+        """
+        Train the local model from labelled messages
+
+        Args:
+            samples: List of (message, intent) pairs
+            min_samples: Minimum number of samples required to train
+
+        Returns:
+            True if a new model was trained
+        """
+        valid_intents = {s.value for s in ServiceType}
+        samples = [(text, intent) for text, intent in samples if text and intent in valid_intents]
+        if len(samples) < min_samples or len({intent for _, intent in samples}) < 2:
+            logger.info("intent_model_training_skipped", samples=len(samples))
+            return False
+        self.model = TfidfLogisticModel().fit(samples)
+        return True
+
+    def train_from_supabase(self, supabase, limit: int = 5000, min_confidence: float = 0.8) -> bool:
+        """
+        Train from the interactions history (confident past classifications only)
+
+        Args:
+            supabase: Supabase client
+            limit: Maximum number of interactions to load
+            min_confidence: Minimum stored confidence_score for a training sample
+        """
+        try:
+            response = (
+                supabase.table("interactions")
+                .select("user_message, service")
+                .gte("confidence_score", min_confidence)
+                .order("created_at", desc=True)
+                .limit(limit)
+                .execute()
+            )
+            samples = [(row.get("user_message"), row.get("service")) for row in response.data or []]
+            return self.train(samples)
+        except Exception as e:
+            logger.error("intent_model_training_failed", error=str(e))
+            return False
+
+
+# Global pre-router instance (shared by the per-request ClaudeService objects)
+_intent_router = None
+
+
+def get_intent_router() -> IntentPreRouter:
+    """Get intent pre-router instance"""
+    global _intent_router
+    if _intent_router is None:
+        settings = get_settings()
+        _intent_router = IntentPreRouter(min_confidence=settings.intent_router_min_confidence)
+    return _intent_router
@@ -2,6 +2,7 @@
 Interaction service for managing conversation interactions and orchestrating conversation flow
 """
 
+import asyncio
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from supabase import Client
@@ -10,10 +11,13 @@ from src.models.session import Session
 from src.models.user import User
 from src.services.user_service import UserService
 from src.services.session_service import SessionService
-from src.services.redis_service import RedisService
+from src.services.redis_service import RedisBatch, RedisService
 from src.services.waha_service import WAHAService
 from src.services.claude_service import ClaudeService, ServiceType
 from src.utils.config import get_settings
+from src.utils.deadline import Deadline, activate_deadline, current_deadline, deactivate_deadline, within
+from src.utils.metrics import MESSAGES_TOTAL, PIPELINE_DEGRADATIONS_TOTAL, StageTimer, instrument_supabase
+from src.utils.tracing import current_trace_id
 import structlog
 
 logger = structlog.get_logger()
@@ -36,15 +40,41 @@ class InteractionService:
         """Initialize Redis connection"""
         await self.redis_service.initialize()
 
+    async def train_intent_router(self) -> bool:
+        """Train the local intent pre-router from the interactions history"""
+        if not self.supabase or not self.claude_service.intent_router:
+            return False
+        return await asyncio.to_thread(
+            self.claude_service.intent_router.train_from_supabase,
+            self.supabase,
+            self.settings.intent_router_training_limit
+        )
+
+    async def build_retrieval_index(self) -> int:
+        """Build the local retrieval index (curated corpus plus services catalog)"""
+        if not self.claude_service.retrieval:
+            return 0
+        return await asyncio.to_thread(self.claude_service.retrieval.build, self.supabase)
+
+    async def build_name_search_index(self) -> int:
+        """Warm the local fallback index of the fuzzy name search"""
+        from src.services.name_search_service import get_name_search_service
+        return await asyncio.to_thread(get_name_search_service(self.supabase).build_index)
+
+    async def get_family(self, phone_number: str) -> Optional[Dict[str, Any]]:
+        """Parent, children and current inscriptions for a WhatsApp number"""
+        from src.services.family_service import get_family_service
+        return await asyncio.to_thread(get_family_service(self.supabase).get_family_by_phone, phone_number)
+
     def _initialize_supabase(self):
         """Initialize Supabase client"""
         try:
             from supabase import create_client
             # Initialize Supabase with minimal parameters to avoid proxy issues
-            self.supabase = create_client(
+            self.supabase = instrument_supabase(create_client(
                 self.settings.supabase_url,
                 self.settings.supabase_service_role_key
-            )
+            ))
             logger.info("supabase_client_initialized")
         except Exception as e:
             logger.error("supabase_initialization_failed", error=str(e))
@@ -83,6 +113,7 @@ class InteractionService:
                 "interaction_type": interaction_data.interaction_type.value if isinstance(interaction_data.interaction_type, str) else interaction_data.interaction_type,
                 "message_type": interaction_data.message_type.value if isinstance(interaction_data.message_type, str) else interaction_data.message_type,
                 "confidence_score": interaction_data.confidence_score,
+                "processing_time_ms": interaction_data.processing_time_ms,
                 "metadata": interaction_data.metadata or {},
                 "created_at": datetime.now().isoformat(),
                 "updated_at": datetime.now().isoformat()
@@ -107,7 +138,7 @@ class InteractionService:
                     language_detected=None,
                     intent_detected=None,
                     sentiment_score=None,
-                    processing_time_ms=None
+                    processing_time_ms=interaction_data.processing_time_ms
                 )
 
                 # Add phone number from user
@@ -494,7 +525,8 @@ class InteractionService:
         message: str,
         message_type: str = "text",
         message_id: Optional[str] = None,
-        quoted_message_id: Optional[str] = None
+        quoted_message_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Process incoming message from WhatsApp
@@ -505,10 +537,16 @@ class InteractionService:
             message_type: Type of message (text, image, etc.)
             message_id: WhatsApp message ID
             quoted_message_id: ID of quoted message (if any)
+            deadline: Reply deadline set at ingress (default: the current one, or
+                request_timeout_seconds from now)
 
         Returns:
             Processing result
         """
+        timer = StageTimer()
+        deadline = deadline or current_deadline() or Deadline(self.settings.request_timeout_seconds)
+        deadline_token = activate_deadline(deadline)
+        emergency_task = None
         try:
             logger.info(
                 "processing_incoming_message",
@@ -518,83 +556,114 @@ class InteractionService:
             )
 
             # Rate limiting check
-            rate_limit_result = await self._check_rate_limit(phone_number)
+            with timer.stage("rate_limit"):
+                rate_limit_result = await self._check_rate_limit(phone_number)
             if not rate_limit_result.get('allowed', True):
                 logger.warning("rate_limit_exceeded", phone_number=phone_number)
+                timer.finish("rate_limited")
                 return {
                     "success": False,
                     "error": "Rate limit exceeded",
                     "retry_after": rate_limit_result.get('reset_time', 0)
                 }
 
-            # Get or create user
-            user = await self.user_service.get_or_create_user(phone_number)
+            with timer.stage("user_session"):
+                # Get or create user
+                user = await self.user_service.get_or_create_user(phone_number)
 
-            # Get or create session
-            session = await self.session_service.create_or_get_session(user.id)
+                # Get or create session
+                session = await self.session_service.create_or_get_session(user.id)
+
+            # Identify the sender as an SDB parent (indexed phone lookup, cached)
+            with timer.stage("family_lookup"):
+                family = await self.get_family(phone_number)
+            parent_code = family["parent"].get("code_parent") if family else None
 
             # Get conversation history
-            conversation_history = await self._get_conversation_history(session.id)
+            with timer.stage("history"):
+                conversation_history = await self._get_conversation_history(session.id)
 
-            # Process with Claude AI
-            orchestration_result = await self.claude_service.orchestrate_conversation(
+            # The emergency check runs alongside the orchestration (independent Claude call)
+            emergency_task = asyncio.create_task(self.claude_service.detect_emergency_situations(
                 message=message,
-                session_context={"session_id": session.id, "user_id": user.id},
                 conversation_history=conversation_history
-            )
+            ))
 
-            # Check for emergency situations
-            emergency_result = await self.claude_service.detect_emergency_situations(
+            # Process with Claude AI (classify and generate stages, budgeted by the deadline)
+            orchestration_result = await self.claude_service.orchestrate_conversation(
                 message=message,
-                conversation_history=conversation_history
+                session_context={"session_id": session.id, "user_id": user.id, "parent_code": parent_code},
+                conversation_history=conversation_history,
+                timer=timer,
+                deadline=deadline
             )
+            degraded = list(orchestration_result.get('processing_metadata', {}).get('degraded', []))
+
+            # Check for emergency situations (skipped when the budget is gone)
+            with timer.stage("emergency"):
+                emergency_result = await self._await_emergency_check(emergency_task, deadline)
+            if emergency_result.get('skipped'):
+                degraded.append("emergency_skipped")
+                PIPELINE_DEGRADATIONS_TOTAL.labels(reason="emergency_skipped").inc()
 
             # Generate response
             response_text = self._extract_response_text(orchestration_result)
             requires_human_followup = orchestration_result.get('processing_metadata', {}).get('requires_human_followup', False)
+            intent = str(orchestration_result.get('intent_classification', {}).get('intent', ServiceType.CONTACT_HUMAIN.value))
+            service_used = str(orchestration_result.get('service_response', {}).get('service', ServiceType.CONTACT_HUMAIN))
 
             # Send response via WhatsApp
-            if response_text and not emergency_result.get('requires_immediate_action', False):
-                wa_response = await self.waha_service.send_text_message(
-                    phone_number=phone_number,
-                    message=response_text,
-                    quoted_message_id=message_id
+            with timer.stage("waha_send"):
+                if response_text and not emergency_result.get('requires_immediate_action', False):
+                    wa_response = await self.waha_service.send_text_message(
+                        phone_number=phone_number,
+                        message=response_text,
+                        quoted_message_id=message_id
+                    )
+                else:
+                    wa_response = {"id": "emergency_no_response"}
+
+            with timer.stage("persistence"):
+                # Create interaction record (timings up to the WhatsApp send)
+                interaction_data = InteractionCreate(
+                    session_id=session.id,
+                    user_id=user.id,
+                    user_message=message,
+                    assistant_response=response_text,
+                    service=service_used,
+                    interaction_type=InteractionType.MESSAGE,
+                    message_type=MessageType.TEXT,
+                    confidence_score=orchestration_result.get('processing_metadata', {}).get('confidence_score', 0.5),
+                    processing_time_ms=timer.elapsed_ms,
+                    metadata={
+                        "message_type": message_type,
+                        "message_id": message_id,
+                        "quoted_message_id": quoted_message_id,
+                        "wa_response_id": wa_response.get('id'),
+                        "orchestration_result": orchestration_result,
+                        "emergency_detected": emergency_result.get('is_emergency', False),
+                        "requires_human_followup": requires_human_followup,
+                        "parent_code": parent_code,
+                        "stage_timings_ms": dict(timer.timings_ms),
+                        "trace_id": current_trace_id(),
+                        "degraded": degraded
+                    }
                 )
-            else:
-                wa_response = {"id": "emergency_no_response"}
-
-            # Create interaction record
-            interaction_data = InteractionCreate(
-                session_id=session.id,
-                user_id=user.id,
-                user_message=message,
-                assistant_response=response_text,
-                service=str(orchestration_result.get('service_response', {}).get('service', ServiceType.CONTACT_HUMAIN)),
-                interaction_type=InteractionType.MESSAGE,
-                message_type=MessageType.TEXT,
-                confidence_score=orchestration_result.get('processing_metadata', {}).get('confidence_score', 0.5),
-                metadata={
-                    "message_type": message_type,
-                    "message_id": message_id,
-                    "quoted_message_id": quoted_message_id,
-                    "wa_response_id": wa_response.get('id'),
-                    "orchestration_result": orchestration_result,
-                    "emergency_detected": emergency_result.get('is_emergency', False),
-                    "requires_human_followup": requires_human_followup
-                }
-            )
 
-            interaction = await self.create_interaction(interaction_data)
+                interaction = await self.create_interaction(interaction_data)
 
-            # Update session
-            await self._update_session_context(session, orchestration_result, requires_human_followup)
+                # Update session
+                await self._update_session_context(session, orchestration_result, requires_human_followup)
 
-            # Cache conversation history
-            await self._cache_conversation_history(session.id, conversation_history, message, response_text)
+                # Cache conversation history and queue for human followup if needed (one Redis round trip)
+                async with self.redis_service.batch() as redis_batch:
+                    self._cache_conversation_history(redis_batch, session.id, conversation_history, message, response_text)
+                    if requires_human_followup or emergency_result.get('requires_immediate_action', False):
+                        self._queue_human_followup(redis_batch, interaction, emergency_result)
 
-            # Queue for human followup if needed
-            if requires_human_followup or emergency_result.get('requires_immediate_action', False):
-                await self._queue_human_followup(interaction, emergency_result)
+            MESSAGES_TOTAL.labels(intent=intent, service=service_used).inc()
+            total_ms = timer.finish("success")
+            logger.info("incoming_message_processed", total_ms=total_ms, stages=timer.timings_ms, degraded=degraded)
 
             return {
                 "success": True,
@@ -604,16 +673,39 @@ class InteractionService:
                 "response_sent": bool(response_text),
                 "requires_human_followup": requires_human_followup,
                 "emergency_detected": emergency_result.get('is_emergency', False),
-                "service_used": str(orchestration_result.get('service_response', {}).get('service', ServiceType.CONTACT_HUMAIN))
+                "service_used": service_used,
+                "processing_time_ms": total_ms,
+                "trace_id": current_trace_id(),
+                "degraded": degraded
             }
 
         except Exception as e:
             logger.error("incoming_message_processing_failed", phone_number=phone_number, error=str(e))
+            timer.finish("error")
             return {
                 "success": False,
                 "error": str(e),
                 "phone_number": phone_number
             }
+        finally:
+            if emergency_task is not None and not emergency_task.done():
+                emergency_task.cancel()
+            deactivate_deadline(deadline_token)
+
+    async def _await_emergency_check(self, task: "asyncio.Task", deadline: Deadline) -> Dict[str, Any]:
+        """Result of the emergency check, or a skipped marker when it does not fit the reply budget"""
+        try:
+            return await within(task, deadline.budget(1.0, self.settings.deadline_reply_reserve_seconds))
+        except asyncio.TimeoutError:
+            logger.warning("emergency_check_skipped", remaining_s=round(deadline.remaining, 2))
+            return {
+                "is_emergency": False,
+                "emergency_type": "none",
+                "urgency_level": "low",
+                "requires_immediate_action": False,
+                "recommended_action": "Emergency check skipped (reply deadline)",
+                "skipped": True
+            }
 
     async def handle_user_greeting(self, phone_number: str) -> Dict[str, Any]:
         """
@@ -884,9 +976,8 @@ class InteractionService:
             # Close session in database
             await self.session_service.close_session(session_id)
 
-            # Clear cache
-            await self.redis_service.delete_session(session_id)
-            await self.redis_service.delete(f"conversation_history:{session_id}")
+            # Clear cache (session and history keys in one round trip)
+            await self.redis_service.evict_sessions([session_id])
 
             return {
                 "success": True,
@@ -942,20 +1033,20 @@ class InteractionService:
             }
         )
 
-    async def _cache_conversation_history(self, session_id: str, history: List[Dict[str, str]], user_message: str, assistant_response: str):
-        """Cache updated conversation history"""
+    def _cache_conversation_history(self, redis_batch: RedisBatch, session_id: str, history: List[Dict[str, str]], user_message: str, assistant_response: str):
+        """Queue the updated conversation history on a Redis batch"""
         updated_history = history + [
             {"role": "user", "content": user_message},
             {"role": "assistant", "content": assistant_response}
         ]
-        await self.redis_service.set(
+        redis_batch.set(
             f"conversation_history:{session_id}",
             updated_history[-20:],  # Keep last 20 messages
             expire=3600  # 1 hour
         )
 
-    async def _queue_human_followup(self, interaction: Interaction, emergency_result: Dict[str, Any]):
-        """Queue interaction for human followup"""
+    def _queue_human_followup(self, redis_batch: RedisBatch, interaction: Interaction, emergency_result: Dict[str, Any]):
+        """Queue interaction for human followup (on a Redis batch)"""
         followup_data = {
             "interaction_id": interaction.id,
             "session_id": interaction.session_id,
@@ -965,7 +1056,7 @@ class InteractionService:
             "timestamp": datetime.now().isoformat(),
             "content": interaction.user_message
         }
-        await self.redis_service.enqueue_message(
+        redis_batch.enqueue_message(
             "human_followup_queue",
             followup_data,
             priority=10 if emergency_result.get('is_emergency', False) else 1
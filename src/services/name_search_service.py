@@ -0,0 +1,252 @@
+"""
+Fuzzy, accent-insensitive name search over catechumens and parents
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Set
+from src.utils.config import get_settings
+from src.utils.text import tokenize
+import structlog
+
+logger = structlog.get_logger()
+
+KINDS = ("catechumene", "parent")
+PAGE_SIZE = 1000
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm style trigrams: each normalized word padded as '  word '"""
+    grams: Set[str] = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramIndex:
+    """In-memory trigram inverted index ranking like pg_trgm word_similarity
+
+    score = shared trigrams / query trigrams (how much of the query is found
+    in the name), ties broken by the Jaccard similarity of the full strings
+    so shorter, closer names come first.
+    """
+
+    def __init__(self):
+        self.docs: List[Dict[str, Any]] = []
+        self.sizes: List[int] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def add(self, doc: Dict[str, Any], text: str) -> None:
+        grams = trigrams(text)
+        if not grams:
+            return
+        index = len(self.docs)
+        self.docs.append(doc)
+        self.sizes.append(len(grams))
+        for gram in grams:
+            self.postings[gram].append(index)
+
+    def search(self, query: str, limit: int = 5, min_score: float = 0.3,
+               kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rank indexed names against a query
+
+        Args:
+            query: Free-text name ("ndong emmanuel", "Fatou Sene")
+            limit: Max results
+            min_score: Minimum share of query trigrams found in the name
+            kind: Restrict to "catechumene" or "parent"
+
+        Returns:
+            Matching documents with a "score" key, best first
+        """
+        grams = trigrams(query)
+        if not grams:
+            return []
+        shared: Counter = Counter()
+        for gram in grams:
+            for index in self.postings.get(gram, ()):
+                shared[index] += 1
+
+        ranked = []
+        for index, count in shared.items():
+            score = count / len(grams)
+            if score < min_score:
+                continue
+            doc = self.docs[index]
+            if kind and doc["kind"] != kind:
+                continue
+            jaccard = count / (len(grams) + self.sizes[index] - count)
+            ranked.append((score, jaccard, index))
+        ranked.sort(reverse=True)
+        return [{**self.docs[index], "score": round(score, 3)} for score, _, index in ranked[:limit]]
+
+
+def _person(kind: str, row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "id": row.get("id_catechumene") if kind == "catechumene" else row.get("code_parent"),
+        "prenoms": row.get("prenoms"),
+        "nom": row.get("nom"),
+        "code_parent": row.get("code_parent"),
+        "telephone": row.get("telephone") if kind == "parent" else None,
+    }
+
+
+class NameSearchService:
+    """Ranked name search: pg_trgm RPC first, local trigram index as fallback
+
+    The local index is built from the SQLite snapshot when present (offline),
+    else from Supabase, and rebuilt after index_ttl_seconds.
+    """
+
+    def __init__(self, supabase=None, snapshot_path: Optional[str] = None, min_score: float = 0.3,
+                 index_ttl_seconds: int = 600, use_rpc: bool = True):
+        self.supabase = supabase
+        self.snapshot_path = snapshot_path
+        self.min_score = min_score
+        self.index_ttl_seconds = index_ttl_seconds
+        self.use_rpc = use_rpc
+        self._rpc_retry_at = 0.0
+        self._index: Optional[NgramIndex] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    # Sources
+    def _rows_from_snapshot(self) -> Iterator[Dict[str, Any]]:
+        conn = sqlite3.connect(self.snapshot_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            for row in conn.execute("SELECT id_catechumene, prenoms, nom, code_parent FROM catechumenes"):
+                yield _person("catechumene", dict(row))
+            for row in conn.execute("SELECT code_parent, prenoms, nom, telephone FROM parents"):
+                yield _person("parent", dict(row))
+        finally:
+            conn.close()
+
+    def _pages(self, table: str, columns: str) -> Iterable[Dict[str, Any]]:
+        last = None
+        while True:
+            query = self.supabase.table(table).select(columns).order("id").limit(PAGE_SIZE)
+            if last is not None:
+                query = query.gt("id", last)
+            rows = query.execute().data or []
+            yield from rows
+            if len(rows) < PAGE_SIZE:
+                return
+            last = rows[-1]["id"]
+
+    def _rows_from_supabase(self) -> Iterator[Dict[str, Any]]:
+        for row in self._pages("catechumenes", "id, id_catechumene, prenoms, nom, code_parent"):
+            yield _person("catechumene", row)
+        for row in self._pages("parents", "id, code_parent, prenoms, nom, telephone"):
+            yield _person("parent", row)
+
+    def build_index(self) -> int:
+        """
+        (Re)build the local trigram index
+
+        Returns:
+            Number of indexed names
+        """
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            rows, source = self._rows_from_snapshot(), "snapshot"
+        elif self.supabase is not None:
+            rows, source = self._rows_from_supabase(), "supabase"
+        else:
+            logger.warning("name_search_index_no_source")
+            return 0
+
+        started = time.perf_counter()
+        index = NgramIndex()
+        try:
+            for person in rows:
+                index.add(person, f"{person['prenoms'] or ''} {person['nom'] or ''}")
+        except Exception as e:
+            logger.error("name_search_index_build_failed", source=source, error=str(e))
+            return len(self._index) if self._index else 0
+
+        with self._lock:
+            self._index = index
+            self._built_at = time.monotonic()
+        logger.info("name_search_index_built", source=source, names=len(index),
+                    elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+        return len(index)
+
+    def _local_index(self) -> Optional[NgramIndex]:
+        if self._index is None or time.monotonic() - self._built_at > self.index_ttl_seconds:
+            self.build_index()
+        return self._index
+
+    def _search_rpc(self, query: str, kind: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        result = self.supabase.rpc("search_people", {
+            "p_query": query,
+            "p_kind": kind,
+            "p_limit": limit,
+            "p_min_score": self.min_score,
+        }).execute()
+        return result.data or []
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find catechumens and/or parents by (approximate) name
+
+        Args:
+            query: Name as typed by the user, accents and word order free
+            kind: "catechumene", "parent" or None for both
+            limit: Max results
+
+        Returns:
+            Ranked matches: kind, id, prenoms, nom, code_parent, telephone, score
+        """
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+        if not tokenize(query):
+            return []
+
+        started = time.perf_counter()
+        source = "rpc"
+        results: Optional[List[Dict[str, Any]]] = None
+        if self.use_rpc and self.supabase is not None and time.monotonic() >= self._rpc_retry_at:
+            try:
+                results = self._search_rpc(query, kind, limit)
+            except Exception as e:
+                # Function not deployed or database unreachable: stay local for a while
+                logger.warning("name_search_rpc_failed", error=str(e))
+                self._rpc_retry_at = time.monotonic() + self.index_ttl_seconds
+
+        if results is None:
+            source = "local"
+            index = self._local_index()
+            results = index.search(query, limit, self.min_score, kind) if index else []
+
+        logger.info("name_search_completed", source=source, results=len(results),
+                    elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+        return results
+
+
+# Global name search service instance
+_name_search_service = None
+
+
+def get_name_search_service(supabase=None) -> NameSearchService:
+    """Get name search service instance"""
+    global _name_search_service
+    if _name_search_service is None:
+        settings = get_settings()
+        _name_search_service = NameSearchService(
+            supabase=supabase,
+            snapshot_path=settings.sdb_snapshot_path,
+            min_score=settings.name_search_min_score,
+            index_ttl_seconds=settings.name_search_index_ttl_seconds,
+        )
+    elif supabase is not None and _name_search_service.supabase is None:
+        _name_search_service.supabase = supabase
+    return _name_search_service
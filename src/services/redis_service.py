@@ -3,15 +3,80 @@ Redis caching service for session management and performance optimization
 """
 
 import json
-import pickle
-from typing import Optional, Any, List, Dict
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Any, AsyncIterator, Awaitable, Callable, List, Dict
 from datetime import datetime, timedelta
 import redis.asyncio as redis
+from src.utils.cache import cache_stats
+from src.utils.codec import Codec
 from src.utils.config import get_settings
+from src.utils.metrics import QUEUE_DEPTH, record_dependency_error, timed
 import structlog
 
 logger = structlog.get_logger()
 
+# Sorted set of cached session IDs scored by expiry time (unix seconds)
+SESSION_EXPIRY_INDEX = "session_expiry"
+
+
+def _queue_entry(message_data: Dict[str, Any], priority: int) -> Dict[str, float]:
+    """Priority queue member and score (higher priority first, then FIFO)"""
+    return {json.dumps(message_data): priority * 1000000 + datetime.now().timestamp()}
+
+
+def _with_expired_events(flags: str) -> str:
+    """notify-keyspace-events flags plus keyevent (E) expired (x) events, keeping the others"""
+    if "E" not in flags:
+        flags += "E"
+    if "x" not in flags and "A" not in flags:  # A is the alias for "g$lshzxet"
+        flags += "x"
+    return flags
+
+
+class BatchResult:
+    """Result of an operation queued on a RedisBatch, set once the batch is sent"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, default: Any = None):
+        self.value = default
+
+
+class RedisBatch:
+    """Operations collected by RedisService.batch() and sent as one pipeline"""
+
+    def __init__(self, codec: Codec):
+        self.codec = codec
+        self.operations: List[tuple] = []
+
+    def _queue(self, command: str, *args, default: Any = None,
+               transform: Optional[Callable[[Any], Any]] = None, **kwargs) -> BatchResult:
+        result = BatchResult(default)
+        self.operations.append((command, args, kwargs, result, transform))
+        return result
+
+    def get(self, key: str) -> BatchResult:
+        return self._queue("get", key, transform=self.codec.decode)
+
+    def set(self, key: str, value: Any, expire: Optional[int] = None) -> BatchResult:
+        return self._queue("set", key, self.codec.encode(value), ex=expire, default=False)
+
+    def delete(self, *keys: str) -> BatchResult:
+        return self._queue("unlink", *keys, default=0)
+
+    def expire(self, key: str, seconds: int) -> BatchResult:
+        return self._queue("expire", key, seconds, default=False)
+
+    def sadd(self, key: str, *members: str) -> BatchResult:
+        return self._queue("sadd", key, *members, default=0)
+
+    def enqueue_message(self, queue_name: str, message_data: Dict[str, Any], priority: int = 0) -> BatchResult:
+        key = f"queue:{queue_name}"
+        result = self._queue("zadd", key, _queue_entry(message_data, priority), default=0)
+        self._queue("zcard", key, transform=QUEUE_DEPTH.labels(queue=queue_name).set)
+        return result
+
 
 class RedisService:
     """Service for Redis caching operations"""
@@ -19,6 +84,11 @@ class RedisService:
     def __init__(self):
         self.settings = get_settings()
         self.redis: Optional[redis.Redis] = None
+        self.codec = Codec(
+            serializer=self.settings.redis_codec,
+            compression=self.settings.redis_compression,
+            min_compress_bytes=self.settings.redis_compression_min_bytes
+        )
         # Don't initialize Redis connection during __init__ to avoid startup issues
 
     async def initialize(self):
@@ -39,7 +109,7 @@ class RedisService:
                     port=self.settings.redis_port,
                     password=self.settings.redis_password,
                     db=self.settings.redis_db,
-                    decode_responses=False,  # Use pickle/JSON for complex objects
+                    decode_responses=False,  # Values are encoded by self.codec
                     socket_connect_timeout=5,
                     socket_timeout=5,
                     retry_on_timeout=True
@@ -66,6 +136,7 @@ class RedisService:
             logger.error("redis_ping_failed", error=str(e))
             return False
 
+    @timed("redis")
     async def get(self, key: str) -> Optional[Any]:
         """
         Get value from cache
@@ -79,17 +150,14 @@ class RedisService:
         try:
             value = await self.redis.get(key)
             if value:
-                try:
-                    # Try to decode as JSON first
-                    return json.loads(value.decode('utf-8'))
-                except (json.JSONDecodeError, UnicodeDecodeError):
-                    # Fall back to pickle for complex objects
-                    return pickle.loads(value)
+                return self.codec.decode(value)
             return None
         except Exception as e:
+            record_dependency_error("redis", "get")
             logger.error("redis_get_failed", key=key, error=str(e))
             return None
 
+    @timed("redis")
     async def set(
         self,
         key: str,
@@ -110,11 +178,7 @@ class RedisService:
             True if successful, False otherwise
         """
         try:
-            if use_pickle:
-                serialized_value = pickle.dumps(value)
-            else:
-                # Use JSON for simple objects
-                serialized_value = json.dumps(value, default=str).encode('utf-8')
+            serialized_value = self.codec.encode(value, serializer="pickle" if use_pickle else None)
 
             if expire:
                 await self.redis.setex(key, expire, serialized_value)
@@ -124,9 +188,11 @@ class RedisService:
             logger.debug("redis_set_success", key=key, expire=expire)
             return True
         except Exception as e:
+            record_dependency_error("redis", "set")
             logger.error("redis_set_failed", key=key, error=str(e))
             return False
 
+    @timed("redis")
     async def delete(self, key: str) -> bool:
         """
         Delete value from cache
@@ -141,9 +207,11 @@ class RedisService:
             result = await self.redis.delete(key)
             return result > 0
         except Exception as e:
+            record_dependency_error("redis", "delete")
             logger.error("redis_delete_failed", key=key, error=str(e))
             return False
 
+    @timed("redis")
     async def exists(self, key: str) -> bool:
         """
         Check if key exists in cache
@@ -157,9 +225,11 @@ class RedisService:
         try:
             return await self.redis.exists(key) > 0
         except Exception as e:
+            record_dependency_error("redis", "exists")
             logger.error("redis_exists_failed", key=key, error=str(e))
             return False
 
+    @timed("redis")
     async def expire(self, key: str, seconds: int) -> bool:
         """
         Set expiration time for a key
@@ -174,9 +244,11 @@ class RedisService:
         try:
             return await self.redis.expire(key, seconds)
         except Exception as e:
+            record_dependency_error("redis", "expire")
             logger.error("redis_expire_failed", key=key, error=str(e))
             return False
 
+    @timed("redis")
     async def ttl(self, key: str) -> int:
         """
         Get time-to-live for a key
@@ -190,9 +262,196 @@ class RedisService:
         try:
             return await self.redis.ttl(key)
         except Exception as e:
+            record_dependency_error("redis", "ttl")
             logger.error("redis_ttl_failed", key=key, error=str(e))
             return -2
 
+    # Multi-key and batched operations
+    @asynccontextmanager
+    async def batch(self) -> AsyncIterator[RedisBatch]:
+        """
+        Collect operations and send them in one round trip when the block exits
+
+        Queued operations return a BatchResult whose value is set after the
+        block; nothing is sent if the block raises.
+
+        Yields:
+            The RedisBatch to queue operations on
+        """
+        batch = RedisBatch(self.codec)
+        yield batch
+        await self.execute_batch(batch)
+
+    @timed("redis", "batch")
+    async def execute_batch(self, batch: RedisBatch) -> bool:
+        """
+        Send the queued operations of a batch as one pipeline
+
+        Args:
+            batch: Batch to send
+
+        Returns:
+            True if the pipeline was sent (failed commands keep their default result)
+        """
+        if not batch.operations:
+            return True
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for command, args, kwargs, _, _ in batch.operations:
+                    getattr(pipe, command)(*args, **kwargs)
+                values = await pipe.execute(raise_on_error=False)
+            for (command, _, _, result, transform), value in zip(batch.operations, values):
+                if isinstance(value, Exception):
+                    logger.error("redis_batch_command_failed", command=command, error=str(value))
+                    record_dependency_error("redis", "batch")
+                elif transform is not None and value is not None:
+                    result.value = transform(value)
+                else:
+                    result.value = value
+            return True
+        except Exception as e:
+            record_dependency_error("redis", "batch")
+            logger.error("redis_batch_failed", commands=len(batch.operations), error=str(e))
+            return False
+
+    @timed("redis")
+    async def mget(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Get many values in one round trip
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Cached values by key (missing keys are left out)
+        """
+        if not keys:
+            return {}
+        try:
+            values = await self.redis.mget(keys)
+            return {key: self.codec.decode(value) for key, value in zip(keys, values) if value}
+        except Exception as e:
+            record_dependency_error("redis", "mget")
+            logger.error("redis_mget_failed", keys=len(keys), error=str(e))
+            return {}
+
+    @timed("redis")
+    async def mset(self, mapping: Dict[str, Any], expire: Optional[int] = None) -> bool:
+        """
+        Set many values in one round trip
+
+        Args:
+            mapping: Values by cache key
+            expire: Expiration time in seconds, applied to every key
+
+        Returns:
+            True if successful, False otherwise
+        """
+        if not mapping:
+            return True
+        try:
+            encoded = {key: self.codec.encode(value) for key, value in mapping.items()}
+            if expire:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for key, value in encoded.items():
+                        pipe.setex(key, expire, value)
+                    await pipe.execute()
+            else:
+                await self.redis.mset(encoded)
+            return True
+        except Exception as e:
+            record_dependency_error("redis", "mset")
+            logger.error("redis_mset_failed", keys=len(mapping), error=str(e))
+            return False
+
+    @timed("redis")
+    async def mdelete(self, keys: List[str]) -> int:
+        """
+        Delete many keys in one round trip
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Number of keys deleted
+        """
+        if not keys:
+            return 0
+        try:
+            return await self.redis.unlink(*keys)
+        except Exception as e:
+            record_dependency_error("redis", "mdelete")
+            logger.error("redis_mdelete_failed", keys=len(keys), error=str(e))
+            return 0
+
+    @timed("redis")
+    async def delete_tagged(self, tags: List[str]) -> int:
+        """
+        Delete the keys listed in tag sets (tag:{tag}) and the sets themselves
+
+        Args:
+            tags: Tags whose keys are removed
+
+        Returns:
+            Number of keys deleted
+        """
+        if not tags:
+            return 0
+        try:
+            tag_keys = [f"tag:{tag}" for tag in tags]
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                members = await pipe.execute()
+            keys = {member for tagged in members for member in tagged}
+            return await self.redis.unlink(*keys, *tag_keys)
+        except Exception as e:
+            record_dependency_error("redis", "delete_tagged")
+            logger.error("redis_delete_tagged_failed", tags=tags, error=str(e))
+            return 0
+
+    # Pub/sub methods
+    @timed("redis")
+    async def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        """
+        Publish a JSON message
+
+        Args:
+            channel: Channel name
+            message: Message data
+
+        Returns:
+            Number of subscribers that received it
+        """
+        try:
+            return await self.redis.publish(channel, json.dumps(message))
+        except Exception as e:
+            record_dependency_error("redis", "publish")
+            logger.error("redis_publish_failed", channel=channel, error=str(e))
+            return 0
+
+    async def listen(self, channel: str, on_message: Callable[[Dict[str, Any]], Any]):
+        """
+        Call on_message with every JSON message published on a channel (runs until cancelled)
+
+        Args:
+            channel: Channel name
+            on_message: Called with each decoded message
+        """
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message:
+                    continue
+                try:
+                    on_message(json.loads(message["data"]))
+                except Exception as e:
+                    logger.error("redis_message_handling_failed", channel=channel, error=str(e))
+        finally:
+            await pubsub.aclose()
+
     # Session-specific caching methods
     async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -207,6 +466,7 @@ class RedisService:
         key = f"session:{session_id}"
         return await self.get(key)
 
+    @timed("redis")
     async def set_session(
         self,
         session_id: str,
@@ -214,7 +474,7 @@ class RedisService:
         expire: Optional[int] = None
     ) -> bool:
         """
-        Set session data in cache
+        Cache session data (always with a TTL) and index its expiry time
 
         Args:
             session_id: Session ID
@@ -224,11 +484,19 @@ class RedisService:
         Returns:
             True if successful, False otherwise
         """
-        key = f"session:{session_id}"
-        if expire is None:
-            expire = self.settings.session_timeout_minutes * 60
-        return await self.set(key, session_data, expire)
+        expire = expire or self.settings.session_timeout_minutes * 60
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.setex(f"session:{session_id}", expire, self.codec.encode(session_data))
+                pipe.zadd(SESSION_EXPIRY_INDEX, {session_id: time.time() + expire})
+                await pipe.execute()
+            return True
+        except Exception as e:
+            record_dependency_error("redis", "set_session")
+            logger.error("redis_set_session_failed", session_id=session_id, error=str(e))
+            return False
 
+    @timed("redis")
     async def delete_session(self, session_id: str) -> bool:
         """
         Delete session from cache
@@ -239,8 +507,48 @@ class RedisService:
         Returns:
             True if successful, False otherwise
         """
-        key = f"session:{session_id}"
-        return await self.delete(key)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.unlink(f"session:{session_id}")
+                pipe.zrem(SESSION_EXPIRY_INDEX, session_id)
+                deleted, _ = await pipe.execute()
+            return deleted > 0
+        except Exception as e:
+            record_dependency_error("redis", "delete_session")
+            logger.error("redis_delete_failed", key=f"session:{session_id}", error=str(e))
+            return False
+
+    @timed("redis")
+    async def evict_sessions(self, session_ids: List[str], user_ids: Optional[List[str]] = None) -> int:
+        """
+        Delete the cached data of many sessions in one round trip
+
+        Args:
+            session_ids: Sessions whose session:{id} and conversation_history:{id} keys are removed
+            user_ids: Users whose user_active_session:{id} keys are removed
+
+        Returns:
+            Number of keys removed
+        """
+        keys = [f"{prefix}:{session_id}" for session_id in session_ids
+                for prefix in ("session", "conversation_history")]
+        keys += [f"user_active_session:{user_id}" for user_id in set(user_ids or []) if user_id]
+        if not keys or not self.redis:
+            return 0
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                # Chunked so a large expiry batch does not become one huge command
+                unlinks = 0
+                for start in range(0, len(keys), 500):
+                    pipe.unlink(*keys[start:start + 500])
+                    unlinks += 1
+                for start in range(0, len(session_ids), 500):
+                    pipe.zrem(SESSION_EXPIRY_INDEX, *session_ids[start:start + 500])
+                return sum((await pipe.execute())[:unlinks])
+        except Exception as e:
+            record_dependency_error("redis", "evict_sessions")
+            logger.error("redis_evict_sessions_failed", keys=len(keys), error=str(e))
+            return 0
 
     async def get_user_active_session(self, user_id: str) -> Optional[str]:
         """
@@ -291,6 +599,7 @@ class RedisService:
         return await self.delete(key)
 
     # Rate limiting methods
+    @timed("redis")
     async def check_rate_limit(
         self,
         key: str,
@@ -322,40 +631,42 @@ class RedisService:
                     "note": "Redis not available - rate limiting disabled"
                 }
 
-            # Remove old entries
-            await self.redis.zremrangebyscore(key, 0, window_start)
-
-            # Count current requests
-            current_count = await self.redis.zcard(key)
-
-            # Check if limit exceeded
-            if current_count >= limit:
-                reset_time = await self.redis.zrange(key, 0, 0, withscores=True)
-                reset_timestamp = reset_time[0][1] if reset_time else current_time + window
+            # Drop old entries, record this request and count, in one round trip
+            member = str(current_time)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.zremrangebyscore(key, 0, window_start)
+                pipe.zadd(key, {member: current_time})
+                pipe.zcard(key)
+                pipe.zrange(key, 0, 0, withscores=True)
+                pipe.expire(key, window)
+                _, _, current_count, oldest, _ = await pipe.execute()
+
+            # Check if limit exceeded (rejected requests do not count)
+            if current_count > limit:
+                await self.redis.zrem(key, member)
+                reset_timestamp = oldest[0][1] if oldest else current_time
 
                 return {
                     "allowed": False,
                     "remaining": 0,
                     "reset_time": int(reset_timestamp + window),
-                    "current_count": current_count
+                    "current_count": current_count - 1
                 }
 
-            # Add current request
-            await self.redis.zadd(key, {str(current_time): current_time})
-            await self.redis.expire(key, window)
-
             return {
                 "allowed": True,
-                "remaining": limit - current_count - 1,
+                "remaining": limit - current_count,
                 "reset_time": int(current_time + window),
-                "current_count": current_count + 1
+                "current_count": current_count
             }
 
         except Exception as e:
+            record_dependency_error("redis", "check_rate_limit")
             logger.error("rate_limit_check_failed", key=key, error=str(e))
             return {"allowed": True, "remaining": limit, "reset_time": 0, "current_count": 0}
 
     # Message queue methods
+    @timed("redis")
     async def enqueue_message(
         self,
         queue_name: str,
@@ -375,16 +686,21 @@ class RedisService:
         """
         try:
             # Use sorted set for priority queue
-            score = priority * 1000000 + datetime.now().timestamp()
             key = f"queue:{queue_name}"
 
-            await self.redis.zadd(key, {json.dumps(message_data): score})
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zadd(key, _queue_entry(message_data, priority))
+                pipe.zcard(key)
+                _, depth = await pipe.execute()
+            QUEUE_DEPTH.labels(queue=queue_name).set(depth)
             logger.debug("message_enqueued", queue=queue_name, priority=priority)
             return True
         except Exception as e:
+            record_dependency_error("redis", "enqueue_message")
             logger.error("message_enqueue_failed", queue=queue_name, error=str(e))
             return False
 
+    @timed("redis")
     async def dequeue_message(
         self,
         queue_name: str,
@@ -412,16 +728,22 @@ class RedisService:
             message_json, score = result[0]
 
             # Remove from queue
-            await self.redis.zrem(key, message_json)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zrem(key, message_json)
+                pipe.zcard(key)
+                _, depth = await pipe.execute()
+            QUEUE_DEPTH.labels(queue=queue_name).set(depth)
 
             message_data = json.loads(message_json)
             logger.debug("message_dequeued", queue=queue_name)
             return message_data
 
         except Exception as e:
+            record_dependency_error("redis", "dequeue_message")
             logger.error("message_dequeue_failed", queue=queue_name, error=str(e))
             return None
 
+    @timed("redis")
     async def get_queue_length(self, queue_name: str) -> int:
         """
         Get queue length
@@ -434,8 +756,11 @@ class RedisService:
         """
         try:
             key = f"queue:{queue_name}"
-            return await self.redis.zcard(key)
+            depth = await self.redis.zcard(key)
+            QUEUE_DEPTH.labels(queue=queue_name).set(depth)
+            return depth
         except Exception as e:
+            record_dependency_error("redis", "get_queue_length")
             logger.error("queue_length_failed", queue=queue_name, error=str(e))
             return 0
 
@@ -465,6 +790,8 @@ class RedisService:
             misses = stats.get("keyspace_misses", 0)
             total = hits + misses
             stats["hit_rate"] = round(hits / total * 100, 2) if total > 0 else 0.0
+            stats["codec"] = self.codec.stats()
+            stats["caches"] = cache_stats()
 
             return stats
         except Exception as e:
@@ -472,38 +799,78 @@ class RedisService:
             return {"connected": False, "error": str(e)}
 
     # Cleanup methods
-    async def cleanup_expired_sessions(self) -> int:
+    async def _claim_sessions(self, session_ids: List[str]) -> List[str]:
+        """Remove ids from the expiry index; only the caller whose ZREM succeeded owns each expiry"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.zrem(SESSION_EXPIRY_INDEX, session_id)
+                pipe.unlink(f"session:{session_id}")
+            results = await pipe.execute()
+        return [session_id for session_id, removed in zip(session_ids, results[::2]) if removed]
+
+    @timed("redis")
+    async def cleanup_expired_sessions(self, limit: int = 1000) -> List[str]:
         """
-        Clean up expired session keys
+        Claim the sessions whose expiry time has passed (reads only the due part of the index)
+
+        Args:
+            limit: Max sessions claimed per call
 
         Returns:
-            Number of keys removed
+            IDs of the claimed sessions, for the expiry side effects
         """
         try:
-            pattern = "session:*"
-            keys = []
-            async for key in self.redis.scan_iter(match=pattern):
-                ttl = await self.redis.ttl(key)
-                if ttl == -2:  # Key doesn't exist
-                    continue
-                elif ttl == -1:  # No expiration, check if should be expired
-                    # For session keys without TTL, we'll clean them up
-                    # based on session timeout configuration
-                    session_data = await self.get(key)
-                    if session_data:
-                        expires_at = session_data.get("expires_at")
-                        if expires_at and datetime.fromisoformat(expires_at) < datetime.now():
-                            keys.append(key)
-
-            if keys:
-                deleted = await self.redis.delete(*keys)
-                logger.info("expired_sessions_cleaned", count=deleted)
-                return deleted
-
-            return 0
+            due = await self.redis.zrangebyscore(SESSION_EXPIRY_INDEX, "-inf", time.time(), start=0, num=limit)
+            if not due:
+                return []
+            claimed = await self._claim_sessions([member.decode() if isinstance(member, bytes) else member
+                                                  for member in due])
+            logger.info("expired_sessions_cleaned", count=len(claimed))
+            return claimed
         except Exception as e:
+            record_dependency_error("redis", "cleanup_expired_sessions")
             logger.error("session_cleanup_failed", error=str(e))
-            return 0
+            return []
+
+    async def listen_for_session_expiry(self, on_expired: Callable[[List[str]], Awaitable[Any]]):
+        """
+        Run the expiry side effects as soon as Redis expires a session key
+
+        Subscribes to the "expired" keyevent channel (adding E and x to the server's
+        notify-keyspace-events when it allows CONFIG). Each expired session is claimed through the expiry
+        index first, so the periodic sweep and other app instances skip it.
+
+        Args:
+            on_expired: Coroutine called with the list of expired session IDs
+        """
+        try:
+            current = (await self.redis.config_get("notify-keyspace-events")).get("notify-keyspace-events", "")
+            current = current.decode() if isinstance(current, bytes) else current
+            flags = _with_expired_events(current)
+            if flags != current:
+                await self.redis.config_set("notify-keyspace-events", flags)
+        except Exception as e:
+            # Managed Redis often forbids CONFIG; the sweep still catches every expiry
+            logger.warning("redis_keyspace_notifications_not_configured", error=str(e))
+        db = self.redis.connection_pool.connection_kwargs.get("db", 0)
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(f"__keyevent@{db}__:expired")
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if not message:
+                    continue
+                key = message["data"].decode() if isinstance(message["data"], bytes) else str(message["data"])
+                if not key.startswith("session:"):
+                    continue
+                claimed = await self._claim_sessions([key[len("session:"):]])
+                if claimed:
+                    try:
+                        await on_expired(claimed)
+                    except Exception as e:
+                        logger.error("session_expiry_callback_failed", session_ids=claimed, error=str(e))
+        finally:
+            await pubsub.aclose()
 
     async def clear_all_cache(self) -> bool:
         """
@@ -0,0 +1,258 @@
+"""
+Local vector index for FAQ / catechism retrieval augmentation
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+import numpy as np
+from src.models.service import ServiceType
+from src.utils.config import get_settings
+from src.utils.text import tokenize
+import structlog
+
+logger = structlog.get_logger()
+
+DEFAULT_CORPUS_PATH = Path(__file__).resolve().parent.parent / "data" / "knowledge_base.json"
+
+# Function words that would otherwise dominate short WhatsApp queries
+STOPWORDS = {
+    "a", "au", "aux", "avec", "ce", "ces", "dans", "de", "des", "du", "elle", "en", "est", "et",
+    "il", "je", "la", "le", "les", "leur", "ma", "mais", "me", "mes", "mon", "ne", "nous", "on",
+    "ou", "par", "pas", "pour", "qu", "que", "qui", "sa", "se", "ses", "son", "sur", "ta", "te",
+    "tes", "ton", "tu", "un", "une", "vos", "votre", "vous", "y", "d", "l", "j", "c", "s", "n", "m",
+}
+
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder (unigrams + bigrams, L2-normalized)
+
+    Needs no model download or network call, so the index can be built at
+    startup inside the Docker image and queried in microseconds.
+    """
+
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    @staticmethod
+    def _terms(text: str) -> List[str]:
+        tokens = [t for t in tokenize(text) if t not in STOPWORDS]
+        # Crude plural folding: "sacrements" -> "sacrement"
+        tokens = [t[:-1] if len(t) > 3 and t.endswith("s") else t for t in tokens]
+        return tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+
+    def _slot(self, term: str) -> Tuple[int, float]:
+        digest = hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, (1.0 if value >> 63 else -1.0)
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embed texts
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 matrix of shape (len(texts), dim), rows L2-normalized
+        """
+        texts = list(texts)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for term in self._terms(text):
+                index, sign = self._slot(term)
+                matrix[row, index] += sign
+        # Sublinear term frequency, then unit length so dot product == cosine
+        np.multiply(np.sign(matrix), np.log1p(np.abs(matrix)), out=matrix)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+
+class RetrievalService:
+    """Top-k cosine search over a curated corpus plus the services catalog"""
+
+    def __init__(
+        self,
+        embedder: Optional[HashingEmbedder] = None,
+        corpus_path: Optional[Path] = None,
+        cache_dir: Optional[str] = None,
+        min_score: float = 0.08,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.corpus_path = Path(corpus_path) if corpus_path else DEFAULT_CORPUS_PATH
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.min_score = min_score
+        self.documents: List[Dict[str, Any]] = []
+        self.matrix: Optional[np.ndarray] = None
+        self._services: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.matrix is not None and len(self.documents) > 0
+
+    def load_corpus(self) -> List[Dict[str, Any]]:
+        """Load the curated FAQ / catechism entries"""
+        try:
+            with open(self.corpus_path, encoding="utf-8") as f:
+                return [doc for doc in json.load(f) if doc.get("text")]
+        except Exception as e:
+            logger.error("retrieval_corpus_load_failed", path=str(self.corpus_path), error=str(e))
+            return []
+
+    @staticmethod
+    def _flow_text(flow: Any) -> str:
+        if isinstance(flow, dict):
+            return " ".join(RetrievalService._flow_text(v) for v in flow.values())
+        if isinstance(flow, list):
+            return " ".join(RetrievalService._flow_text(v) for v in flow)
+        return flow if isinstance(flow, str) else ""
+
+    def load_services_catalog(self, supabase) -> List[Dict[str, Any]]:
+        """
+        Turn enabled rows of the services table into RENSEIGNEMENT documents
+
+        Args:
+            supabase: Supabase client
+
+        Returns:
+            List of corpus documents (empty on error)
+        """
+        try:
+            response = (
+                supabase.table("services")
+                .select("code, title, description, display_options, flow")
+                .eq("enabled", True)
+                .execute()
+            )
+        except Exception as e:
+            logger.warning("retrieval_services_load_failed", error=str(e))
+            return []
+
+        documents = []
+        for row in response.data or []:
+            parts = [row.get("description"), row.get("display_options"), self._flow_text(row.get("flow"))]
+            text = "\n".join(p for p in parts if p)
+            if text:
+                documents.append({
+                    "id": f"service-{row.get('code')}",
+                    "service": ServiceType.RENSEIGNEMENT.value,
+                    "title": row.get("title") or row.get("code"),
+                    "text": text,
+                })
+        return documents
+
+    def _fingerprint(self, documents: List[Dict[str, Any]]) -> str:
+        digest = hashlib.sha256(f"{self.embedder.name}:{self.embedder.dim}".encode("utf-8"))
+        for doc in documents:
+            digest.update(b"\x00")
+            digest.update(f"{doc.get('title', '')}\n{doc['text']}".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def _load_or_embed(self, documents: List[Dict[str, Any]]) -> np.ndarray:
+        texts = [f"{doc.get('title', '')}\n{doc['text']}" for doc in documents]
+        if self.cache_dir is None:
+            return self.embedder.embed(texts)
+
+        path = self.cache_dir / f"{self._fingerprint(documents)}.npy"
+        if path.exists():
+            try:
+                matrix = np.load(path, mmap_mode="r")
+                if matrix.shape == (len(documents), self.embedder.dim):
+                    logger.info("retrieval_index_mapped", path=str(path))
+                    return matrix
+            except Exception as e:
+                logger.warning("retrieval_index_cache_invalid", path=str(path), error=str(e))
+
+        matrix = self.embedder.embed(texts)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp.npy")
+            np.save(tmp_path, matrix)
+            os.replace(tmp_path, path)
+            return np.load(path, mmap_mode="r")
+        except Exception as e:
+            logger.warning("retrieval_index_cache_write_failed", path=str(path), error=str(e))
+            return matrix
+
+    def build(self, supabase=None) -> int:
+        """
+        (Re)build the index from the corpus file and the services catalog
+
+        Args:
+            supabase: Optional Supabase client for the services table
+
+        Returns:
+            Number of indexed documents
+        """
+        documents = self.load_corpus()
+        if supabase is not None:
+            documents.extend(self.load_services_catalog(supabase))
+        if not documents:
+            return 0
+
+        matrix = self._load_or_embed(documents)
+        with self._lock:
+            self.documents = documents
+            self.matrix = matrix
+            self._services = np.array([doc.get("service", "") for doc in documents])
+        logger.info("retrieval_index_built", documents=len(documents), dim=self.embedder.dim)
+        return len(documents)
+
+    def search(self, query: str, service: Optional[str] = None, k: int = 3) -> List[Dict[str, Any]]:
+        """
+        Top-k cosine search
+
+        Args:
+            query: User message
+            service: Restrict results to one service type
+            k: Maximum number of results
+
+        Returns:
+            Matching documents with a "score" key, best first
+        """
+        if not self.is_ready or not query:
+            return []
+        with self._lock:
+            matrix, documents, services = self.matrix, self.documents, self._services
+
+        scores = matrix @ self.embedder.embed([query])[0]
+        if service is not None:
+            scores = np.where(services == service, scores, -1.0)
+
+        k = min(k, len(documents))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {**documents[i], "score": float(scores[i])}
+            for i in top
+            if scores[i] >= self.min_score
+        ]
+
+    @staticmethod
+    def format_context(results: List[Dict[str, Any]]) -> str:
+        """Render search results as a prompt section"""
+        return "\n".join(f"- {doc.get('title')}: {doc['text']}" for doc in results)
+
+
+# Global retrieval instance (shared by the per-request ClaudeService objects)
+_retrieval_service = None
+
+
+def get_retrieval_service() -> RetrievalService:
+    """Get retrieval service instance"""
+    global _retrieval_service
+    if _retrieval_service is None:
+        settings = get_settings()
+        _retrieval_service = RetrievalService(
+            embedder=HashingEmbedder(dim=settings.retrieval_dim),
+            cache_dir=settings.retrieval_cache_dir,
+            min_score=settings.retrieval_min_score,
+        )
+    return _retrieval_service
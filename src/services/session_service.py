@@ -2,17 +2,23 @@
 Session service for managing conversation sessions
 """
 
-from typing import Optional, List, Dict, Any
+import asyncio
+import time
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from supabase import Client
 from src.models.session import Session, SessionCreate, SessionUpdate, SessionStatus, SessionWithStats
 from src.models.user import User
 from src.services.user_service import UserService
 from src.utils.config import get_settings
+from src.utils.metrics import instrument_supabase
 import structlog
 
 logger = structlog.get_logger()
 
+# Pause before trying the expire_sessions RPC again after it failed
+EXPIRY_RPC_RETRY_SECONDS = 600.0
+
 
 class SessionService:
     """Service for managing session operations"""
@@ -21,6 +27,7 @@ class SessionService:
         self.settings = get_settings()
         self.supabase: Optional[Client] = None
         self.user_service = UserService()
+        self._expiry_rpc_retry_at = 0.0
         self._initialize_supabase()
 
     def _initialize_supabase(self):
@@ -28,10 +35,10 @@ class SessionService:
         try:
             from supabase import create_client
             # Initialize Supabase with minimal parameters to avoid proxy issues
-            self.supabase = create_client(
+            self.supabase = instrument_supabase(create_client(
                 self.settings.supabase_url,
                 self.settings.supabase_service_role_key
-            )
+            ))
             logger.info("supabase_client_initialized")
         except Exception as e:
             logger.error("supabase_initialization_failed", error=str(e))
@@ -309,31 +316,95 @@ class SessionService:
         update_data = SessionUpdate(status=SessionStatus.CLOSED)
         return await self.update_session(session_id, update_data)
 
-    async def cleanup_expired_sessions(self):
+    async def cleanup_expired_sessions(self, redis_service=None) -> int:
         """
-        Clean up expired sessions
+        Expire overdue active sessions in batches (one statement per batch)
+
+        Args:
+            redis_service: When given, the expired sessions' cache keys are evicted
+
+        Returns:
+            Number of sessions expired
         """
         try:
             logger.info("cleaning_up_expired_sessions")
+            now = datetime.now().isoformat()
+            batch_size = self.settings.session_expiry_batch_size
+            total = 0
+
+            while True:
+                expired, batched = await asyncio.to_thread(self._expire_batch, now, batch_size)
+                if expired and redis_service is not None:
+                    await redis_service.evict_sessions(
+                        [row["id"] for row in expired],
+                        [row.get("user_id") for row in expired]
+                    )
+                total += len(expired)
+                # The PostgREST fallback is not batched; the RPC is done once a batch comes back short
+                if len(expired) < batch_size or not batched:
+                    break
 
-            # Find expired sessions
-            expired_time = datetime.now().isoformat()
-            response = self.supabase.table("sessions").select("id").lt("expires_at", expired_time).eq("status", "active").execute()
-
-            if response.data:
-                expired_sessions = [session["id"] for session in response.data]
-                logger.info("found_expired_sessions", count=len(expired_sessions))
-
-                # Mark as expired
-                for session_id in expired_sessions:
-                    await self.expire_session(session_id)
-
-            logger.info("expired_sessions_cleanup_completed")
+            logger.info("expired_sessions_cleanup_completed", count=total)
+            return total
 
         except Exception as e:
             logger.error("expired_sessions_cleanup_failed", error=str(e))
             raise
 
+    async def expire_sessions_by_id(self, session_ids: List[str], redis_service=None) -> int:
+        """
+        Expire the given sessions once their cache keys expired (one statement)
+
+        Only active sessions already past expires_at are updated, so a session kept
+        alive by activity since its cache entry was written is left alone.
+
+        Args:
+            session_ids: Sessions reported by the Redis expiry index or keyspace events
+            redis_service: When given, the sessions' remaining cache keys are evicted
+
+        Returns:
+            Number of sessions expired
+        """
+        if not session_ids:
+            return 0
+        now = datetime.now().isoformat()
+        response = await asyncio.to_thread(
+            lambda: self.supabase.table("sessions")
+            .update({"status": SessionStatus.EXPIRED.value, "updated_at": now})
+            .in_("id", session_ids)
+            .eq("status", SessionStatus.ACTIVE.value)
+            .lt("expires_at", now)
+            .execute()
+        )
+        expired = response.data or []
+        if redis_service is not None:
+            await redis_service.evict_sessions(session_ids, [row.get("user_id") for row in expired])
+        logger.info("sessions_expired_by_id", requested=len(session_ids), count=len(expired))
+        return len(expired)
+
+    def _expire_batch(self, now: str, batch_size: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Expire one batch via the expire_sessions RPC, or one filtered UPDATE if it fails
+
+        Returns:
+            The expired sessions and whether they came from the (batched) RPC
+        """
+        if time.monotonic() >= self._expiry_rpc_retry_at:
+            try:
+                response = self.supabase.rpc("expire_sessions", {"p_now": now, "p_limit": batch_size}).execute()
+                return response.data or [], True
+            except Exception as e:
+                # Function not deployed or database hiccup: use the filtered UPDATE for a while
+                logger.warning("expire_sessions_rpc_unavailable", error=str(e))
+                self._expiry_rpc_retry_at = time.monotonic() + EXPIRY_RPC_RETRY_SECONDS
+
+        response = (self.supabase.table("sessions")
+                    .update({"status": SessionStatus.EXPIRED.value, "updated_at": now})
+                    .lt("expires_at", now)
+                    .eq("status", SessionStatus.ACTIVE.value)
+                    .execute())
+        return [{"id": row["id"], "user_id": row.get("user_id")} for row in response.data or []], False
+
     async def get_session_with_stats(self, session_id: str) -> Optional[SessionWithStats]:
         """
         Get session with additional statistics
@@ -431,4 +502,61 @@ class SessionService:
 
         except Exception as e:
             logger.error("list_sessions_failed", error=str(e))
-            raise
\ No newline at end of file
+            raise
+
+
+async def run_session_expiry(session_service: SessionService, redis_service=None, interval_seconds: float = 60.0):
+    """
+    Periodically expire overdue sessions (started as a task in the app lifespan)
+
+    Each run first drains the due part of the Redis expiry index (only sessions
+    whose TTL actually ran out), then expires whatever is left overdue in the
+    database in batches.
+
+    Args:
+        session_service: Service running the batched expiry
+        redis_service: Cache whose session keys are evicted with each batch
+        interval_seconds: Pause between runs
+    """
+    batch_size = session_service.settings.session_expiry_batch_size
+    while True:
+        if redis_service is not None and redis_service.redis is not None:
+            try:
+                while True:
+                    due = await redis_service.cleanup_expired_sessions(limit=batch_size)
+                    await session_service.expire_sessions_by_id(due, redis_service)
+                    if len(due) < batch_size:
+                        break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Claimed sessions left active are caught by the database sweep below
+                logger.error("session_expiry_index_drain_failed", error=str(e))
+        try:
+            await session_service.cleanup_expired_sessions(redis_service)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass  # logged by cleanup_expired_sessions; retried next interval
+        await asyncio.sleep(interval_seconds)
+
+
+async def listen_for_session_expiry(session_service: SessionService, redis_service):
+    """
+    Expire sessions as soon as Redis reports their cache keys expired (lifespan task)
+
+    Args:
+        session_service: Service updating the expired sessions
+        redis_service: Connected cache to subscribe to
+    """
+    async def on_expired(session_ids: List[str]):
+        await session_service.expire_sessions_by_id(session_ids, redis_service)
+
+    while True:
+        try:
+            await redis_service.listen_for_session_expiry(on_expired)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("session_expiry_listener_restarting", error=str(e))
+            await asyncio.sleep(5.0)
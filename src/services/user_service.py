@@ -6,7 +6,9 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 from supabase import Client, create_client
 from src.models.user import User, UserCreate, UserUpdate, UserWithStats
+from src.utils.cache import cached, invalidate_tags
 from src.utils.config import get_settings
+from src.utils.metrics import instrument_supabase
 import structlog
 
 logger = structlog.get_logger()
@@ -24,10 +26,10 @@ class UserService:
         """Initialize Supabase client"""
         try:
             # Initialize Supabase with minimal parameters to avoid proxy issues
-            self.supabase = create_client(
+            self.supabase = instrument_supabase(create_client(
                 self.settings.supabase_url,
                 self.settings.supabase_service_role_key
-            )
+            ))
             logger.info("supabase_client_initialized")
         except Exception as e:
             logger.error("supabase_initialization_failed", error=str(e))
@@ -117,6 +119,16 @@ class UserService:
             logger.error("get_user_by_id_failed", user_id=user_id, error=str(e))
             raise
 
+    @cached(
+        "user_by_phone",
+        ttl_seconds=get_settings().user_cache_ttl_seconds,
+        local_ttl_seconds=get_settings().cache_local_ttl_seconds,
+        key=lambda self, phone_number: phone_number,
+        tags=lambda user: [f"user:{user.id}"],
+        dumps=lambda user: user.dict(),
+        loads=lambda data: User(**data),
+        cache_none=False  # get_or_create_user creates the user right after a miss
+    )
     async def get_user_by_phone(self, phone_number: str) -> Optional[User]:
         """
         Get user by phone number
@@ -175,6 +187,7 @@ class UserService:
                 update_dict["updated_at"] = datetime.now().isoformat()
 
                 response = self.supabase.table("users").update(update_dict).eq("id", user_id).execute()
+                await invalidate_tags(f"user:{user_id}")
 
                 if response.data:
                     updated_user = await self.get_user_by_id(user_id)
@@ -7,6 +7,9 @@ import httpx
 from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 from src.utils.config import get_settings
+from src.utils.deadline import call_timeout
+from src.utils.phone import to_whatsapp_id
+from src.utils.tracing import instrument_http_client
 from src.models.message import MessageType, MessageStatus
 from src.models.interaction import InteractionCreate
 import structlog
@@ -33,7 +36,7 @@ class WAHAService:
             api_key_status=api_key_status
         )
         
-        self.http_client = httpx.AsyncClient(timeout=30.0)
+        self.http_client = instrument_http_client(httpx.AsyncClient(timeout=30.0), "waha")
 
     def _build_url(self, endpoint: str) -> str:
         """Build full URL for WAHA API endpoint"""
@@ -149,10 +152,12 @@ class WAHAService:
             if quoted_message_id:
                 payload['quotedMessageId'] = quoted_message_id
 
+            # The reply send keeps at least the reserved time even past the deadline
             response = await self.http_client.post(
                 url,
                 json=payload,
-                headers=self._get_headers()
+                headers=self._get_headers(),
+                timeout=call_timeout(30.0, floor=self.settings.deadline_reply_reserve_seconds)
             )
             response.raise_for_status()
 
@@ -685,27 +690,7 @@ class WAHAService:
         Returns:
             Formatted phone number
         """
-        if not phone_number or phone_number.strip() == "":
-            raise ValueError("Phone number cannot be empty")
-        
-        # Skip special WhatsApp addresses like status@broadcast
-        if '@' in phone_number:
-            return phone_number
-        
-        # Remove all non-digit characters
-        cleaned = ''.join(c for c in phone_number if c.isdigit())
-
-        if not cleaned:
-            raise ValueError(f"Invalid phone number: {phone_number}")
-
-        # Remove leading + or 00
-        if cleaned.startswith('00'):
-            cleaned = cleaned[2:]
-        elif cleaned.startswith('0') and len(cleaned) > 1:
-            # Remove leading zero for some countries
-            cleaned = cleaned[1:]
-
-        return cleaned
+        return to_whatsapp_id(phone_number)
 
     async def send_message(
         self,
@@ -0,0 +1,323 @@
+"""
+Two-tier cache for hot, rarely changing lookups
+
+@cached puts a per-process LRU (short TTL) in front of Redis, which is shared
+by every app instance. Entries are refreshed a little before they expire with
+a probability that grows as expiry approaches (XFetch), so hot keys are not
+all recomputed at the same moment; a per-key lock lets one caller load a key
+while the others wait for it (or keep serving the current value during an
+early refresh). Entries carry tags: invalidate_tags() deletes the tagged
+Redis keys and publishes the tags on INVALIDATION_CHANNEL so that every
+instance drops its local copies. Without Redis only the local tier is used.
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import structlog
+from src.utils.metrics import CACHE_HIT_RATIO, CACHE_LOOKUPS_TOTAL
+
+logger = structlog.get_logger()
+
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+_caches: Dict[str, "TwoTierCache"] = {}
+_redis_service = None
+
+
+class _Entry:
+    """Cached value with its expiry time (unix seconds) and load duration"""
+
+    __slots__ = ("value", "expires_at", "delta", "tags")
+
+    def __init__(self, value: Any, expires_at: float, delta: float, tags: List[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.delta = delta
+        self.tags = tags
+
+
+def _redis():
+    """The configured RedisService, if connected"""
+    if _redis_service is not None and _redis_service.redis is not None:
+        return _redis_service
+    return None
+
+
+class TwoTierCache:
+    """Local LRU/TTL tier in front of Redis for one named cache"""
+
+    def __init__(self, name: str, ttl_seconds: float, local_ttl_seconds: Optional[float] = None,
+                 max_size: int = 1024, beta: float = 1.0,
+                 dumps: Optional[Callable[[Any], Any]] = None, loads: Optional[Callable[[Any], Any]] = None,
+                 rng: Optional[random.Random] = None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.local_ttl_seconds = min(local_ttl_seconds or ttl_seconds, ttl_seconds)
+        self.max_size = max_size
+        self.beta = beta
+        self.dumps = dumps or (lambda value: value)
+        self.loads = loads or (lambda data: data)
+        self.random = (rng or random.Random()).random
+        self._local: "OrderedDict[str, Tuple[float, _Entry]]" = OrderedDict()
+        self._tagged: Dict[str, Set[str]] = {}
+        self._locks: Dict[str, list] = {}
+        self.lookups = {"local": 0, "redis": 0, "miss": 0}
+
+    def redis_key(self, key: str) -> str:
+        return f"cache:{self.name}:{key}"
+
+    def _count(self, tier: str) -> None:
+        self.lookups[tier] += 1
+        CACHE_LOOKUPS_TOTAL.labels(cache=self.name, tier=tier).inc()
+        CACHE_HIT_RATIO.labels(cache=self.name).set(self.hit_ratio)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = sum(self.lookups.values())
+        return (self.lookups["local"] + self.lookups["redis"]) / total if total else 0.0
+
+    def _refresh_due(self, entry: _Entry, now: float) -> bool:
+        # XFetch: recompute early with a probability rising as expiry nears (1 - random() is in (0, 1])
+        return now - entry.delta * self.beta * math.log(1.0 - self.random()) >= entry.expires_at
+
+    # Local tier
+    def _local_get(self, key: str, now: float) -> Optional[_Entry]:
+        item = self._local.get(key)
+        if item is None:
+            return None
+        local_expires_at, entry = item
+        if local_expires_at <= now or entry.expires_at <= now:
+            self._local_drop(key)
+            return None
+        self._local.move_to_end(key)
+        return entry
+
+    def _local_put(self, key: str, entry: _Entry, now: float) -> None:
+        self._local_drop(key)
+        self._local[key] = (min(now + self.local_ttl_seconds, entry.expires_at), entry)
+        for tag in entry.tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while len(self._local) > self.max_size:
+            self._local_drop(next(iter(self._local)))
+
+    def _local_drop(self, key: str) -> None:
+        item = self._local.pop(key, None)
+        if item is None:
+            return
+        for tag in item[1].tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def drop_local(self, keys: Iterable[str] = (), tags: Iterable[str] = ()) -> None:
+        """Forget local copies by key or tag (remote invalidations land here)"""
+        for tag in tags:
+            for key in list(self._tagged.get(tag, ())):
+                self._local_drop(key)
+        for key in keys:
+            self._local_drop(key)
+
+    def clear_local(self) -> None:
+        self._local.clear()
+        self._tagged.clear()
+
+    # Redis tier
+    async def _redis_get(self, key: str) -> Optional[_Entry]:
+        service = _redis()
+        if service is None:
+            return None
+        data = await service.get(self.redis_key(key))
+        if not data:
+            return None
+        try:
+            return _Entry(self.loads(data["v"]), data["e"], data["d"], data.get("t", []))
+        except Exception as e:
+            logger.warning("cache_entry_unreadable", cache=self.name, error=str(e))
+            return None
+
+    async def _redis_put(self, key: str, entry: _Entry) -> None:
+        service = _redis()
+        if service is None:
+            return
+        expire = max(int(math.ceil(entry.expires_at - time.time())), 1)
+        redis_key = self.redis_key(key)
+        async with service.batch() as batch:
+            batch.set(redis_key, {"v": self.dumps(entry.value), "e": entry.expires_at, "d": entry.delta,
+                                  "t": entry.tags}, expire=expire)
+            for tag in entry.tags:
+                batch.sadd(f"tag:{tag}", redis_key)
+                batch.expire(f"tag:{tag}", int(self.ttl_seconds))
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                          tags: Optional[Callable[[Any], List[str]]] = None, cache_none: bool = True) -> Any:
+        """
+        Cached value of a key, loading it once on a miss
+
+        Args:
+            key: Cache key (within this cache)
+            loader: Coroutine function computing the value
+            tags: Tags of a loaded value, for invalidate_tags()
+            cache_none: Whether a None result is cached
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        now = time.time()
+        entry = self._local_get(key, now)
+        if entry is not None and not self._refresh_due(entry, now):
+            self._count("local")
+            return entry.value
+
+        holder = self._locks.get(key)
+        if holder is None:
+            holder = self._locks[key] = [asyncio.Lock(), 0]
+        if entry is not None and holder[0].locked():
+            # Another caller is already refreshing this key: keep serving the current value
+            self._count("local")
+            return entry.value
+
+        holder[1] += 1
+        try:
+            async with holder[0]:
+                now = time.time()
+                current = self._local_get(key, now)
+                if current is not None and current is not entry:
+                    # Loaded while we waited for the lock
+                    self._count("local")
+                    return current.value
+                if entry is None:
+                    remote = await self._redis_get(key)
+                    if remote is not None and not self._refresh_due(remote, now):
+                        self._local_put(key, remote, now)
+                        self._count("redis")
+                        return remote.value
+
+                self._count("miss")
+                started = time.perf_counter()
+                try:
+                    value = await loader()
+                except Exception as e:
+                    if entry is None:
+                        raise
+                    # A failed early refresh keeps the still valid value
+                    logger.warning("cache_refresh_failed", cache=self.name, error=str(e))
+                    return entry.value
+                delta = time.perf_counter() - started
+                if value is None and not cache_none:
+                    return value
+                now = time.time()
+                loaded = _Entry(value, now + self.ttl_seconds, delta,
+                                list(tags(value)) if tags and value is not None else [])
+                self._local_put(key, loaded, now)
+                try:
+                    await self._redis_put(key, loaded)
+                except Exception as e:
+                    logger.warning("cache_store_failed", cache=self.name, error=str(e))
+                return value
+        finally:
+            holder[1] -= 1
+            if holder[1] == 0 and self._locks.get(key) is holder:
+                del self._locks[key]
+
+    async def invalidate(self, *keys: str) -> None:
+        """Drop keys from both tiers on every instance"""
+        self.drop_local(keys=keys)
+        service = _redis()
+        if service is not None and keys:
+            await service.mdelete([self.redis_key(key) for key in keys])
+            await service.publish(INVALIDATION_CHANNEL, {"cache": self.name, "keys": list(keys)})
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.lookups, "hit_ratio": round(self.hit_ratio, 4), "local_entries": len(self._local)}
+
+
+def _default_key(*args, **kwargs) -> str:
+    return ":".join([str(arg) for arg in args] + [f"{name}={kwargs[name]}" for name in sorted(kwargs)])
+
+
+def cached(name: str, ttl_seconds: float, key: Optional[Callable[..., str]] = None,
+           tags: Optional[Callable[[Any], List[str]]] = None, local_ttl_seconds: Optional[float] = None,
+           max_size: int = 1024, dumps: Optional[Callable[[Any], Any]] = None,
+           loads: Optional[Callable[[Any], Any]] = None, cache_none: bool = True):
+    """
+    Cache the results of an async function in the two tiers
+
+    Args:
+        name: Cache name (Redis key prefix and metrics label)
+        ttl_seconds: Lifetime of an entry
+        key: Builds the cache key from the call arguments (required for methods,
+            e.g. lambda self, phone: phone); default: the arguments joined
+        tags: Tags of a result, for invalidate_tags()
+        local_ttl_seconds: Max age of the in-process copy (default: ttl_seconds)
+        max_size: Max entries of the in-process tier
+        dumps: Turns a result into JSON-compatible data for Redis
+        loads: Rebuilds a result from that data
+        cache_none: Whether None results are cached
+
+    Returns:
+        Decorator; the wrapped function exposes the TwoTierCache as .cache
+    """
+    cache = TwoTierCache(name, ttl_seconds, local_ttl_seconds, max_size, dumps=dumps, loads=loads)
+    _caches[name] = cache
+    make_key = key or _default_key
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await cache.get_or_load(str(make_key(*args, **kwargs)), lambda: func(*args, **kwargs),
+                                           tags=tags, cache_none=cache_none)
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def configure_cache(redis_service) -> None:
+    """Use a RedisService as the shared tier of every cache (None: local tier only)"""
+    global _redis_service
+    _redis_service = redis_service
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """Drop every entry carrying one of the tags, in all caches and on every instance"""
+    for cache in _caches.values():
+        cache.drop_local(tags=tags)
+    service = _redis()
+    if service is not None and tags:
+        await service.delete_tagged(list(tags))
+        await service.publish(INVALIDATION_CHANNEL, {"tags": list(tags)})
+
+
+def _on_invalidation(message: Dict[str, Any]) -> None:
+    if message.get("cache"):
+        cache = _caches.get(message["cache"])
+        if cache is not None:
+            cache.drop_local(keys=message.get("keys", []))
+    for cache in _caches.values():
+        cache.drop_local(tags=message.get("tags", []))
+
+
+async def listen_for_invalidations() -> None:
+    """Apply invalidations published by other instances (lifespan task)"""
+    while True:
+        service = _redis()
+        if service is None:
+            return
+        try:
+            await service.listen(INVALIDATION_CHANNEL, _on_invalidation)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("cache_invalidation_listener_restarting", error=str(e))
+            await asyncio.sleep(5.0)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Lookups by tier and hit ratio of every cache"""
+    return {name: cache.stats() for name, cache in _caches.items()}
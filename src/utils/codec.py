@@ -0,0 +1,181 @@
+"""
+Binary codec for values cached in Redis
+
+Encoded values start with one header byte: the high nibble is the format
+version (1), the low nibble the compression (none, zlib or zstd) and the
+serializer (orjson-compatible JSON, msgpack or pickle). Values written before
+the codec existed are plain JSON or pickle, which never start with a 0x1_
+byte, so they are still read transparently. Payloads below a size threshold
+are stored uncompressed.
+"""
+
+import json
+import pickle
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+import structlog
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: REDIS_CODEC=msgpack
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional: REDIS_COMPRESSION=zstd (zlib is used without it)
+    zstandard = None
+
+logger = structlog.get_logger()
+
+# Header byte = VERSION | compression | serializer
+VERSION = 0x10
+SERIALIZERS = {"json": 0x01, "msgpack": 0x02, "pickle": 0x03}
+COMPRESSIONS = {"none": 0x00, "zlib": 0x04, "zstd": 0x08}
+_SERIALIZER_NAMES = {tag: name for name, tag in SERIALIZERS.items()}
+_COMPRESSION_NAMES = {tag: name for name, tag in COMPRESSIONS.items()}
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class Codec:
+    """Serialize, compress and account for cached values"""
+
+    def __init__(self, serializer: str = "json", compression: str = "zstd",
+                 min_compress_bytes: int = 1024, level: int = 3):
+        if serializer == "msgpack" and msgpack is None:
+            logger.warning("redis_codec_unavailable", serializer=serializer, fallback="json")
+            serializer = "json"
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown serializer: {serializer}")
+        if compression == "zstd" and zstandard is None:
+            compression = "zlib"
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.serializer = serializer
+        self.compression = compression
+        self.min_compress_bytes = min_compress_bytes
+        self.level = level
+        self._lock = threading.Lock()
+        self._stats = {"encoded": 0, "decoded": 0, "legacy_decoded": 0, "compressed": 0,
+                       "serialized_bytes": 0, "stored_bytes": 0, "encode_seconds": 0.0, "decode_seconds": 0.0}
+
+    def _serialize(self, value: Any, serializer: str) -> bytes:
+        if serializer == "json":
+            return _json_dumps(value)
+        if serializer == "msgpack":
+            return msgpack.packb(value, default=str, use_bin_type=True)
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _compress(self, data: bytes, compression: str) -> bytes:
+        if compression == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, self.level)
+
+    def encode(self, value: Any, serializer: Optional[str] = None) -> bytes:
+        """
+        Serialize a value, compressing it when large enough
+
+        Args:
+            value: Value to cache
+            serializer: Override of the configured serializer (e.g. "pickle")
+
+        Returns:
+            Header byte followed by the payload
+        """
+        started = time.perf_counter()
+        serializer = serializer or self.serializer
+        payload = self._serialize(value, serializer)
+        serialized_size = len(payload) + 1
+        compression = "none"
+        if self.compression != "none" and len(payload) >= self.min_compress_bytes:
+            compressed = self._compress(payload, self.compression)
+            # Incompressible payloads are kept as they are
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+        data = bytes((VERSION | COMPRESSIONS[compression] | SERIALIZERS[serializer],)) + payload
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            stats = self._stats
+            stats["encoded"] += 1
+            stats["compressed"] += compression != "none"
+            stats["serialized_bytes"] += serialized_size
+            stats["stored_bytes"] += len(data)
+            stats["encode_seconds"] += elapsed
+        return data
+
+    def decode(self, data: bytes) -> Any:
+        """
+        Read a value written by encode() or by the previous JSON/pickle format
+
+        Args:
+            data: Raw bytes from Redis
+
+        Returns:
+            The decoded value
+        """
+        started = time.perf_counter()
+        header = data[0] if data else 0
+        serializer = _SERIALIZER_NAMES.get(header & 0x03)
+        compression = _COMPRESSION_NAMES.get(header & 0x0C)
+        legacy = header & 0xF0 != VERSION or serializer is None or compression is None
+        if legacy:
+            value = self._decode_legacy(data)
+        else:
+            payload = data[1:]
+            if compression == "zstd":
+                if zstandard is None:
+                    raise RuntimeError("zstandard is required to read this cached value")
+                payload = zstandard.ZstdDecompressor().decompress(payload)
+            elif compression == "zlib":
+                payload = zlib.decompress(payload)
+            if serializer == "json":
+                value = _json_loads(payload)
+            elif serializer == "msgpack":
+                if msgpack is None:
+                    raise RuntimeError("msgpack is required to read this cached value")
+                value = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+            else:
+                value = pickle.loads(payload)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["decoded"] += 1
+            self._stats["legacy_decoded"] += legacy
+            self._stats["decode_seconds"] += elapsed
+        return value
+
+    @staticmethod
+    def _decode_legacy(data: bytes) -> Any:
+        try:
+            return json.loads(data.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            # Fall back to pickle for complex objects
+            return pickle.loads(data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters since start: values, bytes saved by compression, time spent"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["serializer"] = self.serializer
+        stats["compression"] = self.compression
+        stats["bytes_saved"] = stats["serialized_bytes"] - stats["stored_bytes"]
+        stats["compression_ratio"] = (round(stats["serialized_bytes"] / stats["stored_bytes"], 2)
+                                      if stats["stored_bytes"] else 1.0)
+        encode_seconds, decode_seconds = stats.pop("encode_seconds"), stats.pop("decode_seconds")
+        stats["avg_encode_us"] = round(encode_seconds / stats["encoded"] * 1e6, 1) if stats["encoded"] else 0.0
+        stats["avg_decode_us"] = round(decode_seconds / stats["decoded"] * 1e6, 1) if stats["decoded"] else 0.0
+        return stats
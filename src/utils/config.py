@@ -4,7 +4,7 @@ Configuration settings for WhatsApp AI Concierge Service
 
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import Optional
+from typing import Dict, Optional
 import os
 
 
@@ -41,12 +41,40 @@ class Settings(BaseSettings):
     claude_max_tokens: int = Field(default=1000)
     claude_temperature: float = Field(default=0.7)
 
+    # Local intent pre-router
+    intent_router_enabled: bool = Field(default=True, description="Classify obvious intents locally before calling Claude")
+    intent_router_min_confidence: float = Field(default=0.85, description="Minimum local confidence to skip the Claude classifier")
+    intent_router_training_limit: int = Field(default=5000, description="Max past interactions used to train the local model")
+
+    # Retrieval augmentation (local vector index)
+    retrieval_enabled: bool = Field(default=True, description="Inject retrieved FAQ/catechism snippets into prompts")
+    retrieval_dim: int = Field(default=2048, description="Dimension of the hashed embedding vectors")
+    retrieval_top_k: int = Field(default=3, description="Max snippets injected into a prompt")
+    retrieval_min_score: float = Field(default=0.08, description="Minimum cosine similarity for a snippet")
+    retrieval_cache_dir: Optional[str] = Field(default=".cache/retrieval", description="Directory of memory-mapped index files")
+
+    # Fuzzy name search (catechumens / parents)
+    name_search_min_score: float = Field(default=0.3, description="Minimum share of query trigrams found in a name")
+    name_search_index_ttl_seconds: int = Field(default=600, description="Rebuild interval of the local fallback index")
+    sdb_snapshot_path: Optional[str] = Field(default="sdb_snapshot.db", description="Local SQLite snapshot of the SDB tables")
+
+    # Parent lookup by phone (WhatsApp sender identification)
+    family_cache_ttl_seconds: int = Field(default=300, description="How long a phone -> family lookup is cached")
+    family_cache_size: int = Field(default=1024, description="Max phone numbers kept in the family cache")
+
+    # Two-tier cache (in-process LRU in front of Redis)
+    user_cache_ttl_seconds: int = Field(default=300, description="How long a phone -> user lookup is cached")
+    cache_local_ttl_seconds: int = Field(default=30, description="Max age of the in-process copy (bounds staleness if an invalidation is missed)")
+
     # Redis
     redis_url: Optional[str] = Field(default="redis://localhost:6379/0")
     redis_host: str = Field(default="localhost")
     redis_port: int = Field(default=6379)
     redis_db: int = Field(default=0)
     redis_password: Optional[str] = Field(default=None)
+    redis_codec: str = Field(default="json", description="Serializer of cached values: json (orjson) or msgpack")
+    redis_compression: str = Field(default="zstd", description="Compression of large cached values: none, zlib or zstd (zlib if zstandard is not installed)")
+    redis_compression_min_bytes: int = Field(default=1024, description="Cached values smaller than this are stored uncompressed")
 
     # JWT
     jwt_secret_key: str = Field(default="default-jwt-secret")
@@ -55,15 +83,31 @@ class Settings(BaseSettings):
 
     # Logging
     log_level: str = Field(default="INFO")
+    log_sample_rates: Dict[str, float] = Field(default_factory=dict, description="Per-event share of log lines written, e.g. {\"claude_message_received\": 0.1}; 0 keeps only the counter")
+    log_mask_phone_numbers: bool = Field(default=False, description="Log only the last 4 digits of phone numbers")
+    log_max_value_chars: int = Field(default=512, description="Longer logged string values are truncated")
+
+    # Tracing
+    tracing_exporter: str = Field(default="none", description="Where finished spans go: none, file or otlp")
+    tracing_file_path: str = Field(default="traces.jsonl", description="OTLP/JSON lines written by the file exporter")
+    otlp_endpoint: str = Field(default="http://localhost:4318", description="OTLP/HTTP collector base URL (spans are POSTed to /v1/traces)")
 
     # Service Configuration
     session_timeout_minutes: int = Field(default=30, description="Session timeout in minutes")
+    session_expiry_interval_seconds: int = Field(default=60, description="How often overdue sessions are expired (0 disables the scheduler)")
+    session_expiry_batch_size: int = Field(default=1000, description="Sessions expired per statement")
+    # Off until the message pipeline caches sessions through RedisService.set_session:
+    # until then no session:* key or expiry index entry exists to be notified about
+    session_expiry_notifications: bool = Field(default=False, description="Expire sessions on Redis keyspace expiry events")
     max_retry_attempts: int = Field(default=3, description="Max retry attempts for failed operations")
     rate_limit_per_minute: int = Field(default=10, description="Rate limit per minute per user")
 
     # Performance
     max_concurrent_requests: int = Field(default=100, description="Max concurrent requests")
-    request_timeout_seconds: int = Field(default=30, description="Request timeout in seconds")
+    request_timeout_seconds: int = Field(default=30, description="Per-message deadline: the reply is sent within this time of the webhook arriving")
+    deadline_reply_reserve_seconds: float = Field(default=3.0, description="Time kept for the WhatsApp send when budgeting the Claude stages")
+    deadline_classify_share: float = Field(default=0.4, description="Share of the remaining budget the intent classification may use")
+    deadline_fallback_min_score: float = Field(default=0.35, description="Minimum retrieval score to answer from the knowledge base when generation runs out of time")
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,87 @@
+"""
+Per-message deadlines and stage budgets
+
+A Deadline is created when a webhook arrives (request_timeout_seconds) and
+activated in a contextvar, so nested calls see it without extra parameters:
+pipeline stages take a budget from the remaining time and the HTTP clients
+cap their timeouts with call_timeout().
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Iterator, Optional, Union
+
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar("current_deadline", default=None)
+
+
+class Deadline:
+    """Point in (monotonic) time by which the reply must be sent"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @property
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining <= 0.0
+
+    def budget(self, share: float = 1.0, reserve: float = 0.0) -> float:
+        """
+        Seconds a stage may use
+
+        Args:
+            share: Share of the available time given to the stage
+            reserve: Seconds kept for the stages that must still run (the reply send)
+
+        Returns:
+            share * (remaining - reserve), never negative
+        """
+        return max(self.remaining - reserve, 0.0) * share
+
+    def timeout(self, default: float, floor: float = 1.0) -> float:
+        """A client's default timeout capped by the remaining time (at least floor)"""
+        return max(min(default, self.remaining), floor)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def activate_deadline(deadline: Deadline) -> Token:
+    """Make deadline the current one; pass the token to deactivate_deadline()"""
+    return _current_deadline.set(deadline)
+
+
+def deactivate_deadline(token: Token) -> None:
+    _current_deadline.reset(token)
+
+
+@contextmanager
+def deadline_scope(deadline: Union[Deadline, float]) -> Iterator[Deadline]:
+    """Activate a deadline (or a new one of that many seconds) for the enclosed block"""
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    token = activate_deadline(deadline)
+    try:
+        yield deadline
+    finally:
+        deactivate_deadline(token)
+
+
+def call_timeout(default: float, floor: float = 1.0) -> float:
+    """Timeout for an outgoing call: the client default, capped by the current deadline"""
+    deadline = _current_deadline.get()
+    return deadline.timeout(default, floor) if deadline else default
+
+
+async def within(awaitable: Awaitable[Any], budget: Optional[float]) -> Any:
+    """Await with a budget in seconds (None: no limit); raises asyncio.TimeoutError"""
+    if budget is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable, timeout=budget)
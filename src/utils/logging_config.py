@@ -0,0 +1,254 @@
+"""
+Structured logging setup: orjson rendering, queued I/O, per-event sampling and redaction
+
+structlog loggers are level-filtering bound loggers whose final logger only
+puts the rendered line on a queue; a LogSink thread drains it and writes the
+lines in batches. Disabled levels are no-op methods and no stack frames are
+inspected on the event loop. Chatty per-message events can be sampled down to
+a share of occurrences, or to 0 where only the concierge_log_events_total
+counter is kept.
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, TextIO
+import structlog
+from src.utils.metrics import LOG_EVENTS_TOTAL
+from src.utils.tracing import add_trace_context
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+# Share of occurrences written per event (warnings and errors are never sampled)
+DEFAULT_SAMPLE_RATES: Dict[str, float] = {
+    "http_probe": 0.0,                  # /health and /metrics scrapes
+    "claude_message_sent": 0.0,         # latency and tokens are in the metrics
+    "creating_interaction": 0.0,
+    "redis_set_success": 0.0,
+    "claude_message_received": 0.1,
+    "family_lookup_completed": 0.1,
+    "name_search_completed": 0.1,
+}
+
+# Keys whose values never reach the logs (matched as substrings, case-insensitive)
+REDACTED_KEY_PARTS = ("authorization", "api_key", "api-key", "token", "secret", "password", "cookie")
+PHONE_KEYS = ("phone_number", "phone", "from_number", "to_number")
+REDACTED = "[redacted]"
+_SCALARS = {int, float, bool}
+# Never redacted or truncated (tracebacks must stay whole)
+_INTERNAL_KEYS = {"event", "level", "timestamp", "logger", "sample_rate", "trace_id", "span_id", "exception", "stack"}
+
+
+@lru_cache(maxsize=1024)
+def _is_secret(key: str) -> bool:
+    # Event keys are a small fixed set, so the substring scan runs once per key
+    lowered = key.lower()
+    return any(part in lowered for part in REDACTED_KEY_PARTS)
+
+
+def _dumps(obj: Any, **kwargs) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, default=str, ensure_ascii=False)
+
+
+class EventSampler:
+    """Drop a share of chosen info/debug events, counting every occurrence"""
+
+    def __init__(self, rates: Dict[str, float], rng: Optional[random.Random] = None):
+        self.rates = rates
+        self.random = (rng or random.Random()).random
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        event = event_dict.get("event")
+        rate = self.rates.get(event) if isinstance(event, str) else None
+        if rate is None or method_name in ("warning", "error", "critical", "exception"):
+            return event_dict
+        if rate >= 1.0 or (rate > 0.0 and self.random() < rate):
+            LOG_EVENTS_TOTAL.labels(event=event, outcome="written").inc()
+            if rate < 1.0:
+                event_dict["sample_rate"] = rate
+            return event_dict
+        LOG_EVENTS_TOTAL.labels(event=event, outcome="dropped").inc()
+        raise structlog.DropEvent
+
+
+class Redactor:
+    """Hide secrets, optionally mask phone numbers and cap long values"""
+
+    def __init__(self, max_value_chars: int = 512, mask_phone_numbers: bool = False, max_depth: int = 4):
+        self.max_value_chars = max_value_chars
+        self.mask_phone_numbers = mask_phone_numbers
+        self.max_depth = max_depth
+
+    def _clean(self, key: str, value: Any, depth: int) -> Any:
+        if value is None or value.__class__ in _SCALARS:
+            return REDACTED if _is_secret(key) else value
+        if _is_secret(key):
+            return REDACTED
+        if self.mask_phone_numbers and key in PHONE_KEYS and isinstance(value, str) and len(value) > 4:
+            return "*" * (len(value) - 4) + value[-4:]
+        if isinstance(value, str):
+            if len(value) > self.max_value_chars:
+                return f"{value[:self.max_value_chars]}...(+{len(value) - self.max_value_chars} chars)"
+            return value
+        if isinstance(value, dict):
+            if depth >= self.max_depth:
+                return f"<dict with {len(value)} keys>"
+            return {k: self._clean(str(k), v, depth + 1) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            if depth >= self.max_depth:
+                return f"<list of {len(value)}>"
+            return [self._clean(key, v, depth + 1) for v in value]
+        return value
+
+    def __call__(self, logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        for key, value in event_dict.items():
+            if key not in _INTERNAL_KEYS:
+                event_dict[key] = self._clean(key, value, 0)
+        return event_dict
+
+
+class LogSink:
+    """Background writer shared by structlog and the stdlib root logger"""
+
+    _STOP = object()
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+        self.queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+
+    def start(self) -> "LogSink":
+        self._thread.start()
+        return self
+
+    def write(self, line: str) -> None:
+        self.queue.put(line)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write the pending lines and end the thread"""
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    @staticmethod
+    def _format_record(record: logging.LogRecord) -> str:
+        # Third-party stdlib records get the same JSON shape as structlog events
+        line = {
+            "event": record.getMessage(),
+            "logger": record.name,
+            "level": record.levelname.lower(),
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat().replace("+00:00", "Z"),
+        }
+        if record.exc_info:
+            line["exception"] = logging.Formatter().formatException(record.exc_info)
+        return _dumps(line)
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            lines: List[str] = []
+            stop = False
+            while True:
+                if item is self._STOP:
+                    stop = True
+                    break
+                try:
+                    lines.append(item if isinstance(item, str) else self._format_record(item))
+                except Exception:  # a broken record must not kill the writer
+                    pass
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if lines:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+            if stop:
+                return
+
+
+class SinkLogger:
+    """structlog final logger: every level method enqueues the rendered line"""
+
+    def __init__(self, sink: LogSink, name: Optional[str] = None):
+        self.name = name
+        self._write = sink.write
+
+    def msg(self, message: str) -> None:
+        self._write(message)
+
+    debug = info = warning = warn = error = critical = exception = fatal = log = msg
+
+
+class _StdlibQueueHandler(logging.handlers.QueueHandler):
+    # The sink formats stdlib records itself, skip QueueHandler's copy and pre-format
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _add_logger_name(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    name = getattr(logger, "name", None)
+    if name:
+        event_dict["logger"] = name
+    return event_dict
+
+
+def configure_logging(
+    level: str = "INFO",
+    sample_rates: Optional[Dict[str, float]] = None,
+    mask_phone_numbers: bool = False,
+    max_value_chars: int = 512,
+    stream: Optional[TextIO] = None,
+) -> LogSink:
+    """
+    Configure structlog and the stdlib root logger
+
+    Args:
+        level: Minimum log level
+        sample_rates: Overrides merged into DEFAULT_SAMPLE_RATES
+        mask_phone_numbers: Keep only the last 4 digits of phone numbers
+        max_value_chars: Truncation length of string values
+        stream: Output stream (stdout by default)
+
+    Returns:
+        The started LogSink; stop() it on shutdown to flush pending lines
+    """
+    numeric_level = logging.getLevelName(level.upper())
+    if not isinstance(numeric_level, int):
+        numeric_level = logging.INFO
+    sink = LogSink(stream)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_StdlibQueueHandler(sink.queue))
+    root.setLevel(numeric_level)
+
+    structlog.configure(
+        processors=[
+            EventSampler({**DEFAULT_SAMPLE_RATES, **(sample_rates or {})}),
+            _add_logger_name,
+            add_trace_context,
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso", utc=True),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            Redactor(max_value_chars=max_value_chars, mask_phone_numbers=mask_phone_numbers),
+            structlog.processors.JSONRenderer(serializer=_dumps),
+        ],
+        wrapper_class=structlog.make_filtering_bound_logger(numeric_level),
+        logger_factory=lambda *args: SinkLogger(sink, args[0] if args else None),
+        cache_logger_on_first_use=True,
+    )
+    return sink.start()
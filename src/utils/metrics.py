@@ -0,0 +1,200 @@
+"""
+Prometheus metrics for the message pipeline and its dependencies
+"""
+
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, Optional, Any
+from prometheus_client import Counter, Gauge, Histogram
+from src.utils import tracing
+
+# Most stages are a few ms (cache, lookups); Claude generation and WAHA sends take seconds
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CALL_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "concierge_pipeline_stage_seconds",
+    "Duration of each stage of process_incoming_message",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+PIPELINE_SECONDS = Histogram(
+    "concierge_pipeline_seconds",
+    "End-to-end processing time of an incoming message",
+    ["outcome"],
+    buckets=STAGE_BUCKETS,
+)
+MESSAGES_TOTAL = Counter(
+    "concierge_messages_total",
+    "Processed incoming messages by classified intent and answering service",
+    ["intent", "service"],
+)
+INTENT_CLASSIFICATIONS_TOTAL = Counter(
+    "concierge_intent_classifications_total",
+    "Intent classifications by result and source (local pre-router or Claude)",
+    ["intent", "source"],
+)
+CLAUDE_TOKENS_TOTAL = Counter(
+    "concierge_claude_tokens_total",
+    "Claude token usage",
+    ["model", "direction"],
+)
+DEPENDENCY_CALL_SECONDS = Histogram(
+    "concierge_dependency_call_seconds",
+    "Latency of calls to Redis, Supabase and Claude",
+    ["dependency", "operation"],
+    buckets=CALL_BUCKETS,
+)
+DEPENDENCY_ERRORS_TOTAL = Counter(
+    "concierge_dependency_errors_total",
+    "Failed calls to Redis, Supabase and Claude",
+    ["dependency", "operation"],
+)
+QUEUE_DEPTH = Gauge(
+    "concierge_queue_depth",
+    "Messages waiting in a Redis priority queue",
+    ["queue"],
+)
+PIPELINE_DEGRADATIONS_TOTAL = Counter(
+    "concierge_pipeline_degradations_total",
+    "Messages answered in degraded mode because a stage ran out of budget",
+    ["reason"],
+)
+CACHE_LOOKUPS_TOTAL = Counter(
+    "concierge_cache_lookups_total",
+    "Two-tier cache lookups by the tier that answered (local, redis or miss)",
+    ["cache", "tier"],
+)
+CACHE_HIT_RATIO = Gauge(
+    "concierge_cache_hit_ratio",
+    "Share of lookups answered by the local or Redis tier since start",
+    ["cache"],
+)
+LOG_EVENTS_TOTAL = Counter(
+    "concierge_log_events_total",
+    "Occurrences of sampled log events, written or dropped",
+    ["event", "outcome"],
+)
+
+
+class StageTimer:
+    """Times the named stages of one message, feeds the stage histogram and opens a span per stage"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings_ms: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            with tracing.span(name):
+                yield
+        finally:
+            elapsed = time.perf_counter() - started
+            PIPELINE_STAGE_SECONDS.labels(stage=name).observe(elapsed)
+            self.timings_ms[name] = round(self.timings_ms.get(name, 0.0) + elapsed * 1000, 1)
+
+    @property
+    def elapsed_ms(self) -> int:
+        return int((time.perf_counter() - self.started) * 1000)
+
+    def finish(self, outcome: str) -> int:
+        """Record the end-to-end duration, returns it in milliseconds"""
+        PIPELINE_SECONDS.labels(outcome=outcome).observe(time.perf_counter() - self.started)
+        return self.elapsed_ms
+
+
+def record_dependency_error(dependency: str, operation: str) -> None:
+    """Count a failed dependency call (for callers that handle the error themselves)"""
+    DEPENDENCY_ERRORS_TOTAL.labels(dependency=dependency, operation=operation).inc()
+
+
+@contextmanager
+def observe_call(dependency: str, operation: str) -> Iterator[tracing.Span]:
+    """Time and trace one dependency call (errors are counted and re-raised)"""
+    started = time.perf_counter()
+    try:
+        with tracing.span(f"{dependency}.{operation}", kind="client", **{"peer.service": dependency}) as call_span:
+            yield call_span
+    except Exception:
+        record_dependency_error(dependency, operation)
+        raise
+    finally:
+        DEPENDENCY_CALL_SECONDS.labels(dependency=dependency, operation=operation).observe(
+            time.perf_counter() - started)
+
+
+def timed(dependency: str, operation: Optional[str] = None):
+    """Decorator version of observe_call for async methods
+
+    Only raised errors are counted: methods that catch their own exceptions
+    call record_dependency_error() in their except branch.
+    """
+    def decorator(func):
+        name = operation or func.__name__
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with observe_call(dependency, name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_claude_usage(model: str, usage: Optional[Dict[str, Any]]) -> None:
+    """Count input/output tokens reported by a Messages API response"""
+    if not usage:
+        return
+    for direction in ("input", "output"):
+        tokens = usage.get(f"{direction}_tokens")
+        if tokens:
+            CLAUDE_TOKENS_TOTAL.labels(model=model, direction=direction).inc(tokens)
+
+
+def _supabase_operation(request) -> str:
+    # /rest/v1/interactions -> "GET interactions", /rest/v1/rpc/search_people -> "POST rpc/search_people"
+    path = request.url.path.split("/rest/v1/", 1)[-1].strip("/")
+    return f"{request.method} {path or '/'}"
+
+
+def _mark_request_start(request) -> None:
+    request.extensions["metrics_started"] = time.perf_counter()
+
+
+def _observe_supabase_call(request, failed: bool) -> None:
+    started = request.extensions.pop("metrics_started", None)
+    if started is None:
+        return
+    operation = _supabase_operation(request)
+    DEPENDENCY_CALL_SECONDS.labels(dependency="supabase", operation=operation).observe(
+        time.perf_counter() - started)
+    if failed:
+        record_dependency_error("supabase", operation)
+
+
+def _observe_supabase_response(response) -> None:
+    _observe_supabase_call(response.request, response.status_code >= 400)
+
+
+def _observe_supabase_failure(request, error: BaseException) -> None:
+    # Connection errors and timeouts never produce a response
+    _observe_supabase_call(request, True)
+
+
+def instrument_supabase(client):
+    """Time and trace every PostgREST request of a supabase client (httpx event hooks,
+    plus a send() wrapper for requests failing before any response)"""
+    session = getattr(getattr(client, "postgrest", None), "session", None)
+    if session is None:
+        return client
+    tracing.instrument_http_client(session, "supabase")
+    hooks = session.event_hooks
+    if _mark_request_start not in hooks.get("request", []):
+        session.event_hooks = {
+            "request": list(hooks.get("request", [])) + [_mark_request_start],
+            "response": list(hooks.get("response", [])) + [_observe_supabase_response],
+        }
+        tracing.on_send_error(session, _observe_supabase_failure)
+    return client
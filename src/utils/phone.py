@@ -0,0 +1,177 @@
+"""
+Phone number helpers shared by WhatsApp identification and SDB lookups
+
+phonenumbers parsing is expensive and the same few thousand numbers recur on
+every webhook, so parsing goes through a bounded LRU cache keyed by the
+cheaply pre-normalized number: '221771234567@c.us', '221771234567' and
+'+221771234567' all share one entry.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+import phonenumbers
+
+_NON_DIGIT_RE = re.compile(r"\D")
+_E164_RE = re.compile(r"\+[1-9]\d{6,14}")
+
+DEFAULT_COUNTRY_CODE = "221"  # Senegal
+PHONE_CACHE_SIZE = 4096
+
+# Group, broadcast and linked-device addresses are accepted as-is, never parsed
+SPECIAL_SUFFIXES = ("@g.us", "@s.whatsapp.net")
+STATUS_BROADCAST = "status@broadcast"
+USER_JID_SUFFIXES = ("@c.us", "@s.whatsapp.net")
+
+
+def is_special_address(value: str) -> bool:
+    """WhatsApp addresses that are not plain phone numbers"""
+    return value == STATUS_BROADCAST or value.endswith(SPECIAL_SUFFIXES)
+
+
+def strip_jid(value: str) -> str:
+    """'221771234567@c.us' -> '221771234567' (other values unchanged)"""
+    if value.endswith(USER_JID_SUFFIXES):
+        return value.split("@", 1)[0]
+    return value
+
+
+def _candidate(value: str) -> str:
+    # WAHA sends international numbers without the leading +
+    if value.isdigit() and len(value) >= 8:
+        return f"+{value}"
+    return value
+
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _parse(candidate: str) -> Optional[Tuple[str, bool]]:
+    """(E.164, is_valid) for a pre-normalized number, None when unparsable"""
+    try:
+        parsed = phonenumbers.parse(candidate, None)
+    except phonenumbers.NumberParseException:
+        return None
+    return (phonenumbers.format_number(parsed, phonenumbers.PhoneNumberFormat.E164),
+            phonenumbers.is_valid_number(parsed))
+
+
+def normalize_phone_number(phone_number: str) -> str:
+    """
+    Normalize phone number to E.164 format (no validity check)
+
+    Args:
+        phone_number: E.164, WAHA digits or formatted number
+
+    Returns:
+        E.164 number, or special WhatsApp addresses unchanged
+
+    Raises:
+        ValueError: When the number cannot be parsed
+    """
+    if is_special_address(phone_number):
+        return phone_number
+    if _E164_RE.fullmatch(phone_number):
+        return phone_number
+    result = _parse(_candidate(phone_number))
+    if result is None:
+        raise ValueError(f"Cannot normalize phone number: {phone_number}")
+    return result[0]
+
+
+def is_valid_phone_number(phone_number: str) -> bool:
+    """Whether a number (or special WhatsApp address) is acceptable"""
+    if is_special_address(phone_number):
+        return True
+    result = _parse(_candidate(phone_number))
+    return bool(result and result[1])
+
+
+def validate_phone_number(phone_number: str) -> str:
+    """
+    Validate and canonicalize a phone number
+
+    Args:
+        phone_number: E.164, WAHA digits or formatted number
+
+    Returns:
+        E.164 number, or special WhatsApp addresses unchanged
+
+    Raises:
+        ValueError: When the number is unparsable or not a valid number
+    """
+    if is_special_address(phone_number):
+        return phone_number
+    result = _parse(_candidate(phone_number))
+    if result is None:
+        raise ValueError("Invalid phone number format")
+    if not result[1]:
+        raise ValueError("Invalid phone number")
+    return result[0]
+
+
+def from_whatsapp_id(chat_id: str) -> str:
+    """Sender id as received from WAHA -> '+' prefixed number when it is one"""
+    return _candidate(strip_jid(chat_id))
+
+
+def to_whatsapp_id(phone_number: str) -> str:
+    """
+    Digits-only number WAHA expects in front of '@c.us'
+
+    Args:
+        phone_number: Number in any format, or a full WhatsApp address
+
+    Returns:
+        Digits without '+', '00' or a leading trunk zero; addresses unchanged
+
+    Raises:
+        ValueError: When the number is empty or has no digits
+    """
+    if not phone_number or phone_number.strip() == "":
+        raise ValueError("Phone number cannot be empty")
+    if "@" in phone_number:
+        return phone_number
+    # Already in WAHA form
+    if phone_number.isdigit() and phone_number[0] != "0":
+        return phone_number
+
+    cleaned = _NON_DIGIT_RE.sub("", phone_number)
+    if not cleaned:
+        raise ValueError(f"Invalid phone number: {phone_number}")
+    if cleaned.startswith("00"):
+        cleaned = cleaned[2:]
+    elif cleaned.startswith("0") and len(cleaned) > 1:
+        cleaned = cleaned[1:]
+    return cleaned
+
+
+def phone_cache_info():
+    """Hit/miss statistics of the parse cache"""
+    return _parse.cache_info()
+
+
+def to_e164(phone_number: Optional[str], country_code: str = DEFAULT_COUNTRY_CODE) -> Optional[str]:
+    """
+    Canonical E.164 form used as lookup key ('776408591', '221776408591@c.us',
+    '+221 77 640 85 91' and '00221776408591' all give '+221776408591')
+
+    Mirrors the phone_e164() SQL function backing the parents.telephone_e164
+    generated column, so both sides must change together.
+
+    Args:
+        phone_number: Number as stored in SDB or received from WAHA
+        country_code: Prefix for national numbers (9 digits or less)
+
+    Returns:
+        E.164 number, or None when there are no digits
+    """
+    if not phone_number:
+        return None
+    digits = _NON_DIGIT_RE.sub("", phone_number.split("@", 1)[0])
+    if digits.startswith("00"):
+        return f"+{digits[2:]}"
+    digits = digits.lstrip("0")  # national trunk prefix
+    if not digits:
+        return None
+    if len(digits) <= 9:
+        return f"+{country_code}{digits}"
+    return f"+{digits}"
@@ -0,0 +1,21 @@
+"""
+Text normalization helpers shared by local classification and retrieval
+"""
+
+import re
+import unicodedata
+from typing import List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip accents so 'Catéchèse' and 'catechese' match"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.lower().strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into alphanumeric tokens"""
+    return _TOKEN_RE.findall(normalize_text(text))
@@ -0,0 +1,373 @@
+"""
+Lightweight in-process tracing: spans over contextvars, exported as OTLP/JSON
+
+A span opened in handle_webhook becomes the parent of everything awaited
+below it (pipeline stages, Claude, WAHA, Redis and Supabase calls), including
+code run through asyncio.to_thread. Finished spans are batched on a thread
+and written to a JSON-lines file or POSTed to an OTLP/HTTP collector
+(/v1/traces); with no exporter configured spans still carry IDs, so trace_id
+and span_id show up in the logs and in interaction metadata.
+"""
+
+import json
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import httpx
+import structlog
+
+logger = structlog.get_logger()
+
+SERVICE_NAME = "ai-concierge"
+# OTLP span kinds
+KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_random_bits = random.SystemRandom().getrandbits
+
+
+class Span:
+    """One timed operation of a trace"""
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, kind: str = "internal", parent: Optional["Span"] = None,
+                 trace_id: Optional[str] = None, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else (trace_id or f"{_random_bits(128):032x}")
+        self.span_id = f"{_random_bits(64):016x}"
+        self.parent_id = parent.span_id if parent else parent_id
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace context header value"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: Any) -> None:
+        self.error = str(error) or error.__class__.__name__
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": KINDS.get(self.kind, 1),
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple]:
+    """(trace_id, parent_span_id) of a W3C traceparent header, None if invalid"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32:
+        return None
+    return parts[1], parts[2]
+
+
+def otlp_request(spans: List[Span], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """ExportTraceServiceRequest body (OTLP/JSON encoding)"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": service_name})},
+            "scopeSpans": [{"scope": {"name": "src.utils.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+        }]
+    }
+
+
+class FileSpanExporter:
+    """Append one OTLP/JSON export request per batch to a file (collector file format)"""
+
+    def __init__(self, path: str, service_name: str = SERVICE_NAME):
+        self.path = path
+        self.service_name = service_name
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(otlp_request(spans, self.service_name), separators=(",", ":")) + "\n")
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OTLPHttpSpanExporter:
+    """POST batches to an OTLP/HTTP collector, e.g. http://otel-collector:4318"""
+
+    def __init__(self, endpoint: str, service_name: str = SERVICE_NAME, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.client = httpx.Client(timeout=timeout)
+
+    def export(self, spans: List[Span]) -> None:
+        response = self.client.post(self.url, json=otlp_request(spans, self.service_name))
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self.client.close()
+
+
+class BatchSpanProcessor:
+    """Queue finished spans and export them from a background thread"""
+
+    _STOP = object()
+
+    def __init__(self, exporter, max_batch_size: int = 256, flush_interval: float = 2.0):
+        self.exporter = exporter
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        self.queue.put(span)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Export the pending spans and end the thread"""
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join(timeout)
+        self.exporter.shutdown()
+
+    def _export(self, batch: List[Span]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning("span_export_failed", spans=len(batch), error=str(e))
+
+    def _run(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self.queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+            if item is self._STOP:
+                if batch:
+                    self._export(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if batch and (len(batch) >= self.max_batch_size or time.monotonic() >= deadline):
+                self._export(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the processor (if any)"""
+
+    def __init__(self, processor: Optional[BatchSpanProcessor] = None):
+        self.processor = processor
+
+    def start_span(self, name: str, kind: str = "internal", traceparent: Optional[str] = None,
+                   **attributes) -> Span:
+        """Start a span under the current one without activating it (for callbacks)"""
+        parent = _current_span.get()
+        remote = parse_traceparent(traceparent) if parent is None else None
+        if remote:
+            return Span(name, kind, trace_id=remote[0], parent_id=remote[1], attributes=attributes)
+        return Span(name, kind, parent=parent, attributes=attributes)
+
+    def end_span(self, span: Span, error: Any = None) -> None:
+        if span.end_ns is not None:
+            return
+        if error is not None:
+            span.record_error(error)
+        span.end_ns = time.time_ns()
+        if self.processor is not None:
+            self.processor.on_end(span)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", traceparent: Optional[str] = None,
+             **attributes) -> Iterator[Span]:
+        """Start a span and make it the current one for the enclosed block"""
+        span = self.start_span(name, kind, traceparent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end_span(span)
+
+
+tracer = Tracer()
+span = tracer.span
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    active = _current_span.get()
+    return active.trace_id if active else None
+
+
+def add_trace_context(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """structlog processor: tag events logged inside a span"""
+    active = _current_span.get()
+    if active is not None:
+        event_dict.setdefault("trace_id", active.trace_id)
+        event_dict.setdefault("span_id", active.span_id)
+    return event_dict
+
+
+def configure_tracing(exporter: str = "none", file_path: str = "traces.jsonl",
+                      otlp_endpoint: str = "http://localhost:4318",
+                      service_name: str = SERVICE_NAME) -> Tracer:
+    """
+    Select where finished spans go
+
+    Args:
+        exporter: "none", "file" or "otlp"
+        file_path: JSON-lines output of the file exporter
+        otlp_endpoint: Collector base URL of the OTLP/HTTP exporter
+        service_name: service.name resource attribute
+
+    Returns:
+        The module tracer; call shutdown_tracing() on exit to flush
+    """
+    shutdown_tracing()
+    if exporter == "file":
+        tracer.processor = BatchSpanProcessor(FileSpanExporter(file_path, service_name))
+    elif exporter == "otlp":
+        tracer.processor = BatchSpanProcessor(OTLPHttpSpanExporter(otlp_endpoint, service_name))
+    elif exporter != "none":
+        logger.warning("unknown_tracing_exporter", exporter=exporter)
+    return tracer
+
+
+def shutdown_tracing() -> None:
+    if tracer.processor is not None:
+        tracer.processor.shutdown()
+        tracer.processor = None
+
+
+def _start_http_span(request: httpx.Request, peer: str) -> None:
+    active = tracer.start_span(f"{peer} {request.method} {request.url.path}", kind="client",
+                               **{"peer.service": peer, "http.method": request.method})
+    request.extensions["trace_span"] = active
+    request.headers["traceparent"] = active.traceparent
+
+
+def _end_http_span(response: httpx.Response) -> None:
+    active = response.request.extensions.pop("trace_span", None)
+    if active is None:
+        return
+    active.set_attribute("http.status_code", response.status_code)
+    tracer.end_span(active, error=f"HTTP {response.status_code}" if response.status_code >= 400 else None)
+
+
+def _fail_http_span(request: httpx.Request, error: BaseException) -> None:
+    active = request.extensions.pop("trace_span", None)
+    if active is not None:
+        tracer.end_span(active, error=f"{type(error).__name__}: {error}")
+
+
+def on_send_error(client, callback: Callable[[httpx.Request, BaseException], None]):
+    """
+    Call callback(request, error) when a request of an httpx client raises
+
+    Response hooks only run when a response arrives; connection errors,
+    timeouts and cancellations are seen by wrapping the client's send().
+    """
+    send = client.send
+
+    if isinstance(client, httpx.AsyncClient):
+        async def guarded_send(request, *args, **kwargs):
+            try:
+                return await send(request, *args, **kwargs)
+            except BaseException as e:
+                callback(request, e)
+                raise
+    else:
+        def guarded_send(request, *args, **kwargs):
+            try:
+                return send(request, *args, **kwargs)
+            except BaseException as e:
+                callback(request, e)
+                raise
+
+    client.send = guarded_send
+    return client
+
+
+def instrument_http_client(client, peer: str):
+    """Trace every request of an httpx client (sync or async) and send traceparent
+
+    Spans end on the response, or with an error when the request raises.
+    """
+    hooks = client.event_hooks
+    if any(getattr(hook, "_traced_peer", None) for hook in hooks.get("request", [])):
+        return client
+
+    if isinstance(client, httpx.AsyncClient):
+        async def on_request(request):
+            _start_http_span(request, peer)
+
+        async def on_response(response):
+            _end_http_span(response)
+    else:
+        def on_request(request):
+            _start_http_span(request, peer)
+
+        def on_response(response):
+            _end_http_span(response)
+
+    on_request._traced_peer = peer
+    client.event_hooks = {
+        "request": list(hooks.get("request", [])) + [on_request],
+        "response": list(hooks.get("response", [])) + [on_response],
+    }
+    return on_send_error(client, _fail_http_span)
@@ -0,0 +1,301 @@
+"""
+Local SQLite snapshot of the SDB tables for offline reporting
+
+    python sdb_snapshot.py refresh [--full] [--tables catechumenes inscriptions]
+    python sdb_snapshot.py info
+
+- Tables are materialized into one indexed SQLite file (SDB_SNAPSHOT_PATH,
+  default sdb_snapshot.db)
+- Refresh is incremental: only rows with updated_at >= the last mark are
+  fetched, and rows deleted upstream are removed after an ids-only pass
+- SDBSupabase(snapshot=...) and catechumen_analytics (--source snapshot) read
+  from it instead of the network
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_PATH = os.getenv("SDB_SNAPSHOT_PATH", "sdb_snapshot.db")
+PAGE_SIZE = 1000
+
+# table -> columns to index (besides the id primary key)
+SNAPSHOT_TABLES: Dict[str, List[str]] = {
+    'annees_scolaires': ['annee_nom', 'active'],
+    'classes': ['classe_nom', 'niveau'],
+    'parents': ['code_parent', 'telephone', 'telephone_e164', 'telephone2_e164'],
+    'catechumenes': ['id_catechumene', 'code_parent', 'nom', 'prenoms'],
+    'inscriptions': ['id_catechumene', 'id_classe_courante', 'id_annee_inscription', 'date_inscription', 'etat'],
+    'notes': ['id_catechumene', 'id_inscription', 'annee_scolaire'],
+}
+
+
+def _to_sqlite(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+class SDBSnapshot:
+    """Indexed SQLite copy of the SDB tables, refreshed incrementally from Supabase"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self.connection as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS _snapshot_state (
+                    table_name TEXT PRIMARY KEY,
+                    high_water_mark TEXT,
+                    row_count INTEGER,
+                    refreshed_at TEXT
+                )""")
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not shareable)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def _columns(self, table: str) -> List[str]:
+        return [row['name'] for row in self.connection.execute(f'PRAGMA table_info("{table}")')]
+
+    def _ensure_table(self, table: str, columns: List[str]) -> None:
+        existing = self._columns(table)
+        if not existing:
+            others = ', '.join(f'"{c}"' for c in columns if c != 'id')
+            self.connection.execute(f'CREATE TABLE "{table}" (id TEXT PRIMARY KEY{", " + others if others else ""})')
+        else:
+            for column in columns:
+                if column not in existing:
+                    self.connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}"')
+        for column in SNAPSHOT_TABLES.get(table, []):
+            if column in columns and column not in existing:
+                self.connection.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{column}" ON "{table}"("{column}")')
+
+    def _upsert(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        columns = sorted({key for row in rows for key in row})
+        self._ensure_table(table, columns)
+        placeholders = ', '.join('?' for _ in columns)
+        column_list = ', '.join(f'"{c}"' for c in columns)
+        self.connection.executemany(
+            f'INSERT OR REPLACE INTO "{table}" ({column_list}) VALUES ({placeholders})',
+            [tuple(_to_sqlite(row.get(c)) for c in columns) for row in rows],
+        )
+
+    @staticmethod
+    def _fetch_changed(client, table: str, since: Optional[str]) -> Iterator[List[Dict[str, Any]]]:
+        """Full load: keyset on id. Incremental: rows with updated_at >= since"""
+        if since is None:
+            last = None
+            while True:
+                query = client.table(table).select('*').order('id').limit(PAGE_SIZE)
+                if last is not None:
+                    query = query.gt('id', last)
+                rows = query.execute().data or []
+                if rows:
+                    yield rows
+                if len(rows) < PAGE_SIZE:
+                    return
+                last = rows[-1]['id']
+        offset = 0
+        while True:
+            rows = (client.table(table).select('*').gte('updated_at', since)
+                    .order('updated_at').order('id').range(offset, offset + PAGE_SIZE - 1).execute().data or [])
+            if rows:
+                yield rows
+            if len(rows) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+
+    @staticmethod
+    def _fetch_ids(client, table: str) -> set:
+        ids, last = set(), None
+        while True:
+            query = client.table(table).select('id').order('id').limit(PAGE_SIZE)
+            if last is not None:
+                query = query.gt('id', last)
+            rows = query.execute().data or []
+            ids.update(str(row['id']) for row in rows)
+            if len(rows) < PAGE_SIZE:
+                return ids
+            last = rows[-1]['id']
+
+    def refresh_table(self, client, table: str, full: bool = False) -> Dict[str, Any]:
+        state = self.state().get(table, {})
+        since = None if full or not self._columns(table) else state.get('high_water_mark')
+        conn = self.connection
+        changed, mark = 0, since
+        with conn:
+            if since is None:
+                conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            for rows in self._fetch_changed(client, table, since):
+                self._upsert(table, rows)
+                changed += len(rows)
+                stamps = [row['updated_at'] for row in rows if row.get('updated_at')]
+                if stamps:
+                    mark = max(stamps + ([mark] if mark else []))
+
+            deleted = 0
+            if since is not None and self._columns(table):
+                local_ids = {row[0] for row in conn.execute(f'SELECT id FROM "{table}"')}
+                gone = local_ids - self._fetch_ids(client, table)
+                conn.executemany(f'DELETE FROM "{table}" WHERE id = ?', [(i,) for i in gone])
+                deleted = len(gone)
+
+            row_count = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] if self._columns(table) else 0
+            conn.execute(
+                "INSERT OR REPLACE INTO _snapshot_state VALUES (?, ?, ?, ?)",
+                (table, mark, row_count, datetime.now(timezone.utc).isoformat()),
+            )
+        return {'changed': changed, 'deleted': deleted, 'rows': row_count, 'full': since is None}
+
+    def refresh(self, client, tables: Optional[List[str]] = None, full: bool = False) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for table in tables or SNAPSHOT_TABLES:
+            try:
+                results[table] = self.refresh_table(client, table, full)
+                stats = results[table]
+                mode = "full" if stats['full'] else "incremental"
+                print(f"  ✅ {table} ({mode}): {stats['changed']} fetched, {stats['deleted']} deleted, "
+                      f"{stats['rows']} rows")
+            except Exception as e:
+                print(f"  ❌ {table}: {e}")
+                results[table] = {'error': str(e)}
+        return results
+
+    def state(self) -> Dict[str, Dict[str, Any]]:
+        return {row['table_name']: dict(row) for row in self.connection.execute("SELECT * FROM _snapshot_state")}
+
+    def has_table(self, table: str) -> bool:
+        return bool(self._columns(table))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def search_students(self, search_term: str) -> List[Dict]:
+        """Same result shape as the search_students RPC"""
+        like = f"%{search_term}%"
+        return self.query("""
+            SELECT c.id_catechumene, c.prenoms, c.nom, c.code_parent,
+                   cl.classe_nom AS current_classe, an.annee_nom AS current_annee
+            FROM catechumenes c
+            LEFT JOIN inscriptions i ON c.id_catechumene = i.id_catechumene
+                AND i.etat = 'Inscription Validée'
+                AND i.id_annee_inscription = (SELECT id FROM annees_scolaires WHERE active = 1 LIMIT 1)
+            LEFT JOIN classes cl ON i.id_classe_courante = cl.id
+            LEFT JOIN annees_scolaires an ON i.id_annee_inscription = an.id
+            WHERE c.nom LIKE ? OR c.prenoms LIKE ? OR (c.nom || ' ' || c.prenoms) LIKE ?
+            ORDER BY c.nom, c.prenoms""", (like, like, like))
+
+    def get_student_info(self, id_catechumene: str) -> Optional[Dict]:
+        """Same result shape as the get_student_info RPC"""
+        rows = self.query("""
+            SELECT c.id_catechumene, c.prenoms, c.nom, c.baptise, c.lieu_bapteme, c.annee_naissance,
+                   c.code_parent, p.prenoms AS parent_prenoms, p.nom AS parent_nom,
+                   p.telephone AS parent_telephone, cl.classe_nom AS current_classe,
+                   an.annee_nom AS current_annee, i.resultat_final, i.note_finale
+            FROM catechumenes c
+            LEFT JOIN parents p ON c.code_parent = p.code_parent
+            LEFT JOIN inscriptions i ON c.id_catechumene = i.id_catechumene
+                AND i.etat = 'Inscription Validée'
+                AND i.id_annee_inscription = (SELECT id FROM annees_scolaires WHERE active = 1 LIMIT 1)
+            LEFT JOIN classes cl ON i.id_classe_courante = cl.id
+            LEFT JOIN annees_scolaires an ON i.id_annee_inscription = an.id
+            WHERE c.id_catechumene = ?""", (id_catechumene,))
+        return rows[0] if rows else None
+
+    def get_student_grades(self, id_catechumene: str) -> List[Dict]:
+        if not self.has_table('notes'):
+            return []
+        return self.query("""
+            SELECT annee_scolaire, trimestre, note, appreciation, absences FROM notes
+            WHERE id_catechumene = ? ORDER BY annee_scolaire DESC, trimestre""", (id_catechumene,))
+
+    def get_student_inscriptions(self, id_catechumene: str) -> List[Dict]:
+        return self.query("SELECT * FROM inscriptions WHERE id_catechumene = ? ORDER BY date_inscription DESC",
+                          (id_catechumene,))
+
+    def get_parent_info(self, code_parent: str) -> Optional[Dict]:
+        rows = self.query("SELECT * FROM parents WHERE code_parent = ? LIMIT 1", (code_parent,))
+        return rows[0] if rows else None
+
+    def search_parent(self, search_term: str) -> List[Dict]:
+        like = f"%{search_term}%"
+        return self.query("SELECT * FROM parents WHERE prenoms LIKE ? OR nom LIKE ? OR telephone LIKE ?",
+                          (like, like, like))
+
+    def get_classes(self) -> List[Dict]:
+        return self.query("SELECT * FROM classes ORDER BY niveau")
+
+    def get_current_year_id(self) -> Optional[str]:
+        rows = self.query("SELECT id FROM annees_scolaires WHERE active = 1 LIMIT 1")
+        return rows[0]['id'] if rows else None
+
+    def get_class_stats(self, classe_id: str, annee_id: str) -> Dict:
+        row = self.query("""
+            SELECT SUM(CASE WHEN etat = 'Inscription Validée' THEN 1 ELSE 0 END) AS total_students,
+                   COALESCE(SUM(montant), 0) AS total_montant, COALESCE(SUM(paye), 0) AS total_paye
+            FROM inscriptions WHERE id_classe_courante = ? AND id_annee_inscription = ?""",
+                         (classe_id, annee_id))[0]
+        total_montant = row['total_montant'] or 0
+        return {
+            'total_students': row['total_students'] or 0,
+            'total_montant': total_montant,
+            'total_paye': row['total_paye'] or 0,
+            'payment_rate': (row['total_paye'] / total_montant * 100) if total_montant > 0 else 0,
+        }
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local SQLite snapshot of the SDB tables")
+    parser.add_argument('--path', default=DEFAULT_PATH, help="Snapshot file (default: $SDB_SNAPSHOT_PATH)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    refresh = sub.add_parser('refresh', help="Fetch changed rows since the last refresh")
+    refresh.add_argument('--full', action='store_true', help="Reload the tables from scratch")
+    refresh.add_argument('--tables', nargs='*', choices=list(SNAPSHOT_TABLES))
+    sub.add_parser('info', help="Show snapshot tables and freshness")
+    args = parser.parse_args(argv)
+
+    snapshot = SDBSnapshot(args.path)
+    if args.command == 'refresh':
+        from supabase_config import get_supabase_client
+
+        print(f"🔄 Refreshing snapshot {args.path}...")
+        results = snapshot.refresh(get_supabase_client(), args.tables, args.full)
+        return 1 if any('error' in r for r in results.values()) else 0
+
+    for table, state in snapshot.state().items():
+        print(f"📦 {table}: {state['row_count']} rows, refreshed {state['refreshed_at']}, "
+              f"mark {state['high_water_mark']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
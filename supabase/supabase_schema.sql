@@ -337,4 +337,193 @@ BEGIN
        OR (c.nom || ' ' || c.prenoms) ILIKE '%' || p_search_term || '%'
     ORDER BY c.nom, c.prenoms;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+-- 11. SYNC_STATE table (incremental Baserow -> Supabase sync, see sdb/delta_sync.py)
+CREATE TABLE IF NOT EXISTS sync_state (
+    table_name TEXT PRIMARY KEY,
+    baserow_table_id INTEGER,
+    high_water_mark TIMESTAMP WITH TIME ZONE, -- max Baserow "last modified" value synced
+    last_row_id BIGINT DEFAULT 0,              -- max Baserow row id synced (insert-only tables)
+    rows_synced BIGINT DEFAULT 0,
+    last_run_at TIMESTAMP WITH TIME ZONE,
+    last_status TEXT,                          -- ok | error
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE TRIGGER set_timestamp_sync_state
+    BEFORE UPDATE ON sync_state
+    FOR EACH ROW
+    EXECUTE PROCEDURE trigger_set_timestamp();
+
+-- 12. ANALYTICS (grouped counts for catechumen_analytics.py)
+-- Academic year runs from September to August: 2023-09-15 -> '2023-2024'
+-- (mirrors get_academic_year() in catechumen_analytics.py). Takes a DATE so the
+-- result does not depend on the session TimeZone; callers convert timestamps
+-- at UTC, like the ISO strings the Python side reads.
+DROP FUNCTION IF EXISTS academic_year(TIMESTAMP WITH TIME ZONE);
+CREATE OR REPLACE FUNCTION academic_year(p_date DATE)
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN p_date IS NULL THEN NULL
+        WHEN EXTRACT(MONTH FROM p_date) >= 9 THEN
+            EXTRACT(YEAR FROM p_date)::INT || '-' || (EXTRACT(YEAR FROM p_date)::INT + 1)
+        ELSE
+            (EXTRACT(YEAR FROM p_date)::INT - 1) || '-' || EXTRACT(YEAR FROM p_date)::INT
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Inscriptions counted per academic year x class x status x result
+CREATE OR REPLACE FUNCTION inscription_stats()
+RETURNS TABLE(
+    academic_year TEXT,
+    classe_nom TEXT,
+    niveau TEXT,
+    etat TEXT,
+    resultat_final TEXT,
+    inscriptions BIGINT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        academic_year((i.date_inscription AT TIME ZONE 'UTC')::DATE),
+        cl.classe_nom,
+        cl.niveau,
+        i.etat::TEXT,
+        i.resultat_final,
+        COUNT(*)
+    FROM inscriptions i
+    LEFT JOIN classes cl ON i.id_classe_courante = cl.id
+    GROUP BY 1, 2, 3, 4, 5;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Catechumenes counted per baptism / documents / birth year
+CREATE OR REPLACE FUNCTION catechumene_stats()
+RETURNS TABLE(
+    baptise TEXT,
+    extrait_naissance_fourni TEXT,
+    extrait_bapteme_fourni TEXT,
+    attestation_transfert_fournie TEXT,
+    annee_naissance TEXT,
+    catechumenes BIGINT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        c.baptise::TEXT,
+        c.extrait_naissance_fourni::TEXT,
+        c.extrait_bapteme_fourni::TEXT,
+        c.attestation_transfert_fournie::TEXT,
+        c.annee_naissance,
+        COUNT(*)
+    FROM catechumenes c
+    GROUP BY 1, 2, 3, 4, 5;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 13. FUZZY NAME SEARCH (ranked, accent-insensitive; used by src/services/name_search_service.py)
+CREATE EXTENSION IF NOT EXISTS "unaccent";
+
+-- unaccent() is STABLE; an IMMUTABLE wrapper is needed to index expressions
+CREATE OR REPLACE FUNCTION f_unaccent(p_text TEXT)
+RETURNS TEXT AS $$
+    SELECT public.unaccent('public.unaccent', p_text);
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+CREATE INDEX IF NOT EXISTS idx_catechumenes_name_trgm ON catechumenes
+    USING gin (f_unaccent(lower(prenoms || ' ' || nom)) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_parents_name_trgm ON parents
+    USING gin (f_unaccent(lower(prenoms || ' ' || COALESCE(nom, ''))) gin_trgm_ops);
+
+-- p_kind: NULL (both), 'catechumene' or 'parent'
+CREATE OR REPLACE FUNCTION search_people(
+    p_query TEXT,
+    p_kind TEXT DEFAULT NULL,
+    p_limit INTEGER DEFAULT 10,
+    p_min_score REAL DEFAULT 0.3
+)
+RETURNS TABLE(
+    kind TEXT,
+    id TEXT,
+    prenoms TEXT,
+    nom TEXT,
+    code_parent TEXT,
+    telephone TEXT,
+    score REAL
+) AS $$
+DECLARE
+    q TEXT := f_unaccent(lower(trim(p_query)));
+BEGIN
+    -- Threshold of the <% operator, so the GIN indexes prefilter the candidates
+    PERFORM set_config('pg_trgm.word_similarity_threshold', p_min_score::TEXT, true);
+    RETURN QUERY
+    SELECT * FROM (
+        SELECT 'catechumene'::TEXT, c.id_catechumene, c.prenoms, c.nom, c.code_parent, NULL::TEXT,
+               word_similarity(q, f_unaccent(lower(c.prenoms || ' ' || c.nom)))
+        FROM catechumenes c
+        WHERE (p_kind IS NULL OR p_kind = 'catechumene')
+          AND q <% f_unaccent(lower(c.prenoms || ' ' || c.nom))
+        UNION ALL
+        SELECT 'parent'::TEXT, p.code_parent, p.prenoms, p.nom, p.code_parent, p.telephone,
+               word_similarity(q, f_unaccent(lower(p.prenoms || ' ' || COALESCE(p.nom, ''))))
+        FROM parents p
+        WHERE (p_kind IS NULL OR p_kind = 'parent')
+          AND q <% f_unaccent(lower(p.prenoms || ' ' || COALESCE(p.nom, '')))
+    ) AS matches
+    ORDER BY 7 DESC
+    LIMIT p_limit;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- 14. PHONE LOOKUP (WhatsApp sender -> parent -> children; used by src/services/family_service.py)
+-- Must stay in sync with src.utils.phone.to_e164
+CREATE OR REPLACE FUNCTION phone_e164(p_phone TEXT)
+RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN d LIKE '00%' THEN '+' || substr(d, 3)
+        WHEN ltrim(d, '0') = '' THEN NULL
+        WHEN length(ltrim(d, '0')) <= 9 THEN '+221' || ltrim(d, '0')
+        ELSE '+' || ltrim(d, '0')
+    END
+    FROM (SELECT regexp_replace(split_part(p_phone, '@', 1), '\D', '', 'g') AS d) AS digits;
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+ALTER TABLE parents ADD COLUMN IF NOT EXISTS telephone_e164 TEXT
+    GENERATED ALWAYS AS (phone_e164(telephone)) STORED;
+ALTER TABLE parents ADD COLUMN IF NOT EXISTS telephone2_e164 TEXT
+    GENERATED ALWAYS AS (phone_e164(telephone2)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_parents_telephone_e164 ON parents(telephone_e164);
+CREATE INDEX IF NOT EXISTS idx_parents_telephone2_e164 ON parents(telephone2_e164);
+
+-- Parent (primary number first), children and each child's current inscription in one call;
+-- NULL when no parent has this number
+CREATE OR REPLACE FUNCTION get_family_by_phone(p_phone TEXT)
+RETURNS JSONB AS $$
+    WITH parent AS (
+        SELECT * FROM parents
+        WHERE telephone_e164 = phone_e164(p_phone)
+           OR telephone2_e164 = phone_e164(p_phone)
+        ORDER BY (telephone_e164 = phone_e164(p_phone)) DESC, actif DESC
+        LIMIT 1
+    )
+    SELECT jsonb_build_object(
+        'parent', to_jsonb(parent) - 'telephone_e164' - 'telephone2_e164',
+        'children', COALESCE((
+            SELECT jsonb_agg(to_jsonb(c) || jsonb_build_object('inscription', (
+                SELECT to_jsonb(i) || jsonb_build_object('classe_nom', cl.classe_nom, 'annee_nom', a.annee_nom)
+                FROM inscriptions i
+                LEFT JOIN classes cl ON cl.id = i.id_classe_courante
+                LEFT JOIN annees_scolaires a ON a.id = i.id_annee_inscription
+                WHERE i.id_catechumene = c.id_catechumene
+                ORDER BY a.active DESC NULLS LAST, i.date_inscription DESC NULLS LAST
+                LIMIT 1
+            )) ORDER BY c.prenoms)
+            FROM catechumenes c
+            WHERE c.code_parent = parent.code_parent
+        ), '[]'::jsonb)
+    )
+    FROM parent;
+$$ LANGUAGE sql STABLE;
@@ -4,19 +4,47 @@ Supabase Utilities for SDB Operations
 
 from datetime import datetime
 from typing import List, Dict, Optional, Any
-from supabase_config import get_supabase_client, get_supabase_anon_client
 import json
+import os
 
 class SDBSupabase:
-    """SDB Supabase operations class"""
+    """SDB Supabase operations class
+
+    With a snapshot (SDBSupabase(snapshot=...) or SDB_USE_SNAPSHOT=1), read
+    operations are answered from the local SQLite copy (see sdb_snapshot.py);
+    writes always go to Supabase.
+    """
+    
+    def __init__(self, snapshot=None):
+        self._client = None
+        self._anon_client = None
+        if snapshot is None and os.getenv('SDB_USE_SNAPSHOT', '').lower() in ('1', 'true', 'yes'):
+            snapshot = os.getenv('SDB_SNAPSHOT_PATH', 'sdb_snapshot.db')
+        if isinstance(snapshot, str):
+            from sdb_snapshot import SDBSnapshot
+            snapshot = SDBSnapshot(snapshot)
+        self.snapshot = snapshot
+    
+    # Clients are created on first use so snapshot reads work offline
+    @property
+    def client(self):
+        if self._client is None:
+            from supabase_config import get_supabase_client
+            self._client = get_supabase_client()
+        return self._client
     
-    def __init__(self):
-        self.client = get_supabase_client()
-        self.anon_client = get_supabase_anon_client()
+    @property
+    def anon_client(self):
+        if self._anon_client is None:
+            from supabase_config import get_supabase_anon_client
+            self._anon_client = get_supabase_anon_client()
+        return self._anon_client
     
     # Student Operations
     def search_student(self, search_term: str) -> List[Dict]:
         """Search for students by name"""
+        if self.snapshot:
+            return self.snapshot.search_students(search_term)
         try:
             result = self.anon_client.rpc('search_students', {'p_search_term': search_term}).execute()
             return result.data if result.data else []
@@ -26,6 +54,8 @@ class SDBSupabase:
     
     def get_student_info(self, id_catechumene: str) -> Optional[Dict]:
         """Get complete student information"""
+        if self.snapshot:
+            return self.snapshot.get_student_info(id_catechumene)
         try:
             result = self.anon_client.rpc('get_student_info', {'p_id_catechumene': id_catechumene}).execute()
             return result.data[0] if result.data else None
@@ -35,6 +65,8 @@ class SDBSupabase:
     
     def get_student_grades(self, id_catechumene: str) -> List[Dict]:
         """Get student grades history"""
+        if self.snapshot:
+            return self.snapshot.get_student_grades(id_catechumene)
         try:
             result = self.anon_client.rpc('get_student_grades', {'p_id_catechumene': id_catechumene}).execute()
             return result.data if result.data else []
@@ -44,6 +76,8 @@ class SDBSupabase:
     
     def get_student_inscriptions(self, id_catechumene: str) -> List[Dict]:
         """Get student inscription history"""
+        if self.snapshot:
+            return self.snapshot.get_student_inscriptions(id_catechumene)
         try:
             result = (self.anon_client.table('inscriptions')
                       .select('*')
@@ -58,6 +92,8 @@ class SDBSupabase:
     # Parent Operations
     def get_parent_info(self, code_parent: str) -> Optional[Dict]:
         """Get parent information"""
+        if self.snapshot:
+            return self.snapshot.get_parent_info(code_parent)
         try:
             result = (self.anon_client.table('parents')
                       .select('*')
@@ -71,10 +107,29 @@ class SDBSupabase:
     
     def search_parent(self, search_term: str) -> List[Dict]:
         """Search for parents"""
+        if self.snapshot:
+            return self.snapshot.search_parent(search_term)
+        try:
+            if not search_term.strip().lstrip('+').isdigit():
+                # Ranked, accent-insensitive match on the trigram index
+                result = self.anon_client.rpc('search_people', {
+                    'p_query': search_term, 'p_kind': 'parent', 'p_limit': 20
+                }).execute()
+                codes = [row['code_parent'] for row in result.data or []]
+                if not codes:
+                    return []
+                rows = (self.anon_client.table('parents')
+                        .select('*')
+                        .in_('code_parent', codes)
+                        .execute()).data or []
+                rank = {code: i for i, code in enumerate(codes)}
+                return sorted(rows, key=lambda row: rank.get(row.get('code_parent'), len(rank)))
+        except Exception as e:
+            print(f"⚠️ search_people unavailable, using ilike: {e}")
         try:
             result = (self.anon_client.table('parents')
                       .select('*')
-                      .or_(f"prenom.ilike.%{search_term}%,nom.ilike.%{search_term}%,telephone.ilike.%{search_term}%")
+                      .or_(f"prenoms.ilike.%{search_term}%,nom.ilike.%{search_term}%,telephone.ilike.%{search_term}%")
                       .execute())
             return result.data if result.data else []
         except Exception as e:
@@ -84,6 +139,8 @@ class SDBSupabase:
     # Class Operations
     def get_classes(self) -> List[Dict]:
         """Get all classes"""
+        if self.snapshot:
+            return self.snapshot.get_classes()
         try:
             result = self.anon_client.table('classes').select('*').order('niveau').execute()
             return result.data if result.data else []
@@ -170,6 +227,8 @@ class SDBSupabase:
     # Statistics Operations
     def get_class_stats(self, classe_id: str, annee_id: str) -> Dict:
         """Get statistics for a class"""
+        if self.snapshot:
+            return self.snapshot.get_class_stats(classe_id, annee_id)
         try:
             # Get total students
             students_result = (self.anon_client.table('inscriptions')
@@ -204,6 +263,8 @@ class SDBSupabase:
     # Utility Operations
     def get_current_year_id(self) -> Optional[str]:
         """Get current school year ID"""
+        if self.snapshot:
+            return self.snapshot.get_current_year_id()
         try:
             result = (self.anon_client.table('annees_scolaires')
                       .select('id')
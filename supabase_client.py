@@ -1,12 +1,17 @@
 import os
 import json
 import logging
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 import requests
 
 logger = logging.getLogger(__name__)
 
+# Size of the interactions.embedding column (vector(384) in supabase_schema.sql),
+# independent of EMBEDDING_DIM: other sizes are rejected by PostgREST
+INTERACTION_VECTOR_DIM = 384
+
 
 class SupabaseClient:
     """Minimal Supabase REST client using service role key."""
@@ -88,6 +93,21 @@ class SupabaseClient:
             return None
 
     # Interactions
+    @staticmethod
+    def _embedding_fields(embedding: Optional[List[float]]) -> Dict[str, Any]:
+        """Vector column value, or embedding_json when the size does not fit the column.
+
+        A wrong-sized vector makes PostgREST reject the whole insert, so it is kept
+        as JSON instead and the interaction row is still written.
+        """
+        if embedding is None or len(embedding) == INTERACTION_VECTOR_DIM:
+            return {"embedding": embedding, "embedding_json": None}
+        logger.warning(
+            f"Embedding has {len(embedding)} dimensions, expected {INTERACTION_VECTOR_DIM}; "
+            "stored in embedding_json instead of the vector column"
+        )
+        return {"embedding": None, "embedding_json": embedding}
+
     def log_interaction(self, session_id: str, role: str, content: str,
                         meta: Optional[Dict[str, Any]] = None,
                         embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
@@ -99,7 +119,7 @@ class SupabaseClient:
                 "meta": meta or {},
             }
             if embedding is not None:
-                payload["embedding_json"] = embedding
+                payload.update(self._embedding_fields(embedding))
             url = f"{self.rest_url}/interactions"
             r = requests.post(url, headers=self.headers, json=payload, timeout=20)
             r.raise_for_status()
@@ -109,6 +129,80 @@ class SupabaseClient:
             logger.error(f"Supabase log_interaction error: {e}")
             return None
 
+    def log_interactions(self, rows: List[Dict[str, Any]]) -> bool:
+        """Bulk insert interactions in a single request.
+
+        Each row has session_id, role, content, meta, embedding (may be None) and
+        ts (UTC ISO time of the turn; defaults to now).
+        """
+        if not rows:
+            return True
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            payload = [
+                {
+                    "session_id": row["session_id"],
+                    "role": row["role"],
+                    "content": row["content"],
+                    "meta": row.get("meta") or {},
+                    "ts": row.get("ts") or now,
+                    **self._embedding_fields(row.get("embedding")),
+                }
+                for row in rows
+            ]
+            url = f"{self.rest_url}/interactions"
+            headers = {**self.headers, "Prefer": "return=minimal"}
+            r = requests.post(url, headers=headers, json=payload, timeout=30)
+            r.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"Supabase log_interactions error ({len(rows)} rows): {e}")
+            return False
+
+    def search_similar_interactions(self, text: str, k: int = 5,
+                                    filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """ANN search over interaction embeddings (HNSW, cosine).
+
+        filters: optional session_id, role, service_code, min_similarity.
+        Returns rows with a `similarity` score, best match first.
+        """
+        from embeddings import embeddings_client
+
+        embedding = embeddings_client.create(text)
+        if embedding is None:
+            return []
+        filters = filters or {}
+        try:
+            payload = {
+                "p_query_embedding": embedding,
+                "p_match_count": k,
+                "p_session_id": filters.get("session_id"),
+                "p_role": filters.get("role"),
+                "p_service_code": filters.get("service_code"),
+                "p_min_similarity": filters.get("min_similarity", 0),
+            }
+            url = f"{self.rest_url}/rpc/search_similar_interactions"
+            r = requests.post(url, headers=self.headers, json=payload, timeout=20)
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            logger.error(f"Supabase search_similar_interactions error: {e}")
+            return []
+
+    def backfill_interaction_embeddings(self, batch_size: int = 500) -> int:
+        """Move one batch of legacy embedding_json rows into the vector column.
+
+        Returns the number of rows migrated, or -1 on error.
+        """
+        try:
+            url = f"{self.rest_url}/rpc/backfill_interaction_embeddings"
+            r = requests.post(url, headers=self.headers, json={"p_batch_size": batch_size}, timeout=60)
+            r.raise_for_status()
+            return int(r.json() or 0)
+        except Exception as e:
+            logger.error(f"Supabase backfill_interaction_embeddings error: {e}")
+            return -1
+
     # Artifacts
     def save_artifact(self, session_id: str, service_code: str, type_: str,
                       content: str, meta: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
@@ -129,6 +223,32 @@ class SupabaseClient:
             logger.error(f"Supabase save_artifact error: {e}")
             return None
 
+    def save_artifacts(self, rows: List[Dict[str, Any]]) -> bool:
+        """Bulk insert artifacts (session_id, service_code, type, content, meta, created_at) in a single request."""
+        if not rows:
+            return True
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            payload = [
+                {
+                    "session_id": row["session_id"],
+                    "service_code": row["service_code"],
+                    "type": row["type"],
+                    "content": row["content"],
+                    "meta": row.get("meta") or {},
+                    "created_at": row.get("created_at") or now,
+                }
+                for row in rows
+            ]
+            url = f"{self.rest_url}/artifacts"
+            headers = {**self.headers, "Prefer": "return=minimal"}
+            r = requests.post(url, headers=headers, json=payload, timeout=30)
+            r.raise_for_status()
+            return True
+        except Exception as e:
+            logger.error(f"Supabase save_artifacts error ({len(rows)} rows): {e}")
+            return False
+
 
 # Singleton
 supabase_client = SupabaseClient()
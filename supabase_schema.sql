@@ -39,14 +39,14 @@ create table if not exists public.interactions (
   role text not null, -- user | assistant | tool | system
   content text not null,
   meta jsonb default '{}'::jsonb,
-  -- store embedding as json for portability; optional vector column below
+  -- legacy JSON embeddings; migrated into the vector column by backfill_interaction_embeddings()
   embedding_json jsonb
 );
 create index if not exists idx_interactions_session_ts on public.interactions (session_id, ts);
 
--- Optional: vector column (adjust dimension to your embedding model)
--- alter table public.interactions add column if not exists embedding vector(384);
--- create index if not exists idx_interactions_embedding on public.interactions using hnsw (embedding vector_cosine_ops);
+-- Vector column (dimension must match EMBEDDING_DIM) + HNSW index for cosine ANN search
+alter table public.interactions add column if not exists embedding vector(384);
+create index if not exists idx_interactions_embedding on public.interactions using hnsw (embedding vector_cosine_ops);
 
 -- Artifacts (reports, files, actions)
 create table if not exists public.artifacts (
@@ -69,6 +69,66 @@ language sql stable as $$
   limit 1;
 $$;
 
+-- Similarity search over interaction embeddings (uses the HNSW index)
+create or replace function public.search_similar_interactions(
+  p_query_embedding vector(384),
+  p_match_count int default 5,
+  p_session_id uuid default null,
+  p_role text default null,
+  p_service_code text default null,
+  p_min_similarity float default 0
+)
+returns table (
+  id uuid,
+  session_id uuid,
+  ts timestamptz,
+  role text,
+  content text,
+  meta jsonb,
+  similarity float
+)
+language sql stable as $$
+  select * from (
+    select i.id, i.session_id, i.ts, i.role, i.content, i.meta,
+           1 - (i.embedding <=> p_query_embedding) as similarity
+    from public.interactions i
+    where i.embedding is not null
+      and (p_session_id is null or i.session_id = p_session_id)
+      and (p_role is null or i.role = p_role)
+      and (p_service_code is null or i.meta->>'service_code' = p_service_code)
+    order by i.embedding <=> p_query_embedding
+    limit p_match_count
+  ) matches
+  where matches.similarity >= p_min_similarity;
+$$;
+
+-- Copy legacy embedding_json values into the vector column, one batch per call.
+-- Returns the number of rows updated; call repeatedly until it returns 0.
+create or replace function public.backfill_interaction_embeddings(p_batch_size int default 500)
+returns int
+language plpgsql as $$
+declare
+  updated int;
+begin
+  with batch as (
+    select id from public.interactions
+    where embedding is null
+      and embedding_json is not null
+      and jsonb_typeof(embedding_json) = 'array'
+      and jsonb_array_length(embedding_json) = 384
+    limit p_batch_size
+    for update skip locked
+  )
+  update public.interactions i
+  set embedding = (i.embedding_json::text)::vector,
+      embedding_json = null
+  from batch
+  where i.id = batch.id;
+  get diagnostics updated = row_count;
+  return updated;
+end;
+$$;
+
 -- Timestamps trigger for updated_at on services
 create or replace function public.set_updated_at()
 returns trigger as $$
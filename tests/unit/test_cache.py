@@ -0,0 +1,194 @@
+"""
+Unit tests for the two-tier cache
+"""
+
+import asyncio
+import random
+import pytest
+from src.utils import cache as cache_module
+from src.utils.cache import TwoTierCache, cached, configure_cache, invalidate_tags
+
+
+class FakeBatch:
+    def __init__(self, service):
+        self.service = service
+
+    def set(self, key, value, expire=None):
+        self.service.store[key] = value
+
+    def sadd(self, key, *members):
+        self.service.sets.setdefault(key, set()).update(members)
+
+    def expire(self, key, seconds):
+        pass
+
+
+class FakeRedisService:
+    """The RedisService methods the cache uses, over dicts"""
+
+    def __init__(self):
+        self.redis = object()
+        self.store = {}
+        self.sets = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    def batch(self):
+        service = self
+
+        class Batch:
+            async def __aenter__(self):
+                return FakeBatch(service)
+
+            async def __aexit__(self, *exc):
+                return False
+        return Batch()
+
+    async def mdelete(self, keys):
+        return sum(1 for key in keys if self.store.pop(key, None) is not None)
+
+    async def delete_tagged(self, tags):
+        keys = {key for tag in tags for key in self.sets.pop(f"tag:{tag}", set())}
+        return sum(1 for key in keys if self.store.pop(key, None) is not None)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        cache_module._on_invalidation(message)
+        return 1
+
+
+@pytest.fixture
+def redis_service(monkeypatch):
+    monkeypatch.setattr(cache_module, "_caches", {})
+    service = FakeRedisService()
+    configure_cache(service)
+    yield service
+    configure_cache(None)
+
+
+def counting_loader(calls, value="v", delay=0.0):
+    async def load():
+        calls.append(1)
+        if delay:
+            await asyncio.sleep(delay)
+        return value
+    return load
+
+
+@pytest.mark.unit
+class TestTwoTierCache:
+    """Local tier, Redis tier and stampede protection"""
+
+    def test_local_then_redis_then_loader(self, redis_service):
+        cache = TwoTierCache("c", ttl_seconds=60)
+        calls = []
+        assert asyncio.run(cache.get_or_load("k", counting_loader(calls))) == "v"
+        assert asyncio.run(cache.get_or_load("k", counting_loader(calls))) == "v"
+        cache.clear_local()  # as in another instance
+        assert asyncio.run(cache.get_or_load("k", counting_loader(calls))) == "v"
+        assert len(calls) == 1
+        assert cache.lookups == {"local": 1, "redis": 1, "miss": 1}
+        assert cache.stats()["hit_ratio"] == round(2 / 3, 4)
+
+    def test_concurrent_misses_load_once(self, redis_service):
+        cache = TwoTierCache("c", ttl_seconds=60)
+        calls = []
+
+        async def run():
+            return await asyncio.gather(*[cache.get_or_load("k", counting_loader(calls, delay=0.01))
+                                          for _ in range(20)])
+
+        assert asyncio.run(run()) == ["v"] * 20
+        assert len(calls) == 1
+        assert cache._locks == {}
+
+    def test_early_refresh_serves_the_current_value(self, redis_service):
+        cache = TwoTierCache("c", ttl_seconds=60, rng=random.Random(0))
+        asyncio.run(cache.get_or_load("k", counting_loader([], value="old")))
+        # A slow loader makes every lookup a candidate for early refresh
+        cache._local["k"][1].delta = 1e6
+        calls = []
+
+        async def run():
+            return await asyncio.gather(*[cache.get_or_load("k", counting_loader(calls, value="new", delay=0.01))
+                                          for _ in range(5)])
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert results.count("new") == 1 and results.count("old") == 4
+
+    def test_failed_early_refresh_keeps_the_value(self, redis_service):
+        cache = TwoTierCache("c", ttl_seconds=60)
+        asyncio.run(cache.get_or_load("k", counting_loader([], value="old")))
+        cache._local["k"][1].delta = 1e6
+
+        async def failing():
+            raise RuntimeError("database down")
+
+        assert asyncio.run(cache.get_or_load("k", failing)) == "old"
+
+    def test_lru_bound(self, redis_service):
+        cache = TwoTierCache("c", ttl_seconds=60, max_size=2)
+        for key in ("a", "b", "c"):
+            asyncio.run(cache.get_or_load(key, counting_loader([])))
+        assert list(cache._local) == ["b", "c"]
+
+    def test_works_without_redis(self, redis_service):
+        configure_cache(None)
+        cache = TwoTierCache("c", ttl_seconds=60)
+        calls = []
+        for _ in range(2):
+            asyncio.run(cache.get_or_load("k", counting_loader(calls)))
+        assert len(calls) == 1
+        assert redis_service.store == {}
+
+
+@pytest.mark.unit
+class TestCachedDecorator:
+    """@cached on methods, serialization and invalidation"""
+
+    def make_repository(self, calls):
+        class Repository:
+            @cached("users", ttl_seconds=60, key=lambda self, phone: phone,
+                    tags=lambda user: [f"user:{user['id']}"],
+                    dumps=lambda user: dict(user, loaded=False), loads=dict, cache_none=False)
+            async def get_user(self, phone):
+                calls.append(phone)
+                return {"id": f"id-{phone}", "phone": phone} if phone != "unknown" else None
+        return Repository()
+
+    def test_key_serialization_and_none(self, redis_service):
+        calls = []
+        repository = self.make_repository(calls)
+        assert asyncio.run(repository.get_user("+221")) == {"id": "id-+221", "phone": "+221"}
+        assert redis_service.store["cache:users:+221"]["v"]["loaded"] is False
+        assert asyncio.run(repository.get_user("unknown")) is None
+        assert asyncio.run(repository.get_user("unknown")) is None
+        assert calls == ["+221", "unknown", "unknown"]
+
+    def test_tag_invalidation_reaches_both_tiers(self, redis_service):
+        calls = []
+        repository = self.make_repository(calls)
+        asyncio.run(repository.get_user("+221"))
+        asyncio.run(invalidate_tags("user:id-+221"))
+        assert redis_service.store == {}
+        assert redis_service.published == [("cache_invalidation", {"tags": ["user:id-+221"]})]
+        asyncio.run(repository.get_user("+221"))
+        assert calls == ["+221", "+221"]
+
+    def test_key_invalidation(self, redis_service):
+        calls = []
+        repository = self.make_repository(calls)
+        asyncio.run(repository.get_user("+221"))
+        asyncio.run(repository.get_user.cache.invalidate("+221"))
+        asyncio.run(repository.get_user("+221"))
+        assert calls == ["+221", "+221"]
+
+    def test_remote_invalidation_drops_local_copies(self, redis_service):
+        calls = []
+        repository = self.make_repository(calls)
+        asyncio.run(repository.get_user("+221"))
+        cache_module._on_invalidation({"tags": ["user:id-+221"]})
+        assert repository.get_user.cache._local == {}
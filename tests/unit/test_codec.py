@@ -0,0 +1,69 @@
+"""
+Unit tests for the Redis value codec
+"""
+
+import json
+import pickle
+from datetime import datetime
+import pytest
+from src.utils import codec as codec_module
+from src.utils.codec import Codec, VERSION
+
+HISTORY = [{"role": "user" if i % 2 else "assistant",
+            "content": f"Bonjour, quels sont les horaires de la catéchèse pour le niveau {i} ?"}
+           for i in range(40)]
+
+
+@pytest.mark.unit
+class TestCodec:
+    """Header byte, compression threshold and legacy values"""
+
+    def test_round_trip(self):
+        codec = Codec(compression="zlib")
+        value = {"id": "s1", "history": HISTORY, "count": 3, "ok": True, "none": None}
+        data = codec.encode(value)
+        assert data[0] & 0xF0 == VERSION
+        assert codec.decode(data) == value
+
+    def test_small_values_are_not_compressed(self):
+        codec = Codec(compression="zlib", min_compress_bytes=1024)
+        data = codec.encode("session-id")
+        assert data == bytes((VERSION | 0x01,)) + b'"session-id"'
+        assert codec.stats()["compressed"] == 0
+
+    def test_large_values_are_compressed(self):
+        codec = Codec(compression="zlib", min_compress_bytes=256)
+        data = codec.encode(HISTORY)
+        assert len(data) < len(json.dumps(HISTORY)) / 3
+        stats = codec.stats()
+        assert stats["compressed"] == 1
+        assert stats["bytes_saved"] == stats["serialized_bytes"] - len(data) > 0
+
+    def test_reads_values_written_before_the_codec(self):
+        codec = Codec()
+        assert codec.decode(json.dumps({"a": 1}).encode()) == {"a": 1}
+        assert codec.decode(json.dumps("s1").encode()) == "s1"
+        assert codec.decode(json.dumps(42).encode()) == 42
+        assert codec.decode(pickle.dumps({1, 2})) == {1, 2}
+        assert codec.stats()["legacy_decoded"] == 4
+
+    def test_pickle_override(self):
+        codec = Codec()
+        assert codec.decode(codec.encode({1, 2}, serializer="pickle")) == {1, 2}
+
+    def test_non_json_types_become_strings(self):
+        codec = Codec()
+        value = codec.decode(codec.encode({"at": datetime(2025, 1, 2, 3, 4, 5), 1: "x"}))
+        assert value == {"at": "2025-01-02T03:04:05", "1": "x"}
+
+    def test_missing_optional_libraries_fall_back(self, monkeypatch):
+        monkeypatch.setattr(codec_module, "msgpack", None)
+        monkeypatch.setattr(codec_module, "zstandard", None)
+        codec = Codec(serializer="msgpack", compression="zstd")
+        assert (codec.serializer, codec.compression) == ("json", "zlib")
+
+    def test_unknown_settings_are_rejected(self):
+        with pytest.raises(ValueError):
+            Codec(serializer="yaml")
+        with pytest.raises(ValueError):
+            Codec(compression="lz4")
@@ -0,0 +1,93 @@
+"""
+Unit tests for reply deadlines and degraded answers
+"""
+
+import asyncio
+import pytest
+from src.services.claude_service import ClaudeService
+from src.utils.deadline import Deadline, call_timeout, current_deadline, deadline_scope, within
+
+
+@pytest.mark.unit
+class TestDeadline:
+    """Budgets and client timeouts"""
+
+    def test_budget_keeps_the_reserve(self):
+        deadline = Deadline(10)
+        assert 4.9 < deadline.budget(0.5, reserve=0.0) <= 5.0
+        assert 6.9 < deadline.budget(1.0, reserve=3.0) <= 7.0
+        assert deadline.budget(1.0, reserve=20.0) == 0.0
+
+    def test_call_timeout_follows_the_current_deadline(self):
+        assert call_timeout(60.0) == 60.0
+        with deadline_scope(5) as deadline:
+            assert current_deadline() is deadline
+            assert call_timeout(60.0) <= 5.0
+            assert call_timeout(2.0) == 2.0
+        with deadline_scope(Deadline(0)):
+            assert call_timeout(30.0, floor=3.0) == 3.0
+        assert current_deadline() is None
+
+    def test_within(self):
+        async def slow():
+            await asyncio.sleep(1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(within(slow(), 0.01))
+        assert asyncio.run(within(asyncio.sleep(0, result="ok"), None)) == "ok"
+
+
+@pytest.mark.unit
+class TestDegradedOrchestration:
+    """Claude stages that run out of budget"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        service = ClaudeService()
+        service.retrieval = None
+        monkeypatch.setattr(service.settings, "deadline_reply_reserve_seconds", 0.05)
+        return service
+
+    def test_slow_generation_gets_a_template_answer(self, service, monkeypatch):
+        async def classify(message, conversation_history=None):
+            return {"intent": "RENSEIGNEMENT", "confidence": 0.9, "extracted_entities": {}}
+
+        async def generate(message, user_context=None, conversation_history=None):
+            await asyncio.sleep(5)
+
+        monkeypatch.setattr(service, "classify_user_intent", classify)
+        monkeypatch.setattr(service, "generate_renseignement_response", generate)
+
+        result = asyncio.run(service.orchestrate_conversation("horaires ?", deadline=Deadline(0.3)))
+        assert result["processing_metadata"]["degraded"] == ["generate_timeout"]
+        assert result["processing_metadata"]["requires_human_followup"] is True
+        assert result["service_response"]["degraded"] == "template"
+        assert result["service_response"]["response"]["content"][0]["text"]
+
+    def test_slow_classification_falls_back_to_human_contact(self, service, monkeypatch):
+        async def classify(message, conversation_history=None):
+            await asyncio.sleep(5)
+
+        async def generate(message, user_context=None, conversation_history=None):
+            return {"service": "CONTACT_HUMAIN", "response": {"content": [{"text": "ok"}]},
+                    "confidence": 0.8, "requires_human_followup": True}
+
+        monkeypatch.setattr(service, "classify_user_intent", classify)
+        monkeypatch.setattr(service, "generate_contact_humain_response", generate)
+
+        result = asyncio.run(service.orchestrate_conversation("bonjour", deadline=Deadline(0.3)))
+        assert result["intent_classification"]["intent"] == "CONTACT_HUMAIN"
+        assert result["processing_metadata"]["degraded"] == ["classify_timeout"]
+
+    def test_no_deadline_no_degradation(self, service, monkeypatch):
+        async def classify(message, conversation_history=None):
+            return {"intent": "CATECHESE", "confidence": 0.9, "extracted_entities": {}}
+
+        async def generate(message, user_context=None, conversation_history=None):
+            return {"service": "CATECHESE", "response": {"content": [{"text": "Notre Père"}]}, "confidence": 0.8}
+
+        monkeypatch.setattr(service, "classify_user_intent", classify)
+        monkeypatch.setattr(service, "generate_catechese_response", generate)
+
+        result = asyncio.run(service.orchestrate_conversation("prière"))
+        assert result["processing_metadata"]["degraded"] == []
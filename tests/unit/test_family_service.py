@@ -0,0 +1,229 @@
+"""
+Unit tests for the phone -> family lookup
+"""
+
+import re
+from fnmatch import fnmatchcase
+import pytest
+from src.services.family_service import FamilyService
+from src.utils.phone import to_e164
+
+
+FAMILY = {
+    "parent": {"code_parent": "P1", "prenoms": "Marie", "nom": "Ndong", "telephone": "776408591"},
+    "children": [{"id_catechumene": "C1", "prenoms": "Latyr Emmanuel", "nom": "NDONG",
+                  "inscription": {"id_inscription": "I1", "classe_nom": "CE1", "annee_nom": "2024-2025"}}],
+}
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeRpc:
+    """Supabase stand-in answering get_family_by_phone for one number"""
+
+    def __init__(self, known="+221776408591"):
+        self.known = known
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        data = FAMILY if params["p_phone"] == self.known else None
+        return type("Query", (), {"execute": lambda _: Response(data)})()
+
+
+class Query:
+    """Chainable table query over in-memory rows"""
+
+    def __init__(self, rows):
+        self.rows = [dict(row) for row in rows]
+
+    def select(self, columns):
+        return self
+
+    def or_(self, filters):
+        # PostgREST alternatives: "col.ilike.pattern" or "col.in.(a,b)"
+        matchers = []
+        for column, operator, value in re.findall(r"(\w+)\.(\w+)\.(\([^)]*\)|[^,]+)", filters):
+            if operator == "ilike":
+                matchers.append(lambda row, c=column, v=value.lower():
+                                fnmatchcase(str(row.get(c) or "").lower(), v))
+            else:
+                values = {v.strip('"') for v in value.strip("()").split(",")}
+                matchers.append(lambda row, c=column, v=values: row.get(c) in v)
+        self.rows = [row for row in self.rows if any(match(row) for match in matchers)]
+        return self
+
+    def eq(self, column, value):
+        self.rows = [row for row in self.rows if row.get(column) == value]
+        return self
+
+    def in_(self, column, values):
+        self.rows = [row for row in self.rows if row.get(column) in values]
+        return self
+
+    def order(self, column, desc=False):
+        self.rows.sort(key=lambda row: row.get(column) or "", reverse=desc)
+        return self
+
+    def execute(self):
+        return Response(self.rows)
+
+
+class FakeTables:
+    """Supabase stand-in without the get_family_by_phone function"""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.rpc_calls = 0
+
+    def rpc(self, name, params):
+        self.rpc_calls += 1
+        raise RuntimeError("function get_family_by_phone does not exist")
+
+    def table(self, name):
+        return Query(self.tables.get(name, []))
+
+
+def inscription(id_inscription, id_catechumene, date_inscription, annee_nom, active, classe_nom="CE1"):
+    return {"id_inscription": id_inscription, "id_catechumene": id_catechumene,
+            "date_inscription": date_inscription, "classes": {"classe_nom": classe_nom},
+            "annees_scolaires": {"annee_nom": annee_nom, "active": active}}
+
+
+TABLES = {
+    "parents": [
+        {"code_parent": "P0", "prenoms": "Awa", "nom": "Diop", "telephone": "770000000",
+         "telephone2": "776408591"},
+        {"code_parent": "P1", "prenoms": "Marie", "nom": "Ndong", "telephone": "77 640 85 91"},
+    ],
+    "catechumenes": [
+        {"id_catechumene": "C2", "prenoms": "Paul", "code_parent": "P1"},
+        {"id_catechumene": "C1", "prenoms": "Latyr Emmanuel", "code_parent": "P1"},
+        {"id_catechumene": "C3", "prenoms": "Zoé", "code_parent": "P1"},
+        {"id_catechumene": "C9", "prenoms": "Other", "code_parent": "P0"},
+    ],
+    "inscriptions": [
+        # C1: the active year wins over a newer inscription in a closed year
+        inscription("I1", "C1", "2024-09-10", "2024-2025", True, "CE1"),
+        inscription("I2", "C1", "2025-01-05", "2023-2024", False, "CI"),
+        # C2: no active year, the newest inscription wins
+        inscription("I3", "C2", "2022-09-10", "2022-2023", False, "CI"),
+        inscription("I4", "C2", "2023-09-10", "2023-2024", False, "CP"),
+    ],
+}
+
+
+@pytest.mark.unit
+class TestToE164:
+    """Phone canonicalization (mirrors the phone_e164 SQL function)"""
+
+    @pytest.mark.parametrize("raw", [
+        "776408591",
+        "77 640 85 91",
+        "221776408591",
+        "+221 77 640 85 91",
+        "00221776408591",
+        "221776408591@c.us",
+        "0776408591",
+    ])
+    def test_senegal_forms(self, raw):
+        assert to_e164(raw) == "+221776408591"
+
+    def test_foreign_number_keeps_country_code(self):
+        assert to_e164("+33 6 12 34 56 78") == "+33612345678"
+
+    def test_no_digits(self):
+        assert to_e164("") is None
+        assert to_e164("status@broadcast") is None
+
+
+@pytest.mark.unit
+class TestFamilyService:
+    """Single-RPC lookup with TTL cache"""
+
+    def test_lookup_by_any_phone_form(self):
+        supabase = FakeRpc()
+        service = FamilyService(supabase=supabase)
+        family = service.get_family_by_phone("221776408591@c.us")
+        assert family["parent"]["code_parent"] == "P1"
+        assert family["children"][0]["inscription"]["classe_nom"] == "CE1"
+        assert supabase.calls == [("get_family_by_phone", {"p_phone": "+221776408591"})]
+
+    def test_hits_and_misses_are_cached(self):
+        supabase = FakeRpc()
+        service = FamilyService(supabase=supabase)
+        service.get_family_by_phone("776408591")
+        service.get_family_by_phone("+221 77 640 85 91")
+        assert service.get_family_by_phone("770000000") is None
+        assert service.get_family_by_phone("770000000") is None
+        assert len(supabase.calls) == 2
+
+        service.invalidate("776408591")
+        service.get_family_by_phone("776408591")
+        assert len(supabase.calls) == 3
+
+    def test_cache_is_bounded(self):
+        service = FamilyService(supabase=FakeRpc(), cache_size=2)
+        for number in ("770000001", "770000002", "770000003"):
+            service.get_family_by_phone(number)
+        assert list(service._cache) == ["+221770000002", "+221770000003"]
+
+    def test_without_supabase(self):
+        assert FamilyService().get_family_by_phone("776408591") is None
+
+
+@pytest.mark.unit
+class TestFamilyServiceTables:
+    """Table queries used while the RPC is unavailable"""
+
+    def test_rpc_failure_falls_back_to_tables(self):
+        supabase = FakeTables(TABLES)
+        family = FamilyService(supabase=supabase).get_family_by_phone("+221776408591")
+        # The parent whose main number matches wins over a secondary-number match
+        assert family["parent"]["code_parent"] == "P1"
+        assert [child["id_catechumene"] for child in family["children"]] == ["C1", "C2", "C3"]
+
+    def test_current_inscription_prefers_the_active_year(self):
+        children = FamilyService(supabase=FakeTables(TABLES))._fetch_tables("+221776408591")["children"]
+        current = {child["id_catechumene"]: child["inscription"] for child in children}
+        assert current["C1"]["id_inscription"] == "I1"
+        assert current["C1"]["classe_nom"] == "CE1"
+        assert current["C1"]["annee_nom"] == "2024-2025"
+        assert "_active" not in current["C1"]
+        assert "classes" not in current["C1"] and "annees_scolaires" not in current["C1"]
+
+    def test_current_inscription_falls_back_to_the_newest(self):
+        children = FamilyService(supabase=FakeTables(TABLES))._fetch_tables("+221776408591")["children"]
+        current = {child["id_catechumene"]: child["inscription"] for child in children}
+        assert current["C2"]["id_inscription"] == "I4"
+        assert current["C2"]["classe_nom"] == "CP"
+        assert current["C3"] is None
+
+    @pytest.mark.parametrize("stored", ["77-640-85-91", "+221 77 640 85 91", "00221776408591"])
+    def test_numbers_typed_with_separators(self, stored):
+        tables = {**TABLES, "parents": [{"code_parent": "P1", "telephone": "338000000", "telephone2": stored}]}
+        family = FamilyService(supabase=FakeTables(tables))._fetch_tables("+221776408591")
+        assert family["parent"]["code_parent"] == "P1"
+
+    def test_longer_numbers_containing_the_digits_do_not_match(self):
+        tables = {"parents": [{"code_parent": "P9", "telephone": "+33 7 76 40 85 91"}]}
+        assert FamilyService(supabase=FakeTables(tables))._fetch_tables("+221776408591") is None
+
+    def test_unknown_number(self):
+        assert FamilyService(supabase=FakeTables({}))._fetch_tables("+221770000001") is None
+
+    def test_rpc_is_retried_after_a_while(self):
+        supabase = FakeTables(TABLES)
+        service = FamilyService(supabase=supabase, rpc_retry_seconds=300)
+        service.get_family_by_phone("776408591")
+        service.invalidate()
+        service.get_family_by_phone("776408591")
+        assert supabase.rpc_calls == 1
+
+        service._rpc_retry_at = 0.0
+        service.invalidate()
+        service.get_family_by_phone("776408591")
+        assert supabase.rpc_calls == 2
@@ -0,0 +1,88 @@
+"""
+Unit tests for the local intent pre-router
+"""
+
+import pytest
+from src.services.intent_router import IntentPreRouter, TfidfLogisticModel, normalize_text
+
+
+TRAINING_SAMPLES = [
+    ("quels sont les horaires de la catechese", "RENSEIGNEMENT"),
+    ("comment inscrire mon enfant", "RENSEIGNEMENT"),
+    ("ou se trouve le centre de catechese", "RENSEIGNEMENT"),
+    ("combien coute l'inscription cette annee", "RENSEIGNEMENT"),
+    ("quels documents faut il fournir", "RENSEIGNEMENT"),
+    ("expliquez moi le sacrement de confirmation", "CATECHESE"),
+    ("une priere pour la communion", "CATECHESE"),
+    ("que dit la bible sur le pardon", "CATECHESE"),
+    ("expliquez le notre pere", "CATECHESE"),
+    ("une priere du soir pour les enfants", "CATECHESE"),
+    ("je veux parler a une personne", "CONTACT_HUMAIN"),
+    ("je ne suis pas satisfait je veux une personne", "CONTACT_HUMAIN"),
+    ("passez moi une personne du bureau", "CONTACT_HUMAIN"),
+    ("j'ai un probleme je veux parler a quelqu'un", "CONTACT_HUMAIN"),
+] * 3
+
+
+@pytest.mark.unit
+class TestIntentPreRouterRules:
+    """Deterministic rules"""
+
+    @pytest.mark.parametrize("message,intent", [
+        ("1", "RENSEIGNEMENT"),
+        (" 2 ", "CATECHESE"),
+        ("3", "CONTACT_HUMAIN"),
+        ("Catéchèse", "CATECHESE"),
+        ("Bonjour", "RENSEIGNEMENT"),
+        ("merci !", "RENSEIGNEMENT"),
+        ("Merci beaucoup", "RENSEIGNEMENT"),
+        ("bonjour à tous", "RENSEIGNEMENT"),
+        ("menu", "RENSEIGNEMENT"),
+        ("parler à James", "CONTACT_HUMAIN"),
+    ])
+    def test_obvious_messages_are_classified_locally(self, message, intent):
+        result = IntentPreRouter().classify(message)
+        assert result is not None
+        assert result["intent"] == intent
+        assert result["source"] == "rules"
+        assert result["confidence"] >= 0.85
+
+    @pytest.mark.parametrize("message", [
+        "bonjour, une prière svp",
+        "merci pour la prière",
+        "bonjour catéchèse svp",
+    ])
+    def test_greeting_with_a_request_is_not_answered_by_rules(self, message):
+        assert IntentPreRouter().classify_by_rules(message) is None
+
+    def test_long_message_without_model_goes_to_claude(self):
+        router = IntentPreRouter()
+        assert router.classify("Bonjour, pouvez-vous m'expliquer le sens de la Pentecôte ?") is None
+
+    def test_normalize_text_strips_accents(self):
+        assert normalize_text("  Catéchèse ÉTÉ ") == "catechese ete"
+
+
+@pytest.mark.unit
+class TestIntentPreRouterModel:
+    """Local TF-IDF / logistic regression model"""
+
+    def test_untrained_model_predicts_nothing(self):
+        assert TfidfLogisticModel().predict("une priere") is None
+
+    def test_trained_model_predicts_known_intent(self):
+        model = TfidfLogisticModel().fit(TRAINING_SAMPLES)
+        intent, probability = model.predict("une priere pour la confirmation")
+        assert intent == "CATECHESE"
+        assert 0.0 < probability <= 1.0
+
+    def test_train_requires_enough_samples(self):
+        router = IntentPreRouter()
+        assert router.train(TRAINING_SAMPLES[:5]) is False
+        assert router.train(TRAINING_SAMPLES) is True
+        assert router.model.is_trained
+
+    def test_low_confidence_prediction_is_deferred(self):
+        router = IntentPreRouter(min_confidence=1.0)
+        router.train(TRAINING_SAMPLES)
+        assert router.classify("une priere pour la confirmation et les horaires du bureau") is None
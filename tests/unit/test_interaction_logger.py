@@ -0,0 +1,159 @@
+"""
+Unit tests for the background interaction logger
+"""
+
+import threading
+import time
+from datetime import datetime
+import pytest
+import interaction_logger as logger_module
+from interaction_logger import InteractionLogger
+
+
+class FakeSupabase:
+    """Bulk inserts that fail whenever a batch contains a rejected row"""
+
+    def __init__(self, rejected=(), gate=None):
+        self.rejected = set(rejected)
+        self.gate = gate
+        self.interaction_calls = []
+        self.artifact_calls = []
+        self.rows = []
+
+    def _insert(self, calls, rows):
+        if self.gate is not None:
+            self.gate.wait(5)
+        calls.append([row["content"] for row in rows])
+        self.rows.extend(rows)
+        return not any(row["content"] in self.rejected for row in rows)
+
+    def log_interactions(self, rows):
+        return self._insert(self.interaction_calls, rows)
+
+    def save_artifacts(self, rows):
+        return self._insert(self.artifact_calls, rows)
+
+
+class FakeEmbeddings:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def create_many(self, texts):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("embeddings endpoint down")
+        return [[0.0] * 3 for _ in texts]
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    supabase, embeddings = FakeSupabase(), FakeEmbeddings()
+    monkeypatch.setattr(logger_module, "supabase_client", supabase)
+    monkeypatch.setattr(logger_module, "embeddings_client", embeddings)
+    return supabase, embeddings
+
+
+def make_logger(**kwargs):
+    options = {"maxsize": 100, "batch_size": 50, "flush_interval": 0.05, "put_timeout": 0.01}
+    options.update(kwargs)
+    return InteractionLogger(**options)
+
+
+@pytest.mark.unit
+class TestInteractionLogger:
+    """Queueing, batching, backpressure and flush"""
+
+    def test_flush_writes_one_batch(self, fakes):
+        supabase, embeddings = fakes
+        log = make_logger()
+        for i in range(5):
+            assert log.log_interaction("s1", "user", f"m{i}")
+        assert log.save_artifact("s1", "RENSEIGNEMENT", "summary", "a0")
+        assert log.flush(timeout=5)
+
+        assert supabase.interaction_calls == [["m0", "m1", "m2", "m3", "m4"]]
+        assert supabase.artifact_calls == [["a0"]]
+        assert embeddings.calls == 1
+        stats = log.stats()
+        assert (stats["enqueued"], stats["written"], stats["failed"], stats["embedded"]) == (6, 6, 0, 5)
+        assert stats["queue_depth"] == 0
+        log.close()
+
+    def test_records_keep_the_time_they_were_queued(self, fakes):
+        supabase, _ = fakes
+        log = make_logger()
+        log.log_interaction("s1", "user", "question")
+        time.sleep(0.01)
+        log.log_interaction("s1", "assistant", "answer")
+        log.save_artifact("s1", "RENSEIGNEMENT", "summary", "a0")
+        assert log.flush(timeout=5)
+
+        question, answer, artifact = supabase.rows
+        assert datetime.fromisoformat(question["ts"]) < datetime.fromisoformat(answer["ts"])
+        assert datetime.fromisoformat(artifact["created_at"]).tzinfo is not None
+        log.close()
+
+    def test_records_without_session_are_ignored(self, fakes):
+        log = make_logger()
+        assert log.log_interaction(None, "user", "m") is False
+        assert log.save_artifact("", "X", "t", "a") is False
+        assert log.flush(timeout=1)
+        assert log.stats()["enqueued"] == 0
+
+    def test_failed_bulk_insert_is_retried_row_by_row(self, fakes):
+        supabase, _ = fakes
+        supabase.rejected = {"bad"}
+        log = make_logger()
+        for content in ("m0", "bad", "m2"):
+            log.log_interaction("s1", "user", content)
+        assert log.flush(timeout=5)
+
+        assert supabase.interaction_calls == [["m0", "bad", "m2"], ["m0"], ["bad"], ["m2"]]
+        stats = log.stats()
+        assert (stats["written"], stats["failed"]) == (2, 1)
+        log.close()
+
+    def test_embedding_failure_still_logs(self, fakes, monkeypatch):
+        supabase, _ = fakes
+        monkeypatch.setattr(logger_module, "embeddings_client", FakeEmbeddings(fail=True))
+        log = make_logger()
+        log.log_interaction("s1", "user", "m0")
+        assert log.flush(timeout=5)
+        assert supabase.interaction_calls == [["m0"]]
+        assert log.stats()["embedded"] == 0
+        log.close()
+
+    def test_full_queue_drops_and_counts(self, fakes):
+        supabase, _ = fakes
+        gate = threading.Event()
+        supabase.gate = gate  # the worker blocks on its first write
+        log = make_logger(maxsize=2, batch_size=1, flush_interval=0.0)
+        results = [log.log_interaction("s1", "user", f"m{i}") for i in range(10)]
+        gate.set()
+        assert log.flush(timeout=5)
+
+        stats = log.stats()
+        assert results.count(False) == stats["dropped"] > 0
+        assert stats["enqueued"] == results.count(True)
+        assert stats["written"] == stats["enqueued"]
+        log.close()
+
+    def test_flush_times_out_while_the_worker_is_stuck(self, fakes):
+        supabase, _ = fakes
+        gate = threading.Event()
+        supabase.gate = gate
+        log = make_logger()
+        log.log_interaction("s1", "user", "m0")
+        assert log.flush(timeout=0.1) is False
+        gate.set()
+        assert log.flush(timeout=5)
+        log.close()
+
+    def test_close_drains_the_queue(self, fakes):
+        supabase, _ = fakes
+        log = make_logger(flush_interval=10.0)
+        log.log_interaction("s1", "user", "m0")
+        log.close(timeout=5)
+        assert supabase.interaction_calls == [["m0"]]
+        assert not log._thread.is_alive()
@@ -0,0 +1,100 @@
+"""
+Unit tests for the structured logging setup
+"""
+
+import io
+import json
+import random
+import pytest
+import structlog
+from prometheus_client import REGISTRY
+from src.utils.logging_config import EventSampler, Redactor, configure_logging
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.unit
+class TestEventSampler:
+    """Per-event sampling"""
+
+    def test_rate_zero_drops_and_counts(self):
+        sampler = EventSampler({"http_probe": 0.0})
+        before = sample("concierge_log_events_total", event="http_probe", outcome="dropped")
+        with pytest.raises(structlog.DropEvent):
+            sampler(None, "info", {"event": "http_probe"})
+        assert sample("concierge_log_events_total", event="http_probe", outcome="dropped") == before + 1
+
+    def test_warnings_are_never_sampled(self):
+        sampler = EventSampler({"http_probe": 0.0})
+        assert sampler(None, "warning", {"event": "http_probe"}) == {"event": "http_probe"}
+
+    def test_partial_rate_marks_written_events(self):
+        sampler = EventSampler({"noisy": 0.5}, rng=random.Random(1))
+        written = 0
+        for _ in range(200):
+            try:
+                event = sampler(None, "info", {"event": "noisy"})
+            except structlog.DropEvent:
+                continue
+            written += 1
+            assert event["sample_rate"] == 0.5
+        assert 60 < written < 140
+
+    def test_unlisted_events_pass(self):
+        assert EventSampler({})(None, "info", {"event": "x"}) == {"event": "x"}
+
+
+@pytest.mark.unit
+class TestRedactor:
+    """Secrets, phone masking and truncation"""
+
+    def test_secret_keys(self):
+        event = Redactor()(None, "info", {
+            "event": "incoming_request",
+            "headers": {"Authorization": "Bearer abc", "x-api-key": "k", "host": "app"},
+            "api_key": "k",
+        })
+        assert event["headers"] == {"Authorization": "[redacted]", "x-api-key": "[redacted]", "host": "app"}
+        assert event["api_key"] == "[redacted]"
+
+    def test_phone_masking(self):
+        event = Redactor(mask_phone_numbers=True)(None, "info", {"event": "e", "phone_number": "221765005555"})
+        assert event["phone_number"] == "********5555"
+        assert Redactor()(None, "info", {"event": "e", "phone_number": "221765005555"})["phone_number"] == "221765005555"
+
+    def test_truncation_and_depth(self):
+        event = Redactor(max_value_chars=10, max_depth=1)(None, "info", {
+            "event": "e", "body": "x" * 25, "payload": {"a": {"b": 1}}, "count": 3,
+        })
+        assert event["body"] == "xxxxxxxxxx...(+15 chars)"
+        assert event["payload"] == {"a": "<dict with 1 keys>"}
+        assert event["count"] == 3
+
+    def test_tracebacks_are_kept_whole(self):
+        traceback = "Traceback (most recent call last):\n" + "  File x\n" * 100
+        event = Redactor(max_value_chars=10)(None, "error", {"event": "e", "exception": traceback})
+        assert event["exception"] == traceback
+
+
+@pytest.mark.unit
+class TestConfigureLogging:
+    """End-to-end rendering through the log sink"""
+
+    def test_json_lines(self):
+        stream = io.StringIO()
+        sink = configure_logging(level="INFO", stream=stream, sample_rates={"quiet": 0.0})
+        logger = structlog.get_logger()
+        logger.info("message_processed", phone_number="221765005555", token="t", took_ms=12)
+        logger.debug("not_written")
+        logger.info("quiet")
+        sink.stop()
+        structlog.reset_defaults()
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert len(lines) == 1
+        assert lines[0]["event"] == "message_processed"
+        assert lines[0]["level"] == "info"
+        assert lines[0]["token"] == "[redacted]"
+        assert lines[0]["took_ms"] == 12
@@ -0,0 +1,106 @@
+"""
+Unit tests for the pipeline metrics helpers
+"""
+
+import asyncio
+import pytest
+from prometheus_client import REGISTRY
+from src.utils.metrics import StageTimer, instrument_supabase, record_claude_usage, timed
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.unit
+class TestStageTimer:
+    """Per-stage breakdown and histograms"""
+
+    def test_stages_are_recorded(self):
+        before = sample("concierge_pipeline_stage_seconds_count", stage="history")
+        timer = StageTimer()
+        with timer.stage("history"):
+            pass
+        with timer.stage("history"):
+            pass
+        with timer.stage("classify"):
+            pass
+        assert set(timer.timings_ms) == {"history", "classify"}
+        assert sample("concierge_pipeline_stage_seconds_count", stage="history") == before + 2
+
+        total = timer.finish("success")
+        assert total >= 0
+        assert sample("concierge_pipeline_seconds_count", outcome="success") >= 1
+
+    def test_stage_is_recorded_on_error(self):
+        timer = StageTimer()
+        with pytest.raises(RuntimeError):
+            with timer.stage("waha_send"):
+                raise RuntimeError("WAHA down")
+        assert "waha_send" in timer.timings_ms
+
+
+@pytest.mark.unit
+class TestDependencyMetrics:
+    """Claude tokens, timed calls and Supabase hooks"""
+
+    def test_claude_usage(self):
+        before = sample("concierge_claude_tokens_total", model="m", direction="output")
+        record_claude_usage("m", {"input_tokens": 120, "output_tokens": 30})
+        record_claude_usage("m", None)
+        assert sample("concierge_claude_tokens_total", model="m", direction="output") == before + 30
+
+    def test_timed_counts_errors(self):
+        @timed("redis", "boom")
+        async def boom():
+            raise ConnectionError()
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(boom())
+        assert sample("concierge_dependency_errors_total", dependency="redis", operation="boom") == 1
+        assert sample("concierge_dependency_call_seconds_count", dependency="redis", operation="boom") == 1
+
+    def test_supabase_hooks(self):
+        httpx = pytest.importorskip("httpx")
+
+        def handler(request):
+            return httpx.Response(200, json=[])
+
+        session = httpx.Client(transport=httpx.MockTransport(handler))
+        client = type("Client", (), {"postgrest": type("Postgrest", (), {"session": session})()})()
+        instrument_supabase(client)
+        instrument_supabase(client)  # idempotent
+        assert len(session.event_hooks["request"]) == 2  # tracing + timing
+
+        session.get("https://x.supabase.co/rest/v1/interactions", params={"select": "*"})
+        assert sample("concierge_dependency_call_seconds_count",
+                      dependency="supabase", operation="GET interactions") == 1
+
+
+    def test_supabase_transport_failures_are_counted(self):
+        httpx = pytest.importorskip("httpx")
+
+        def handler(request):
+            raise httpx.ConnectTimeout("timed out", request=request)
+
+        session = httpx.Client(transport=httpx.MockTransport(handler))
+        client = type("Client", (), {"postgrest": type("Postgrest", (), {"session": session})()})()
+        instrument_supabase(client)
+        with pytest.raises(httpx.ConnectTimeout):
+            session.post("https://x.supabase.co/rest/v1/rpc/expire_sessions", json={})
+        labels = {"dependency": "supabase", "operation": "POST rpc/expire_sessions"}
+        assert sample("concierge_dependency_errors_total", **labels) == 1
+        assert sample("concierge_dependency_call_seconds_count", **labels) == 1
+
+    def test_handled_redis_errors_are_counted(self):
+        from src.services.redis_service import RedisService
+
+        class BrokenClient:
+            async def exists(self, key):
+                raise ConnectionError("redis down")
+
+        service = RedisService()
+        service.redis = BrokenClient()
+        before = sample("concierge_dependency_errors_total", dependency="redis", operation="exists")
+        assert asyncio.run(service.exists("k")) is False
+        assert sample("concierge_dependency_errors_total", dependency="redis", operation="exists") == before + 1
@@ -0,0 +1,101 @@
+"""
+Unit tests for the fuzzy name search
+"""
+
+import sqlite3
+import pytest
+from src.services.name_search_service import NgramIndex, NameSearchService, trigrams
+
+
+PEOPLE = [
+    ("catechumene", {"id_catechumene": "C1", "prenoms": "Latyr Emmanuel", "nom": "NDONG", "code_parent": "P1"}),
+    ("catechumene", {"id_catechumene": "C2", "prenoms": "Emmanuel", "nom": "Diop", "code_parent": "P2"}),
+    ("catechumene", {"id_catechumene": "C3", "prenoms": "Fatou", "nom": "Sène", "code_parent": "P3"}),
+    ("parent", {"code_parent": "P1", "prenoms": "Marie", "nom": "Ndong", "telephone": "776408591"}),
+]
+
+
+class FailingRpc:
+    """Supabase stand-in whose RPC is not deployed"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def rpc(self, name, params):
+        self.calls += 1
+        raise RuntimeError("function search_people does not exist")
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = tmp_path / "sdb_snapshot.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE catechumenes (id_catechumene TEXT, prenoms TEXT, nom TEXT, code_parent TEXT)")
+    conn.execute("CREATE TABLE parents (code_parent TEXT, prenoms TEXT, nom TEXT, telephone TEXT)")
+    for kind, row in PEOPLE:
+        if kind == "catechumene":
+            conn.execute("INSERT INTO catechumenes VALUES (?, ?, ?, ?)",
+                         (row["id_catechumene"], row["prenoms"], row["nom"], row["code_parent"]))
+        else:
+            conn.execute("INSERT INTO parents VALUES (?, ?, ?, ?)",
+                         (row["code_parent"], row["prenoms"], row["nom"], row["telephone"]))
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+@pytest.mark.unit
+class TestNgramIndex:
+    """Trigram index ranking"""
+
+    @pytest.fixture
+    def index(self):
+        index = NgramIndex()
+        for kind, row in PEOPLE:
+            index.add({"kind": kind, "id": row.get("id_catechumene", row["code_parent"])},
+                      f"{row['prenoms']} {row['nom']}")
+        return index
+
+    def test_trigrams_are_padded_and_accent_free(self):
+        assert "  s" in trigrams("Sène")
+        assert "ene" in trigrams("Sène")
+
+    def test_word_order_and_case_do_not_matter(self, index):
+        results = index.search("ndong emmanuel")
+        assert results[0]["id"] == "C1"
+        assert results[0]["score"] == 1.0
+
+    def test_accents_and_typos_are_tolerated(self, index):
+        assert index.search("fatou sene")[0]["id"] == "C3"
+        assert index.search("Emanuel Ndongg")[0]["id"] == "C1"
+
+    def test_kind_filter(self, index):
+        results = index.search("Ndong", kind="parent")
+        assert [r["id"] for r in results] == ["P1"]
+
+    def test_empty_query(self, index):
+        assert index.search("  ") == []
+
+
+@pytest.mark.unit
+class TestNameSearchService:
+    """RPC with local fallback"""
+
+    def test_rpc_failure_falls_back_to_snapshot_index(self, snapshot_path):
+        supabase = FailingRpc()
+        service = NameSearchService(supabase=supabase, snapshot_path=snapshot_path)
+        results = service.search("Latyr NDONG", kind="catechumene")
+        assert results[0]["id"] == "C1"
+        assert results[0]["code_parent"] == "P1"
+
+        # The failed RPC is not retried on every call
+        service.search("Fatou")
+        assert supabase.calls == 1
+
+    def test_invalid_kind(self, snapshot_path):
+        service = NameSearchService(snapshot_path=snapshot_path)
+        with pytest.raises(ValueError):
+            service.search("Fatou", kind="teacher")
+
+    def test_no_source(self):
+        assert NameSearchService(use_rpc=False).search("Fatou") == []
@@ -0,0 +1,51 @@
+"""
+Unit tests for the memoized phone canonicalization
+"""
+
+import pytest
+from src.utils import phone
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    phone._parse.cache_clear()
+
+
+@pytest.mark.unit
+class TestPhoneCanonicalization:
+    """E.164 normalization, validation and WhatsApp ids"""
+
+    @pytest.mark.parametrize("raw", ["+221771234567", "221771234567", "+221 77 123 45 67"])
+    def test_validate_returns_e164(self, raw):
+        assert phone.validate_phone_number(raw) == "+221771234567"
+
+    def test_invalid_numbers_are_rejected(self):
+        with pytest.raises(ValueError):
+            phone.validate_phone_number("invalid-phone")
+        with pytest.raises(ValueError):
+            phone.validate_phone_number("+22100000")
+        assert phone.is_valid_phone_number("1234") is False
+
+    def test_special_addresses_pass_through(self):
+        for address in ("120363025246125486@g.us", "221771234567@s.whatsapp.net", "status@broadcast"):
+            assert phone.validate_phone_number(address) == address
+            assert phone.is_valid_phone_number(address)
+
+    def test_forms_of_one_number_share_a_cache_entry(self):
+        for raw in ("221771234567", "+221771234567", "221771234567", "+221771234567"):
+            phone.validate_phone_number(raw)
+        info = phone.phone_cache_info()
+        assert (info.misses, info.hits) == (1, 3)
+
+    def test_canonical_e164_skips_parsing(self):
+        assert phone.normalize_phone_number("+221771234567") == "+221771234567"
+        assert phone.phone_cache_info().misses == 0
+
+    def test_whatsapp_ids(self):
+        assert phone.from_whatsapp_id("221771234567@c.us") == "+221771234567"
+        assert phone.from_whatsapp_id("120363025246125486@g.us") == "120363025246125486@g.us"
+        assert phone.to_whatsapp_id("+221 77 123 45 67") == "221771234567"
+        assert phone.to_whatsapp_id("00221771234567") == "221771234567"
+        assert phone.to_whatsapp_id("221771234567") == "221771234567"
+        with pytest.raises(ValueError):
+            phone.to_whatsapp_id("  ")
@@ -0,0 +1,203 @@
+"""
+Unit tests for the pipelined Redis operations
+"""
+
+import asyncio
+import pytest
+from src.services.redis_service import RedisService
+
+
+class FakeRedis:
+    """Dict-backed client counting round trips (one per pipeline or direct command)"""
+
+    def __init__(self):
+        self.store = {}
+        self.zsets = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _run(self, command, *args, **kwargs):
+        if command == "get":
+            return self.store.get(args[0])
+        if command in ("set", "setex"):
+            key, value = (args[0], args[-1])
+            self.store[key] = value
+            return True
+        if command == "unlink":
+            return sum(1 for key in args if self.store.pop(key, None) is not None)
+        if command == "expire":
+            return args[0] in self.store or args[0] in self.zsets
+        if command == "zadd":
+            self.zsets.setdefault(args[0], {}).update(args[1])
+            return len(args[1])
+        if command == "zcard":
+            return len(self.zsets.get(args[0], {}))
+        if command == "zremrangebyscore":
+            zset = self.zsets.get(args[0], {})
+            old = [member for member, score in zset.items() if args[1] <= score <= args[2]]
+            for member in old:
+                del zset[member]
+            return len(old)
+        if command == "zrange":
+            zset = sorted(self.zsets.get(args[0], {}).items(), key=lambda item: item[1])
+            return zset[args[1]:args[2] + 1]
+        if command == "zrem":
+            return sum(1 for member in args[1:] if self.zsets.get(args[0], {}).pop(member, None) is not None)
+        if command == "fail":
+            raise RuntimeError("WRONGTYPE")
+        raise NotImplementedError(command)
+
+    def __getattr__(self, command):
+        async def call(*args, **kwargs):
+            self.round_trips += 1
+            return self._run(command, *args, **kwargs)
+        return call
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.store.get(key) for key in keys]
+
+    async def mset(self, mapping):
+        self.round_trips += 1
+        self.store.update(mapping)
+        return True
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, command):
+        return lambda *args, **kwargs: self.commands.append((command, args, kwargs))
+
+    async def execute(self, raise_on_error=True):
+        self.client.round_trips += 1
+        results = []
+        for command, args, kwargs in self.commands:
+            try:
+                results.append(self.client._run(command, *args, **kwargs))
+            except Exception as e:
+                if raise_on_error:
+                    raise
+                results.append(e)
+        return results
+
+
+def make_service():
+    service = RedisService()
+    service.redis = FakeRedis()
+    return service
+
+
+@pytest.mark.unit
+class TestBatch:
+    """Operations queued on RedisService.batch()"""
+
+    def test_one_round_trip(self):
+        service = make_service()
+        service.redis.store["history:s1"] = service.codec.encode([{"role": "user"}])
+
+        async def run():
+            async with service.batch() as batch:
+                history = batch.get("history:s1")
+                missing = batch.get("history:s2")
+                written = batch.set("session:s1", {"id": "s1"}, expire=60)
+                batch.enqueue_message("human_followup_queue", {"interaction_id": "i1"}, priority=10)
+            return history, missing, written
+
+        history, missing, written = asyncio.run(run())
+        assert service.redis.round_trips == 1
+        assert history.value == [{"role": "user"}]
+        assert missing.value is None
+        assert written.value is True
+        assert service.codec.decode(service.redis.store["session:s1"]) == {"id": "s1"}
+        assert len(service.redis.zsets["queue:human_followup_queue"]) == 1
+
+    def test_failed_command_keeps_its_default(self):
+        service = make_service()
+
+        async def run():
+            async with service.batch() as batch:
+                batch._queue("fail", "key", default="unset")
+                deleted = batch.delete("missing")
+            return batch.operations[0][3], deleted
+
+        failed, deleted = asyncio.run(run())
+        assert failed.value == "unset"
+        assert deleted.value == 0
+
+    def test_nothing_sent_when_the_block_raises(self):
+        service = make_service()
+
+        async def run():
+            async with service.batch() as batch:
+                batch.set("key", 1)
+                raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            asyncio.run(run())
+        assert service.redis.round_trips == 0
+        assert service.redis.store == {}
+
+    def test_empty_batch_sends_nothing(self):
+        service = make_service()
+
+        async def run():
+            async with service.batch():
+                pass
+
+        asyncio.run(run())
+        assert service.redis.round_trips == 0
+
+
+@pytest.mark.unit
+class TestMultiKey:
+    """mget / mset / mdelete"""
+
+    def test_mset_mget_mdelete(self):
+        service = make_service()
+        assert asyncio.run(service.mset({"a": 1, "b": {"x": [1, 2]}}, expire=60))
+        assert asyncio.run(service.mget(["a", "b", "c"])) == {"a": 1, "b": {"x": [1, 2]}}
+        assert asyncio.run(service.mdelete(["a", "b", "c"])) == 2
+        assert service.redis.round_trips == 3
+
+    def test_mset_without_expiry_uses_mset(self):
+        service = make_service()
+        assert asyncio.run(service.mset({"a": 1}))
+        assert asyncio.run(service.mget(["a"])) == {"a": 1}
+
+    def test_no_keys_no_round_trip(self):
+        service = make_service()
+        assert asyncio.run(service.mget([])) == {}
+        assert asyncio.run(service.mdelete([])) == 0
+        assert service.redis.round_trips == 0
+
+
+@pytest.mark.unit
+class TestRateLimit:
+    """Sliding window checked in one round trip"""
+
+    def test_allowed_requests_take_one_round_trip(self):
+        service = make_service()
+        results = [asyncio.run(service.check_rate_limit("rate_limit:p", limit=3, window=60)) for _ in range(3)]
+        assert [result["allowed"] for result in results] == [True, True, True]
+        assert [result["remaining"] for result in results] == [2, 1, 0]
+        assert service.redis.round_trips == 3
+
+    def test_rejected_requests_do_not_count(self):
+        service = make_service()
+        for _ in range(2):
+            asyncio.run(service.check_rate_limit("rate_limit:p", limit=2, window=60))
+        result = asyncio.run(service.check_rate_limit("rate_limit:p", limit=2, window=60))
+        assert result["allowed"] is False
+        assert result["current_count"] == 2
+        assert len(service.redis.zsets["rate_limit:p"]) == 2
@@ -0,0 +1,129 @@
+"""
+Unit tests for the streaming SDB backup restore
+"""
+
+import csv
+import io
+import json
+import threading
+import zipfile
+import pytest
+from sdb.restore_backup import RESTORE_DEPENDENCIES, iter_entry_batches, restore_archive
+
+
+def write_archive(path, tables):
+    """ZIP with one CSV entry per table ({table: [row dicts]}); .ndjson when the name says so"""
+    with zipfile.ZipFile(path, "w") as zipf:
+        for name, rows in tables.items():
+            if name.endswith(".ndjson"):
+                zipf.writestr(name, "".join(json.dumps(row) + "\n" for row in rows))
+                continue
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+            zipf.writestr(f"{name}.csv", buffer.getvalue())
+    return str(path)
+
+
+class RecordingSink:
+    """Collects written rows; tables in `failing` reject every batch"""
+
+    name = "memory"
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.lock = threading.Lock()
+        self.events = []
+        self.rows = {}
+
+    def write(self, table, key, rows):
+        with self.lock:
+            self.events.append(("write", table))
+            if table in self.failing:
+                return 0, [f"{table}: constraint violation"]
+            self.rows.setdefault(table, []).extend(rows)
+            return len(rows), []
+
+    def count(self, table):
+        return len(self.rows.get(table, []))
+
+    def close(self):
+        pass
+
+
+@pytest.mark.unit
+class TestIterEntryBatches:
+    """Streaming rows out of the archive"""
+
+    def test_csv_empty_cells_and_generated_columns(self, tmp_path):
+        path = write_archive(tmp_path / "backup.zip", {"parents": [
+            {"id": "1", "code_parent": "P1", "prenoms": "", "telephone": "776408591",
+             "telephone_e164": "+221776408591", "email": ""},
+            {"id": "2", "code_parent": "P2", "prenoms": "Awa", "telephone": "770000000",
+             "telephone_e164": "+221770000000", "email": "awa@example.org"},
+            {"id": "3", "code_parent": "P3", "prenoms": "Paul", "telephone": "",
+             "telephone_e164": "", "email": ""},
+        ]})
+        batches = list(iter_entry_batches(path, "parents.csv", "parents", batch_size=2))
+
+        assert [len(batch) for batch in batches] == [2, 1]
+        first, second, third = batches[0] + batches[1]
+        # Empty cells are NULL, except in NOT NULL text columns
+        assert first["email"] is None
+        assert first["prenoms"] == ""
+        assert third["telephone"] == ""
+        assert second["email"] == "awa@example.org"
+        # Generated columns are never written back
+        assert all("telephone_e164" not in row for row in (first, second, third))
+
+    def test_ndjson_keeps_types_and_skips_generated_columns(self, tmp_path):
+        path = write_archive(tmp_path / "backup.zip", {"parents.ndjson": [
+            {"id": 1, "code_parent": "P1", "email": None, "telephone2_e164": None},
+        ]})
+        assert list(iter_entry_batches(path, "parents.ndjson", "parents")) == [
+            [{"id": 1, "code_parent": "P1", "email": None}]
+        ]
+
+
+@pytest.mark.unit
+class TestRestoreArchive:
+    """Dependency-ordered scheduling"""
+
+    TABLES = {
+        "annees_scolaires": [{"id": "a1", "annee_nom": "2024-2025"}],
+        "classes": [{"id": "c1", "classe_nom": "CE1"}],
+        "catechumenes": [{"id": "k1", "id_catechumene": "K1", "prenoms": "Paul", "nom": "Diop"}],
+        "inscriptions": [{"id": "i1", "id_inscription": "I1", "id_catechumene": "K1",
+                          "prenoms": "Paul", "nom": "Diop"}],
+        "notes": [{"id": "n1", "annee_scolaire": "2024-2025"}],
+    }
+
+    def test_tables_start_after_their_dependencies(self, tmp_path):
+        path = write_archive(tmp_path / "backup.zip", self.TABLES)
+        sink = RecordingSink()
+        results = restore_archive(sink, path, batch_size=1, table_workers=4, batch_workers=2)
+
+        assert all(not stats["errors"] for stats in results.values())
+        order = [table for _, table in sink.events]
+        for table, deps in RESTORE_DEPENDENCIES.items():
+            if table in order:
+                assert all(order.index(dep) < order.index(table) for dep in deps if dep in order)
+
+    def test_failed_table_blocks_its_dependents(self, tmp_path):
+        path = write_archive(tmp_path / "backup.zip", self.TABLES)
+        sink = RecordingSink(failing={"catechumenes"})
+        results = restore_archive(sink, path, table_workers=4)
+
+        assert results["catechumenes"]["errors"]
+        assert results["inscriptions"]["skipped"] and results["notes"]["skipped"]
+        assert ("write", "inscriptions") not in sink.events
+        assert ("write", "notes") not in sink.events
+        # Independent tables are still restored
+        assert sink.count("annees_scolaires") == 1 and sink.count("classes") == 1
+
+    def test_references_outside_the_selection_are_assumed_loaded(self, tmp_path):
+        path = write_archive(tmp_path / "backup.zip", {"inscriptions": self.TABLES["inscriptions"]})
+        sink = RecordingSink()
+        results = restore_archive(sink, path)
+        assert results["inscriptions"]["written"] == 1
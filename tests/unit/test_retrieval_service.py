@@ -0,0 +1,100 @@
+"""
+Unit tests for the local retrieval index
+"""
+
+import json
+import pytest
+from src.services.retrieval_service import HashingEmbedder, RetrievalService
+
+
+CORPUS = [
+    {"id": "horaires", "service": "RENSEIGNEMENT", "title": "Horaires des cours",
+     "text": "Les cours de catéchèse ont lieu le week-end."},
+    {"id": "documents", "service": "RENSEIGNEMENT", "title": "Documents requis",
+     "text": "Extrait de baptême, photo d'identité et autorisation parentale."},
+    {"id": "sacrements", "service": "CATECHESE", "title": "Les sept sacrements",
+     "text": "Baptême, confirmation, eucharistie, réconciliation, onction des malades, ordre et mariage."},
+]
+
+
+class FakeSupabase:
+    """Minimal stand-in for the services table query chain"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        return self
+
+    def select(self, *args):
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": self.rows})()
+
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    path = tmp_path / "knowledge_base.json"
+    path.write_text(json.dumps(CORPUS), encoding="utf-8")
+    return path
+
+
+@pytest.mark.unit
+class TestHashingEmbedder:
+    """Feature-hashing embedder"""
+
+    def test_vectors_are_unit_length(self):
+        import numpy as np
+        matrix = HashingEmbedder(dim=64).embed(["Catéchèse le week-end", ""])
+        assert matrix.shape == (2, 64)
+        assert np.isclose(np.linalg.norm(matrix[0]), 1.0)
+        assert not matrix[1].any()
+
+    def test_accents_and_plurals_are_folded(self):
+        embedder = HashingEmbedder(dim=256)
+        a, b = embedder.embed(["les sacrements", "Sacrement"])
+        assert float(a @ b) == pytest.approx(1.0)
+
+
+@pytest.mark.unit
+class TestRetrievalService:
+    """Index build and top-k search"""
+
+    def test_search_returns_relevant_document_for_service(self, corpus_path):
+        service = RetrievalService(corpus_path=corpus_path)
+        assert service.build() == 3
+        results = service.search("quels documents faut-il fournir ?", service="RENSEIGNEMENT", k=2)
+        assert results[0]["id"] == "documents"
+        assert all(doc["service"] == "RENSEIGNEMENT" for doc in results)
+
+    def test_unrelated_query_returns_nothing(self, corpus_path):
+        service = RetrievalService(corpus_path=corpus_path)
+        service.build()
+        assert service.search("match de football ce soir", k=3) == []
+
+    def test_services_catalog_is_indexed(self, corpus_path):
+        supabase = FakeSupabase([{
+            "code": "CATECHESE_SJB_DAKAR",
+            "title": "Catéchèse St Jean Bosco Dakar",
+            "description": "Informations, inscriptions, horaires",
+            "display_options": "1) Procédure d'inscription",
+            "flow": {"default_subservice": "infos"},
+        }])
+        service = RetrievalService(corpus_path=corpus_path)
+        assert service.build(supabase) == 4
+        results = service.search("Saint Jean Bosco", k=1)
+        assert results[0]["id"] == "service-CATECHESE_SJB_DAKAR"
+
+    def test_index_is_memory_mapped_from_cache(self, corpus_path, tmp_path):
+        cache_dir = tmp_path / "cache"
+        RetrievalService(corpus_path=corpus_path, cache_dir=str(cache_dir)).build()
+        assert len(list(cache_dir.glob("*.npy"))) == 1
+
+        service = RetrievalService(corpus_path=corpus_path, cache_dir=str(cache_dir))
+        service.build()
+        assert service.matrix.filename is not None
+        assert service.search("les sacrements", k=1)[0]["id"] == "sacrements"
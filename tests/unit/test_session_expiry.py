@@ -0,0 +1,277 @@
+"""
+Unit tests for the batched session expiry
+"""
+
+import asyncio
+import time
+import pytest
+from src.services.redis_service import RedisService, _with_expired_events
+from src.services.session_service import SessionService, run_session_expiry
+from src.utils.config import get_settings
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class Query:
+    def __init__(self, result):
+        self.result = result
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return Response(self.result)
+
+
+class FakeSupabase:
+    """expire_sessions returns the queued batches; table updates return the fallback rows"""
+
+    def __init__(self, batches=None, rpc_error=None, fallback_rows=None):
+        self.batches = list(batches or [])
+        self.rpc_error = rpc_error
+        self.fallback_rows = fallback_rows or []
+        self.rpc_calls = 0
+        self.table_calls = 0
+
+    def rpc(self, name, params):
+        self.rpc_calls += 1
+        if self.rpc_error:
+            return Query(self.rpc_error)
+        return Query(self.batches.pop(0) if self.batches else [])
+
+    def table(self, name):
+        self.table_calls += 1
+        return Query(self.fallback_rows)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.evicted = []
+
+    async def evict_sessions(self, session_ids, user_ids=None):
+        self.evicted.append((session_ids, user_ids))
+        return len(session_ids)
+
+
+def make_service(supabase, monkeypatch, batch_size=2):
+    monkeypatch.setattr(get_settings(), "session_expiry_batch_size", batch_size)
+    service = SessionService.__new__(SessionService)
+    service.settings = get_settings()
+    service.supabase = supabase
+    service._expiry_rpc_retry_at = 0.0
+    return service
+
+
+def rows(*ids):
+    return [{"id": session_id, "user_id": f"u-{session_id}"} for session_id in ids]
+
+
+@pytest.mark.unit
+class TestCleanupExpiredSessions:
+    """One statement per batch, one Redis round trip per batch"""
+
+    def test_batches_until_a_short_one(self, monkeypatch):
+        supabase = FakeSupabase(batches=[rows("s1", "s2"), rows("s3")])
+        redis = FakeRedis()
+        service = make_service(supabase, monkeypatch)
+
+        assert asyncio.run(service.cleanup_expired_sessions(redis)) == 3
+        assert supabase.rpc_calls == 2
+        assert redis.evicted == [(["s1", "s2"], ["u-s1", "u-s2"]), (["s3"], ["u-s3"])]
+
+    def test_nothing_to_expire(self, monkeypatch):
+        redis = FakeRedis()
+        service = make_service(FakeSupabase(), monkeypatch)
+        assert asyncio.run(service.cleanup_expired_sessions(redis)) == 0
+        assert redis.evicted == []
+
+    def test_falls_back_to_a_filtered_update(self, monkeypatch):
+        supabase = FakeSupabase(rpc_error=RuntimeError("function expire_sessions does not exist"),
+                                fallback_rows=rows("s1", "s2", "s3"))
+        service = make_service(supabase, monkeypatch)
+
+        assert asyncio.run(service.cleanup_expired_sessions()) == 3
+        assert asyncio.run(service.cleanup_expired_sessions()) == 3
+        assert supabase.rpc_calls == 1  # not retried on every run after a failure
+        assert supabase.table_calls == 2
+
+        # ...but tried again once the retry delay has passed
+        service._expiry_rpc_retry_at = time.monotonic() - 1
+        supabase.rpc_error = None
+        supabase.batches = [rows("s4")]
+        assert asyncio.run(service.cleanup_expired_sessions()) == 1
+        assert supabase.rpc_calls == 2
+        assert supabase.table_calls == 2
+
+
+class FakeRedisClient:
+    """Keys, one sorted set and the pipelines opened on them"""
+
+    def __init__(self, store=None, index=None):
+        self.store = store if store is not None else {}
+        self.index = index if index is not None else {}
+        self.pipelines = []
+
+    def pipeline(self, transaction=True):
+        self.pipelines.append(FakePipeline(self))
+        return self.pipelines[-1]
+
+    async def zrangebyscore(self, name, low, high, start=None, num=None):
+        due = sorted((score, member) for member, score in self.index.items() if score <= high)
+        return [member.encode() for _, member in due][:num]
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self):
+        results = []
+        for name, args in self.commands:
+            if name == "unlink":
+                results.append(sum(1 for key in args if self.client.store.pop(key, None) is not None))
+            elif name == "zrem":
+                results.append(sum(1 for member in args[1:] if self.client.index.pop(member, None) is not None))
+            elif name == "setex":
+                self.client.store[args[0]] = args[2]
+                results.append(True)
+            elif name == "zadd":
+                self.client.index.update(args[1])
+                results.append(len(args[1]))
+        return results
+
+
+def make_redis(client):
+    service = RedisService()
+    service.redis = client
+    return service
+
+
+@pytest.mark.unit
+class TestEvictSessions:
+    """Redis keys of expired sessions"""
+
+    def test_one_pipeline(self):
+        client = FakeRedisClient(
+            store={"session:s1": b"x", "session:s2": b"x", "conversation_history:s1": b"[]",
+                   "user_active_session:u1": b"s1"},
+            index={"s1": 1.0, "s2": 2.0},
+        )
+        removed = asyncio.run(make_redis(client).evict_sessions(["s1", "s2", "s3"], ["u1", "u1", None]))
+        assert removed == 4
+        assert client.store == {} and client.index == {}
+        assert len(client.pipelines) == 1
+
+
+@pytest.mark.unit
+class TestSessionExpiryIndex:
+    """Session keys carry a TTL and an entry in the expiry index"""
+
+    def test_set_session_indexes_the_expiry(self):
+        client = FakeRedisClient()
+        before = time.time()
+        service = make_redis(client)
+        assert asyncio.run(service.set_session("s1", {"id": "s1"}, expire=60))
+        assert client.pipelines[0].commands[0][0] == "setex"
+        assert service.codec.decode(client.store["session:s1"]) == {"id": "s1"}
+        assert before + 60 <= client.index["s1"] <= time.time() + 60
+
+    def test_delete_session_leaves_the_index(self):
+        client = FakeRedisClient(store={"session:s1": b"x"}, index={"s1": 1.0})
+        assert asyncio.run(make_redis(client).delete_session("s1"))
+        assert client.index == {}
+
+    def test_cleanup_claims_only_due_sessions(self):
+        now = time.time()
+        client = FakeRedisClient(index={"old": now - 10, "due": now - 1, "later": now + 600})
+        service = make_redis(client)
+
+        assert asyncio.run(service.cleanup_expired_sessions()) == ["old", "due"]
+        assert client.index == {"later": now + 600}
+        assert asyncio.run(service.cleanup_expired_sessions()) == []
+
+    def test_a_session_is_claimed_once(self):
+        client = FakeRedisClient(index={"s1": 1.0})
+        service = make_redis(client)
+        # The keyspace listener got there first: the sweep must not expire it again
+        assert asyncio.run(service._claim_sessions(["s1"])) == ["s1"]
+        assert asyncio.run(service._claim_sessions(["s1"])) == []
+
+
+@pytest.mark.unit
+class TestExpireSessionsById:
+    """Sessions reported by the expiry index"""
+
+    def test_expires_and_evicts(self, monkeypatch):
+        redis = FakeRedis()
+        service = make_service(FakeSupabase(fallback_rows=rows("s1")), monkeypatch)
+        assert asyncio.run(service.expire_sessions_by_id(["s1", "s2"], redis)) == 1
+        assert redis.evicted == [(["s1", "s2"], ["u-s1"])]
+
+    def test_no_ids_no_query(self, monkeypatch):
+        supabase = FakeSupabase()
+        service = make_service(supabase, monkeypatch)
+        assert asyncio.run(service.expire_sessions_by_id([])) == 0
+        assert supabase.table_calls == 0
+
+
+@pytest.mark.unit
+class TestKeyspaceNotifications:
+    """Expired keyevents are enabled without dropping the server's other flags"""
+
+    @pytest.mark.parametrize("current,expected", [
+        ("", "Ex"),
+        ("Kg", "KgEx"),
+        ("Ex", "Ex"),
+        ("AKE", "AKE"),
+        ("xK", "xKE"),
+    ])
+    def test_flags_are_merged(self, current, expected):
+        assert _with_expired_events(current) == expected
+
+
+class BrokenIndex:
+    """Redis service whose expiry index cannot be read"""
+
+    redis = object()
+
+    async def cleanup_expired_sessions(self, limit=None):
+        raise ConnectionError("redis down")
+
+
+class SweepRecorder:
+    """Session service stand-in stopping the loop after its first sweep"""
+
+    def __init__(self):
+        self.settings = type("Settings", (), {"session_expiry_batch_size": 10})()
+        self.sweeps = 0
+
+    async def cleanup_expired_sessions(self, redis_service=None):
+        self.sweeps += 1
+        raise asyncio.CancelledError
+
+
+@pytest.mark.unit
+class TestRunSessionExpiry:
+    """Periodic expiry task"""
+
+    def test_database_sweep_runs_when_the_index_drain_fails(self):
+        sessions = SweepRecorder()
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(run_session_expiry(sessions, BrokenIndex(), interval_seconds=0))
+        assert sessions.sweeps == 1
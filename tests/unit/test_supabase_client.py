@@ -0,0 +1,72 @@
+"""
+Unit tests for the interaction inserts of the legacy Supabase REST client
+"""
+
+import pytest
+import supabase_client as client_module
+from embeddings import embeddings_client
+from supabase_client import INTERACTION_VECTOR_DIM, SupabaseClient
+
+
+class FakeResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return []
+
+
+@pytest.fixture
+def posted(monkeypatch):
+    calls = []
+
+    def post(url, headers=None, json=None, timeout=None):
+        calls.append(json)
+        return FakeResponse()
+
+    monkeypatch.setattr(client_module.requests, "post", post)
+    return calls
+
+
+@pytest.mark.unit
+class TestInteractionEmbeddings:
+    """Only vectors matching the vector(384) column go into it"""
+
+    def test_matching_size_goes_to_the_vector_column(self, posted):
+        embedding = [0.1] * INTERACTION_VECTOR_DIM
+        assert SupabaseClient().log_interactions([{"session_id": "s1", "role": "user", "content": "hi",
+                                                   "embedding": embedding}])
+        assert posted[0][0]["embedding"] == embedding
+        assert posted[0][0]["embedding_json"] is None
+
+    def test_overridden_dimension_is_kept_as_json(self, posted, monkeypatch):
+        # EMBEDDING_DIM=1024 does not change the column size
+        monkeypatch.setattr(embeddings_client, "dim", 1024)
+        embedding = [0.1] * 1024
+        SupabaseClient().log_interaction("s1", "user", "hi", embedding=embedding)
+        assert posted[0]["embedding"] is None
+        assert posted[0]["embedding_json"] == embedding
+
+    def test_no_embedding(self, posted):
+        SupabaseClient().log_interactions([{"session_id": "s1", "role": "user", "content": "hi"}])
+        assert posted[0][0]["embedding"] is None
+        assert posted[0][0]["embedding_json"] is None
+
+
+@pytest.mark.unit
+class TestBulkTimestamps:
+    """Bulk inserts keep each row's own time"""
+
+    def test_queued_time_is_sent(self, posted):
+        SupabaseClient().log_interactions([
+            {"session_id": "s1", "role": "user", "content": "q", "ts": "2026-01-01T10:00:00+00:00"},
+            {"session_id": "s1", "role": "assistant", "content": "a"},
+        ])
+        assert posted[0][0]["ts"] == "2026-01-01T10:00:00+00:00"
+        # Every object carries the column, so the default never applies to just some rows
+        assert posted[0][1]["ts"]
+
+    def test_artifact_time_is_sent(self, posted):
+        SupabaseClient().save_artifacts([{"session_id": "s1", "service_code": "X", "type": "summary",
+                                          "content": "a", "created_at": "2026-01-01T10:00:00+00:00"}])
+        assert posted[0][0]["created_at"] == "2026-01-01T10:00:00+00:00"
@@ -0,0 +1,143 @@
+"""
+Unit tests for the in-process tracer
+"""
+
+import asyncio
+import io
+import json
+import pytest
+import structlog
+from src.utils import tracing
+from src.utils.logging_config import configure_logging
+from src.utils.metrics import StageTimer, observe_call
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def exported():
+    exporter = ListExporter()
+    tracing.tracer.processor = tracing.BatchSpanProcessor(exporter, flush_interval=0.05)
+    yield exporter
+    tracing.shutdown_tracing()
+
+
+@pytest.mark.unit
+class TestSpans:
+    """Parenting, propagation and export"""
+
+    def test_children_share_the_trace(self, exported):
+        timer = StageTimer()
+        with tracing.span("webhook", kind="server") as root:
+            with timer.stage("history"):
+                with observe_call("redis", "get"):
+                    assert tracing.current_trace_id() == root.trace_id
+        assert tracing.current_span() is None
+        tracing.shutdown_tracing()
+
+        by_name = {span.name: span for span in exported.spans}
+        assert set(by_name) == {"webhook", "history", "redis.get"}
+        assert by_name["history"].parent_id == root.span_id
+        assert by_name["redis.get"].parent_id == by_name["history"].span_id
+        assert {span.trace_id for span in exported.spans} == {root.trace_id}
+
+    def test_context_follows_to_thread(self):
+        async def main():
+            with tracing.span("webhook") as root:
+                trace_id = await asyncio.to_thread(tracing.current_trace_id)
+            return root.trace_id, trace_id
+
+        expected, seen = asyncio.run(main())
+        assert seen == expected
+
+    def test_errors_are_recorded(self, exported):
+        with pytest.raises(ValueError):
+            with tracing.span("persistence"):
+                raise ValueError("insert failed")
+        tracing.shutdown_tracing()
+        otlp = exported.spans[0].to_otlp()
+        assert otlp["status"] == {"code": 2, "message": "insert failed"}
+
+    def test_remote_parent(self):
+        header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        with tracing.span("webhook", traceparent=header) as root:
+            pass
+        assert root.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert root.parent_id == "00f067aa0ba902b7"
+        assert tracing.parse_traceparent("00-xyz-1-01") is None
+
+    def test_otlp_request_shape(self):
+        with tracing.span("claude.messages", kind="client", **{"claude.model": "m", "tokens": 3}) as active:
+            pass
+        body = tracing.otlp_request([active])
+        span = body["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert span["kind"] == 3
+        assert {"key": "tokens", "value": {"intValue": "3"}} in span["attributes"]
+        json.dumps(body)
+
+
+@pytest.mark.unit
+class TestHttpInstrumentation:
+    """httpx hooks and log correlation"""
+
+    def test_http_client_spans_and_traceparent(self, exported):
+        httpx = pytest.importorskip("httpx")
+        seen = {}
+
+        async def handler(request):
+            seen["traceparent"] = request.headers.get("traceparent")
+            return httpx.Response(201, json={"id": "x"})
+
+        async def main():
+            client = tracing.instrument_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)), "waha")
+            tracing.instrument_http_client(client, "waha")  # idempotent
+            with tracing.span("waha_send") as parent:
+                await client.post("http://waha:3000/api/sendText", json={})
+            await client.aclose()
+            return parent
+
+        parent = asyncio.run(main())
+        tracing.shutdown_tracing()
+        call = next(span for span in exported.spans if span.kind == "client")
+        assert call.name == "waha POST /api/sendText"
+        assert call.parent_id == parent.span_id
+        assert call.attributes["http.status_code"] == 201
+        assert seen["traceparent"] == call.traceparent
+
+    def test_transport_failure_ends_the_span(self, exported):
+        httpx = pytest.importorskip("httpx")
+
+        async def handler(request):
+            raise httpx.ConnectError("connection refused", request=request)
+
+        async def main():
+            client = tracing.instrument_http_client(httpx.AsyncClient(transport=httpx.MockTransport(handler)), "waha")
+            tracing.instrument_http_client(client, "waha")  # still wrapped once
+            with pytest.raises(httpx.ConnectError):
+                await client.post("http://waha:3000/api/sendText", json={})
+            await client.aclose()
+
+        asyncio.run(main())
+        tracing.shutdown_tracing()
+        calls = [span for span in exported.spans if span.kind == "client"]
+        assert len(calls) == 1
+        assert calls[0].to_otlp()["status"] == {"code": 2, "message": "ConnectError: connection refused"}
+
+    def test_log_events_carry_trace_id(self):
+        stream = io.StringIO()
+        sink = configure_logging(level="INFO", stream=stream)
+        with tracing.span("webhook") as root:
+            structlog.get_logger().info("interaction_processed")
+        sink.stop()
+        structlog.reset_defaults()
+        line = json.loads(stream.getvalue().splitlines()[0])
+        assert line["trace_id"] == root.trace_id
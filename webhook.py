@@ -11,6 +11,7 @@ from auto_reply_service import auto_reply_service
 from session_manager import session_manager
 from wa_service import send_text as wa_send_text
 from version_info import get_version_info
+from src.utils.phone import strip_jid
 
 app = FastAPI(title="WhatsApp Webhook", description="Webhook for receiving WhatsApp messages from WAHA")
 
@@ -53,7 +54,7 @@ async def receive_message(request: Request):
     """Receive WhatsApp messages from WAHA"""
     try:
         data = await request.json()
-        logger.info(f"Received webhook data: {data}")
+        logger.debug("Received webhook data: %s", data)
 
         # WAHA message format typically includes:
         # - session: session identifier
@@ -94,7 +95,7 @@ def _extract_phone_and_text(event_data: Dict[str, Any]) -> (str, str):
     if not raw_from:
         rjid = ((payload.get('media') or {}).get('key') or {}).get('remoteJid', '')
         raw_from = rjid
-    phone = raw_from.replace('@c.us', '').replace('@s.whatsapp.net', '')
+    phone = strip_jid(raw_from)
     return phone, message_body
 
 
@@ -174,6 +175,13 @@ async def version():
         logger.error(f"Error building version info: {e}")
         return {"app": "ai-concierge-webhook", "version": "unknown"}
 
+@app.get("/interaction-log/stats")
+async def interaction_log_stats():
+    """Background interaction logging pipeline: queue depth, writes and drops"""
+    from interaction_logger import interaction_logger
+
+    return interaction_logger.stats()
+
 class ToggleRequest(BaseModel):
     enabled: bool = True
 